@@ -0,0 +1,328 @@
+import threading
+import numpy as np
+from typing import Dict, Optional
+
+
+class CopyCounter:
+    """
+    Process-wide tally of audio sample copies, keyed by call site.
+
+    Off by default so the hot paths only pay an attribute check. Pipelines
+    reset it at the start of a run when DebugConfig.count_copies is set and
+    report snapshot() with their results; concurrent runs in one process
+    share the tally.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.sites: Dict[str, list] = {}
+
+    def reset(self):
+        with self._lock:
+            self.sites = {}
+
+    def begin(self):
+        """Enables counting and starts a fresh tally for a new run."""
+        self.enabled = True
+        self.reset()
+
+    def record(self, site: str, nbytes: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.sites.setdefault(site, [0, 0])
+            entry[0] += 1
+            entry[1] += int(nbytes)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            sites = {site: {"copies": n, "bytes": b} for site, (n, b) in sorted(self.sites.items())}
+        return {
+            "copies": sum(s["copies"] for s in sites.values()),
+            "bytes": sum(s["bytes"] for s in sites.values()),
+            "sites": sites
+        }
+
+
+COPIES = CopyCounter()
+
+
+def _aligned_empty(num_samples: int, align: int = 64) -> np.ndarray:
+    """float32 storage whose first sample sits on an `align`-byte boundary."""
+    raw = np.empty(num_samples * 4 + align, dtype=np.uint8)
+    offset = -raw.ctypes.data % align
+    return raw[offset:offset + num_samples * 4].view(np.float32)
+
+
+class AudioBuffer(np.ndarray):
+    """
+    float32, C-contiguous samples that carry their sample rate (`.sr`).
+
+    An ndarray subclass, so every numpy-based call accepts it unchanged and
+    views or arithmetic results keep the sample rate. wrap() is the one
+    conversion point: it is free when the input already has the layout
+    (including CPU torch tensors and TF eager tensors), and otherwise copies
+    once into 64-byte aligned storage, recording the copy in COPIES.
+    to_torch() and to_tf() hand the same memory to the frameworks; TF only
+    aliases host buffers that are aligned, which wrap() guarantees for the
+    storage it allocates.
+    """
+
+    def __array_finalize__(self, obj):
+        self.sr = getattr(obj, 'sr', None)
+
+    def __array_wrap__(self, arr, context=None, return_scalar=False):
+        if arr.ndim == 0:
+            return arr[()]
+        return super().__array_wrap__(arr, context)
+
+    def __reduce__(self):
+        constructor, args, state = super().__reduce__()
+        return constructor, args, (state, self.sr)
+
+    def __setstate__(self, state):
+        state, self.sr = state
+        super().__setstate__(state)
+
+    @classmethod
+    def wrap(cls, data, sr: Optional[int] = None, site: str = "wrap") -> "AudioBuffer":
+        """
+        data as a 1-D AudioBuffer without copying when possible.
+
+        sr defaults to data.sr for AudioBuffers and 16000 otherwise. site
+        names the caller in the copy tally.
+        """
+        if sr is None:
+            sr = getattr(data, 'sr', None) or 16000
+
+        if isinstance(data, AudioBuffer) and data.sr == sr and data.ndim == 1 and data.flags.c_contiguous:
+            return data
+
+        if not isinstance(data, np.ndarray):
+            if hasattr(data, 'detach'):
+                data = data.detach().cpu()
+            if hasattr(data, 'numpy'):
+                data = data.numpy()
+            else:
+                site += ":sequence"
+        array = np.asarray(data)
+        if array.ndim > 1 and max(array.shape) != array.size:
+            raise ValueError(f"AudioBuffer holds mono audio, got shape {array.shape}")
+
+        if array.dtype == np.float32 and array.flags.c_contiguous:
+            buffer = array.reshape(-1).view(cls)
+        else:
+            buffer = cls.copy_of(array, sr, site)
+        buffer.sr = int(sr)
+        return buffer
+
+    @classmethod
+    def copy_of(cls, data, sr: Optional[int] = None, site: str = "copy") -> "AudioBuffer":
+        """A fresh aligned copy of data, for when the source will be reused or mutated."""
+        array = np.asarray(data)
+        storage = _aligned_empty(array.size)
+        np.copyto(storage, array.reshape(-1), casting='unsafe')
+        COPIES.record(site, storage.nbytes)
+
+        buffer = storage.view(cls)
+        buffer.sr = int(sr or getattr(data, 'sr', None) or 16000)
+        return buffer
+
+    @classmethod
+    def empty(cls, num_samples: int, sr: int = 16000) -> "AudioBuffer":
+        buffer = _aligned_empty(num_samples).view(cls)
+        buffer.sr = int(sr)
+        return buffer
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.sr
+
+    def numpy(self) -> np.ndarray:
+        """Plain ndarray view of the same samples."""
+        return self.view(np.ndarray)
+
+    def to_torch(self, device: str = "cpu"):
+        import torch
+        tensor = torch.from_numpy(self.numpy())
+        if str(device) != "cpu":
+            COPIES.record(f"to_torch:{device}", self.nbytes)
+            tensor = tensor.to(device)
+        return tensor
+
+    def to_tf(self):
+        import tensorflow as tf
+        return tf.convert_to_tensor(self.numpy())
+
+
+class SampleRing:
+    """
+    Fixed-size history of the most recent samples with a zero-copy view.
+
+    Every sample is stored twice, capacity apart, so the last `capacity`
+    samples are always one contiguous slice; the price is writing each chunk
+    twice instead of rebuilding the whole context on every read. The view
+    returned by context() is only valid until the next extend().
+    """
+
+    def __init__(self, capacity: int, sr: int = 16000):
+        self.capacity = int(capacity)
+        self.sr = sr
+        self._data = _aligned_empty(2 * self.capacity)
+        self._head = 0
+        self._filled = 0
+
+    def __len__(self) -> int:
+        return self._filled
+
+    def clear(self):
+        self._head = 0
+        self._filled = 0
+
+    def extend(self, samples: np.ndarray):
+        samples = np.asarray(samples).reshape(-1)[-self.capacity:]
+        n = len(samples)
+        if n == 0:
+            return
+
+        first = min(n, self.capacity - self._head)
+        for base in (0, self.capacity):
+            self._data[base + self._head:base + self._head + first] = samples[:first]
+            self._data[base:base + n - first] = samples[first:]
+        COPIES.record("ring", 2 * n * 4)
+
+        self._head = (self._head + n) % self.capacity
+        self._filled = min(self.capacity, self._filled + n)
+
+    def context(self) -> AudioBuffer:
+        end = self._head + self.capacity
+        view = self._data[end - self._filled:end].view(AudioBuffer)
+        view.sr = self.sr
+        return view
+
+
+class SampleQueue:
+    """
+    Growable float32 sample buffer for an utterance in progress.
+
+    Appends land in place (capacity doubles when full); take() hands out an
+    owned copy of the front and shifts the rest down.
+    """
+
+    def __init__(self, sr: int = 16000, capacity: int = 16000):
+        self.sr = sr
+        self._data = _aligned_empty(max(1, int(capacity)))
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        self._size = 0
+
+    def extend(self, samples: np.ndarray):
+        samples = np.asarray(samples).reshape(-1)
+        end = self._size + len(samples)
+        if end > len(self._data):
+            grown = _aligned_empty(max(end, 2 * len(self._data)))
+            grown[:self._size] = self._data[:self._size]
+            COPIES.record("queue_grow", self._size * 4)
+            self._data = grown
+        self._data[self._size:end] = samples
+        COPIES.record("queue", len(samples) * 4)
+        self._size = end
+
+    def view(self, start: int = 0, stop: Optional[int] = None) -> AudioBuffer:
+        """Zero-copy view of buffered samples; invalid after the next extend() or take()."""
+        stop = self._size if stop is None else min(stop, self._size)
+        view = self._data[start:max(start, stop)].view(AudioBuffer)
+        view.sr = self.sr
+        return view
+
+    def quietest_cut(self, stop: int, search: int, frame: int) -> int:
+        """Centre of the lowest-energy frame in the last `search` samples before stop, or stop."""
+        start = max(0, stop - search)
+        window = self.view(start, stop)
+        n_frames = len(window) // frame
+        if n_frames == 0:
+            return stop
+        energy = np.mean(window[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1)
+        return start + int(np.argmin(energy)) * frame + frame // 2
+
+    def consume(self, n: int):
+        """Drops the first n samples."""
+        n = min(n, self._size)
+        remainder = self._size - n
+        if remainder and n:
+            self._data[:remainder] = self._data[n:self._size]
+            COPIES.record("queue_shift", remainder * 4)
+        self._size = remainder
+
+    def take(self, n: Optional[int] = None) -> AudioBuffer:
+        """Removes and returns the first n samples (all by default) as an owned buffer."""
+        n = self._size if n is None else min(n, self._size)
+        taken = AudioBuffer.copy_of(self._data[:n], self.sr, site="utterance")
+        self.consume(n)
+        return taken
+
+
+if __name__ == "__main__":
+    import pickle
+
+    print("Testing AudioBuffer...")
+    COPIES.begin()
+
+    raw = np.random.randn(16000).astype(np.float32)
+    buffer = AudioBuffer.wrap(raw, 16000)
+    assert np.shares_memory(buffer, raw) and buffer.sr == 16000 and buffer.duration == 1.0
+    assert AudioBuffer.wrap(buffer) is buffer
+    assert COPIES.snapshot()["copies"] == 0
+
+    converted = AudioBuffer.wrap(raw.astype(np.float64), 16000, site="test")
+    assert converted.dtype == np.float32 and converted.ctypes.data % 64 == 0
+    strided = AudioBuffer.wrap(np.stack([raw, raw], axis=1)[:, 0], 8000, site="test")
+    assert strided.flags.c_contiguous and strided.sr == 8000
+    assert COPIES.snapshot()["sites"]["test"]["copies"] == 2
+    print("✓ wrap is zero-copy for float32 contiguous input, copies (and counts) otherwise")
+
+    scaled = buffer * 0.5
+    assert isinstance(scaled, AudioBuffer) and scaled.sr == 16000
+    assert isinstance(buffer[100:200], AudioBuffer) and buffer[100:200].sr == 16000
+    assert not isinstance(np.max(np.abs(buffer)), np.ndarray)
+    restored = pickle.loads(pickle.dumps(buffer[:10]))
+    assert restored.sr == 16000 and np.array_equal(restored, raw[:10])
+    print("✓ Sample rate survives views, arithmetic and pickling; reductions stay scalars")
+
+    try:
+        import torch
+        tensor = buffer.to_torch()
+        assert tensor.data_ptr() == buffer.ctypes.data
+        assert AudioBuffer.wrap(tensor).ctypes.data == buffer.ctypes.data
+        print("✓ Zero-copy torch interop")
+    except ImportError:
+        print("  (torch not installed; skipped interop check)")
+
+    ring = SampleRing(5)
+    ring.extend(np.arange(3, dtype=np.float32))
+    assert ring.context().tolist() == [0, 1, 2]
+    ring.extend(np.arange(3, 7, dtype=np.float32))
+    assert ring.context().tolist() == [2, 3, 4, 5, 6] and ring.context().flags.c_contiguous
+    ring.extend(np.arange(10, 22, dtype=np.float32))
+    assert ring.context().tolist() == [17, 18, 19, 20, 21]
+    print("✓ SampleRing keeps the latest samples as one contiguous view")
+
+    queue = SampleQueue(capacity=4)
+    for start in range(0, 12, 3):
+        queue.extend(np.arange(start, start + 3, dtype=np.float32))
+    assert len(queue) == 12 and queue.view(2, 5).tolist() == [2, 3, 4]
+    head = queue.take(5)
+    assert head.tolist() == [0, 1, 2, 3, 4] and queue.view().tolist() == list(range(5, 12))
+    queue.consume(2)
+    assert queue.take().tolist() == list(range(7, 12)) and len(queue) == 0
+    queue.extend(np.array([5, 5, 5, 5, 0, 0, 5, 5], dtype=np.float32))
+    assert queue.quietest_cut(8, 8, 2) == 5 and queue.quietest_cut(1, 8, 2) == 1
+    print("✓ SampleQueue grows in place and hands out owned utterances")
+
+    print(f"  Copies recorded: {COPIES.snapshot()['copies']}")
+    print("\n✓ AudioBuffer working correctly")
@@ -10,6 +10,8 @@ from jiwer import wer, cer
 import json
 import time
 
+from audio_buffer import AudioBuffer
+
 
 class AudioUtils:
     
@@ -20,7 +22,7 @@ class AudioUtils:
         mono: bool = True,
         duration: Optional[float] = None,
         offset: float = 0.0
-    ) -> Tuple[np.ndarray, int]:
+    ) -> Tuple[AudioBuffer, int]:
         audio, sample_rate = librosa.load(
             path,
             sr=sr,
@@ -28,7 +30,7 @@ class AudioUtils:
             duration=duration,
             offset=offset
         )
-        return audio, sample_rate
+        return AudioBuffer.wrap(audio, sample_rate, site="load_audio"), sample_rate
     
     @staticmethod
     def save_audio(
@@ -43,10 +45,11 @@ class AudioUtils:
         audio: np.ndarray,
         orig_sr: int,
         target_sr: int
-    ) -> np.ndarray:
+    ) -> AudioBuffer:
         if orig_sr == target_sr:
-            return audio
-        return librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr)
+            return AudioBuffer.wrap(audio, target_sr, site="resample")
+        audio = AudioBuffer.wrap(audio, orig_sr, site="resample").numpy()
+        return AudioBuffer.wrap(librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr), target_sr)
     
     @staticmethod
     def normalize_audio(
@@ -63,10 +66,7 @@ class AudioUtils:
         audio: np.ndarray,
         device: str = "cpu"
     ) -> torch.Tensor:
-        tensor = torch.from_numpy(audio).float()
-        if len(tensor.shape) == 1:
-            tensor = tensor.unsqueeze(0)
-        return tensor.to(device)
+        return AudioBuffer.wrap(audio, site="numpy_to_torch").to_torch(device).unsqueeze(0)
     
     @staticmethod
     def torch_to_numpy(audio: torch.Tensor) -> np.ndarray:
@@ -163,6 +163,35 @@ class AudioUtils:
             return float('inf')
         return float(processing_time / audio_duration)
     
+    @staticmethod
+    def synthetic_speech(
+        duration: float,
+        sr: int = 16000,
+        seed: int = 0
+    ) -> np.ndarray:
+        """Speech-like bursts (harmonic, amplitude modulated) separated by pauses, over broadband noise."""
+        rng = np.random.default_rng(seed)
+        n = int(duration * sr)
+        t = np.arange(n, dtype=np.float32) / sr
+        
+        audio = rng.standard_normal(n).astype(np.float32) * 0.02
+        
+        position = 0
+        while position < n:
+            burst = int(rng.uniform(0.8, 3.0) * sr)
+            pause = int(rng.uniform(0.3, 1.2) * sr)
+            end = min(position + burst, n)
+            
+            f0 = rng.uniform(100, 220)
+            seg_t = t[position:end]
+            voiced = sum(np.sin(2 * np.pi * f0 * k * seg_t) / k for k in range(1, 6))
+            envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 6) * seg_t))
+            audio[position:end] += (0.2 * envelope * voiced).astype(np.float32)
+            
+            position = end + pause
+        
+        return np.clip(audio, -1.0, 1.0)
+    
     @staticmethod
     def export_metrics_json(
         metrics: Dict,
@@ -234,9 +263,10 @@ if __name__ == "__main__":
     tensor = AudioUtils.numpy_to_torch(audio)
     assert isinstance(tensor, torch.Tensor)
     assert tensor.shape[0] == 1
+    assert tensor.data_ptr() == audio.ctypes.data
     back_to_numpy = AudioUtils.torch_to_numpy(tensor)
     assert isinstance(back_to_numpy, np.ndarray)
-    print("✓ Numpy/Torch conversion works")
+    print("✓ Numpy/Torch conversion works (zero-copy)")
     
     rms = AudioUtils.calculate_rms(audio)
     assert rms > 0
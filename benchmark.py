@@ -0,0 +1,485 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+from config import Config
+from audio_utils import AudioUtils
+
+
+STAGES = ["decode", "yamnet", "vad", "demucs", "demucs_small", "demucs_chunked", "demucs_compiled",
+          "asr", "metrics", "pipeline"]
+
+# Alternative Demucs paths (smaller model, fixed shapes) are compared against
+# the one-shot eager output of the default model.
+DEMUCS_VARIANTS = ["demucs_small", "demucs_chunked", "demucs_compiled"]
+
+DEFAULT_DURATIONS = [10, 60, 300, 1800]
+
+# Stages that hold the whole signal in one model call get skipped above this
+# length by default so a full run finishes on a laptop.
+DEFAULT_STAGE_LIMITS = {"asr": 300, "metrics": 300, "pipeline": 300}
+
+REGRESSION_METRICS = ["wall_time_sec", "peak_rss_delta_mb"]
+
+
+class PeakMemorySampler:
+    """Samples process RSS on a background thread; works for torch/TF native allocations too."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_rss = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current_rss() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.current_rss())
+
+    def __enter__(self):
+        self.start_rss = self.current_rss()
+        self.peak_rss = self.start_rss
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self.current_rss())
+        return False
+
+
+class Benchmark:
+
+    def __init__(
+        self,
+        config: Config = None,
+        durations: Sequence[float] = DEFAULT_DURATIONS,
+        stages: Sequence[str] = STAGES,
+        stage_limits: Optional[Dict[str, float]] = None,
+        seed: int = 0,
+        compiled_backend: str = "trace"
+    ):
+        self.config = config or Config.default()
+        self.durations = list(durations)
+        self.stages = list(stages)
+        self.stage_limits = DEFAULT_STAGE_LIMITS if stage_limits is None else stage_limits
+        self.seed = seed
+        self.compiled_backend = compiled_backend
+        self.sr = self.config.audio.sample_rate
+
+        unknown = set(self.stages) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}")
+
+        self._pipeline = None
+        self._components = {}
+        self._last_output = None
+
+    def synthetic_input(self, duration: float) -> np.ndarray:
+        return AudioUtils.synthetic_speech(duration, self.sr, self.seed)
+
+    def _get_pipeline(self):
+        if self._pipeline is None:
+            from pipeline_recorded import RecordedPipeline
+            self._pipeline = RecordedPipeline(self.config)
+        return self._pipeline
+
+    def _component(self, name: str):
+        if self._pipeline is not None:
+            return getattr(self._pipeline, name)
+
+        if name not in self._components:
+            if name == "classifier":
+                from noise_classifier import NoiseClassifier
+                self._components[name] = NoiseClassifier(self.config)
+            elif name == "vad":
+                from vad_processor import VADProcessor
+                self._components[name] = VADProcessor(self.config)
+            elif name == "denoiser":
+                from denoiser_preprocessor import DenoiserProcessor
+                self._components[name] = DenoiserProcessor(self.config)
+            elif name == "transcriber":
+                from transcriber import Transcriber
+                self._components[name] = Transcriber(self.config, language="kn")
+        return self._components[name]
+
+    def _measure(self, fn: Callable, audio_duration: float) -> Dict:
+        with PeakMemorySampler() as mem:
+            start = time.perf_counter()
+            self._last_output = fn()
+            wall = time.perf_counter() - start
+
+        return {
+            "audio_duration_sec": audio_duration,
+            "wall_time_sec": round(wall, 4),
+            "rtf": round(AudioUtils.calculate_rtf(wall, audio_duration), 4),
+            "throughput_x_realtime": round(audio_duration / wall, 2) if wall > 0 else None,
+            "peak_rss_mb": round(mem.peak_rss / 2**20, 1),
+            "peak_rss_delta_mb": round((mem.peak_rss - mem.start_rss) / 2**20, 1)
+        }
+
+    def _stage_fn(self, stage: str, audio: np.ndarray, wav_path: Path, work_dir: Path) -> Callable:
+        sr = self.sr
+
+        if stage == "decode":
+            return lambda: AudioUtils.load_audio(wav_path, sr=sr)
+        if stage == "yamnet":
+            classifier = self._component("classifier")
+            return lambda: classifier.analyze_background_noise(audio, sr)
+        if stage == "vad":
+            vad = self._component("vad")
+            return lambda: vad.process_audio(audio, sr)
+        if stage == "demucs":
+            denoiser = self._component("denoiser")
+            return lambda: denoiser.denoise(audio, sr, backend="eager")
+        if stage == "demucs_small":
+            denoiser = self._component("denoiser")
+            variant = self.config.denoise.small_variant or denoiser.default_variant
+            denoiser.get_model(variant)
+            return lambda: denoiser.denoise(audio, sr, backend="eager", variant=variant)
+        if stage == "demucs_chunked":
+            denoiser = self._component("denoiser")
+            return lambda: denoiser.denoise_chunked(audio, sr, backend="eager")
+        if stage == "demucs_compiled":
+            denoiser = self._component("denoiser")
+            denoiser.prepare(self.compiled_backend, sr)
+            return lambda: denoiser.denoise_chunked(audio, sr, backend=self.compiled_backend)
+        if stage == "asr":
+            transcriber = self._component("transcriber")
+            return lambda: transcriber.transcribe(audio, sr)
+        if stage == "metrics":
+            degraded = audio + np.random.default_rng(self.seed + 1).standard_normal(len(audio)).astype(np.float32) * 0.01
+
+            def metrics():
+                AudioUtils.calculate_snr(audio, degraded - audio)
+                AudioUtils.calculate_pesq(audio, degraded, sr)
+                AudioUtils.calculate_stoi(audio, degraded, sr)
+            return metrics
+        if stage == "pipeline":
+            pipeline = self._get_pipeline()
+            return lambda: pipeline.process(audio_path=wav_path, output_dir=work_dir / "pipeline")
+
+        raise ValueError(f"Unknown stage: {stage}")
+
+    def run(self) -> Dict:
+        if "pipeline" in self.stages:
+            self._get_pipeline()
+
+        results = {}
+
+        with tempfile.TemporaryDirectory(prefix="dhwani_bench_") as tmp:
+            work_dir = Path(tmp)
+
+            for duration in self.durations:
+                audio = self.synthetic_input(duration)
+                wav_path = work_dir / f"synthetic_{int(duration)}s.wav"
+                AudioUtils.save_audio(wav_path, audio, self.sr)
+
+                print(f"\n{'='*70}")
+                print(f"BENCHMARK INPUT: {duration:.0f}s")
+                print(f"{'='*70}")
+
+                eager_reference = None
+
+                for stage in self.stages:
+                    key = f"{stage}@{int(duration)}s"
+                    limit = self.stage_limits.get(stage)
+                    if limit is not None and duration > limit:
+                        print(f"  {stage:<10} skipped (> {limit:.0f}s limit)")
+                        results[key] = {"skipped": True}
+                        continue
+
+                    try:
+                        fn = self._stage_fn(stage, audio, wav_path, work_dir)
+                        results[key] = self._measure(fn, duration)
+                    except Exception as e:
+                        print(f"  {stage:<10} ✗ {e}")
+                        results[key] = {"error": repr(e)}
+                        continue
+
+                    r = results[key]
+                    if stage == "demucs":
+                        eager_reference = self._last_output
+                    elif stage in DEMUCS_VARIANTS and eager_reference is not None:
+                        diff = self._last_output[:len(eager_reference)] - eager_reference
+                        r["snr_vs_eager_db"] = round(AudioUtils.calculate_snr(eager_reference, diff), 2)
+                    if stage == "demucs_compiled":
+                        denoiser = self._component("denoiser")
+                        r["compile_time_sec"] = round(sum(
+                            t for (backend, _, _, _), t in denoiser.compile_times.items()
+                            if backend == self.compiled_backend
+                        ), 3)
+                    self._last_output = None
+
+                    print(f"  {stage:<10} {r['wall_time_sec']:>9.3f}s  RTF {r['rtf']:.4f}  "
+                          f"{r['throughput_x_realtime']}x  peak {r['peak_rss_mb']:.0f}MB "
+                          f"(+{r['peak_rss_delta_mb']:.0f}MB)"
+                          + (f"  vs eager {r['snr_vs_eager_db']:.1f}dB" if "snr_vs_eager_db" in r else ""))
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "cpu_count": os.cpu_count()
+            },
+            "durations_sec": self.durations,
+            "stages": self.stages,
+            "results": results
+        }
+
+    def precision_report(
+        self,
+        inputs: Sequence,
+        max_wer_delta: float = 0.02,
+        min_snr_db: float = 20.0
+    ) -> Dict:
+        """
+        Runs Demucs and the conformer in fp32 and bf16 on the same inputs.
+
+        inputs are (name, audio, ground_truth) tuples. WER is measured against
+        the ground truth when there is one and against the fp32 transcript
+        otherwise; the denoiser is judged by the SNR of the bf16 output
+        relative to the fp32 output.
+        """
+        denoiser = self._component("denoiser")
+        transcriber = self._component("transcriber")
+        sr = self.sr
+
+        warm = AudioUtils.synthetic_speech(1.0, sr, self.seed)
+        for precision in ("fp32", "bf16"):
+            denoiser.precision = transcriber.precision = precision
+            transcriber.transcribe(denoiser.denoise(warm, sr), sr)
+
+        files = {}
+        try:
+            for name, audio, ground_truth in inputs:
+                runs = {}
+                for precision in ("fp32", "bf16"):
+                    denoiser.precision = transcriber.precision = precision
+
+                    start = time.perf_counter()
+                    denoised = denoiser.denoise(audio, sr)
+                    denoise_time = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    text = transcriber.transcribe(denoised, sr)['text']
+                    asr_time = time.perf_counter() - start
+
+                    runs[precision] = {"denoised": denoised, "text": text,
+                                       "demucs_sec": denoise_time, "asr_sec": asr_time}
+
+                fp32, bf16 = runs["fp32"], runs["bf16"]
+                reference = ground_truth or fp32["text"]
+
+                wer_fp32 = wer_bf16 = wer_delta = None
+                if reference.strip():
+                    wer_fp32 = AudioUtils.calculate_wer(reference, fp32["text"]) if ground_truth else 0.0
+                    wer_bf16 = AudioUtils.calculate_wer(reference, bf16["text"])
+                    wer_delta = wer_bf16 - wer_fp32
+
+                n = min(len(fp32["denoised"]), len(bf16["denoised"]))
+                snr_vs_fp32 = AudioUtils.calculate_snr(
+                    fp32["denoised"][:n], bf16["denoised"][:n] - fp32["denoised"][:n]
+                )
+
+                files[name] = {
+                    "duration_sec": round(len(audio) / sr, 2),
+                    "wer_reference": "ground_truth" if ground_truth else "fp32",
+                    "wer_fp32": None if wer_fp32 is None else round(wer_fp32, 4),
+                    "wer_bf16": None if wer_bf16 is None else round(wer_bf16, 4),
+                    "wer_delta": None if wer_delta is None else round(wer_delta, 4),
+                    "snr_bf16_vs_fp32_db": round(snr_vs_fp32, 2) if np.isfinite(snr_vs_fp32) else None,
+                    "timing_sec": {
+                        stage: {p: round(runs[p][f"{stage}_sec"], 3) for p in runs}
+                        for stage in ("demucs", "asr")
+                    },
+                    "speedup": {
+                        stage: round(fp32[f"{stage}_sec"] / bf16[f"{stage}_sec"], 2) if bf16[f"{stage}_sec"] > 0 else None
+                        for stage in ("demucs", "asr")
+                    },
+                    "passed": (wer_delta is None or wer_delta <= max_wer_delta)
+                              and (not np.isfinite(snr_vs_fp32) or snr_vs_fp32 >= min_snr_db)
+                }
+        finally:
+            denoiser.precision = transcriber.precision = self.config.models.precision
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "cpu_bf16_flags": cpu_bf16_flags(),
+            "guardrails": {"max_wer_delta": max_wer_delta, "min_snr_db": min_snr_db},
+            "files": files,
+            "passed": all(f["passed"] for f in files.values())
+        }
+
+
+def cpu_bf16_flags() -> List[str]:
+    """CPU features that make bf16 matmuls fast (empty when unknown or absent)."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = set(line.split(":", 1)[1].split())
+                    return sorted(flags & {"avx512_bf16", "amx_bf16", "amx_tile"})
+    except OSError:
+        pass
+    return []
+
+
+def compare_to_baseline(
+    current: Dict,
+    baseline: Dict,
+    tolerance: float = 0.15,
+    min_abs_time: float = 0.05,
+    min_abs_memory: float = 16.0
+) -> List[Dict]:
+    """Returns every metric that got worse by more than tolerance (relative) and the noise floor (absolute)."""
+    floors = {"wall_time_sec": min_abs_time, "peak_rss_delta_mb": min_abs_memory}
+
+    regressions = []
+    for key, cur in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or "wall_time_sec" not in cur or "wall_time_sec" not in base:
+            continue
+
+        for metric in REGRESSION_METRICS:
+            b, c = base.get(metric), cur.get(metric)
+            if b is None or c is None:
+                continue
+            if c > b * (1 + tolerance) and c - b > floors[metric]:
+                regressions.append({
+                    "benchmark": key,
+                    "metric": metric,
+                    "baseline": b,
+                    "current": c,
+                    "change_percent": round((c - b) / b * 100, 1) if b else None
+                })
+
+    return regressions
+
+
+def _run_precision_report(bench: Benchmark, args) -> int:
+    inputs = []
+    if args.inputs:
+        for path in args.inputs:
+            audio, _ = AudioUtils.load_audio(path, sr=bench.sr)
+            truth_path = path.with_suffix(".txt")
+            ground_truth = truth_path.read_text(encoding="utf-8").strip() if truth_path.exists() else None
+            inputs.append((path.name, audio, ground_truth))
+    else:
+        limit = bench.stage_limits.get("asr")
+        for duration in bench.durations:
+            if limit is None or duration <= limit:
+                inputs.append((f"synthetic_{int(duration)}s", bench.synthetic_input(duration), None))
+
+    report = bench.precision_report(inputs, args.max_wer_delta, args.min_snr_db)
+
+    print(f"\nbf16 CPU support: {', '.join(report['cpu_bf16_flags']) or 'not detected'}")
+    for name, r in report["files"].items():
+        mark = "✓" if r["passed"] else "✗"
+        print(f"  {mark} {name:<28} WER Δ {r['wer_delta']}  SNR vs fp32 {r['snr_bf16_vs_fp32_db']} dB  "
+              f"speedup demucs {r['speedup']['demucs']}x asr {r['speedup']['asr']}x")
+
+    output = args.output or bench.config.paths.output_dir / "benchmarks" / "precision_report.json"
+    output.parent.mkdir(exist_ok=True, parents=True)
+    AudioUtils.export_metrics_json(report, output)
+    print(f"\n✓ Report saved to: {output}")
+    return 0 if report["passed"] else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Dhwani-X performance benchmarks")
+    parser.add_argument("--durations", type=float, nargs="+", default=DEFAULT_DURATIONS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=Path("benchmarks/baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed relative slowdown / memory growth before failing")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--no-limits", action="store_true",
+                        help="run every stage on every duration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--precision-report", action="store_true",
+                        help="compare fp32 and bf16 demucs/asr instead of running the stage benchmark")
+    parser.add_argument("--inputs", type=Path, nargs="+", default=None,
+                        help="audio files for --precision-report (a sibling .txt is used as ground truth)")
+    parser.add_argument("--max-wer-delta", type=float, default=0.02)
+    parser.add_argument("--min-snr-db", type=float, default=20.0)
+    parser.add_argument("--denoise-backend", choices=["trace", "compile"], default="trace",
+                        help="compiled backend for the demucs_compiled stage")
+    args = parser.parse_args(argv)
+
+    config = Config.default()
+    bench = Benchmark(
+        config,
+        durations=args.durations,
+        stages=args.stages,
+        stage_limits={} if args.no_limits else None,
+        seed=args.seed,
+        compiled_backend=args.denoise_backend
+    )
+
+    if args.precision_report:
+        return _run_precision_report(bench, args)
+
+    results = bench.run()
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = config.paths.output_dir / "benchmarks" / f"results_{stamp}.json"
+    output.parent.mkdir(exist_ok=True, parents=True)
+    AudioUtils.export_metrics_json(results, output)
+    print(f"\n✓ Results saved to: {output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(exist_ok=True, parents=True)
+        AudioUtils.export_metrics_json(results, args.baseline)
+        print(f"✓ Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"⚠ No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+    if not regressions:
+        print(f"✓ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return 0
+
+    print(f"\n✗ {len(regressions)} regression(s) against {args.baseline}:")
+    for r in regressions:
+        print(f"  {r['benchmark']:<20} {r['metric']:<18} {r['baseline']} → {r['current']} "
+              f"(+{r['change_percent']}%)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
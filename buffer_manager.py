@@ -1,5 +1,4 @@
 import numpy as np
-import sounddevice as sd
 import threading
 import queue
 from collections import deque
@@ -9,10 +8,103 @@ import os
 import time
 
 from config import Config
+from audio_buffer import AudioBuffer, SampleRing, SampleQueue
+from audio_sources import MicrophoneSource
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):
+    sd = None
+
+
+class OverloadController:
+    """
+    Steps processing quality down as the ingest queue backs up, and back up
+    once it clears.
+
+    Pressure is the larger of queue fill (0..1) and queue lag relative to
+    overload_lag_limit. Level N is entered as soon as pressure reaches the
+    Nth threshold; a level is left one step at a time, only after pressure has
+    stayed below threshold * overload_recovery_ratio for overload_recovery_hold
+    seconds, so the pipeline does not flap at a boundary.
+    """
+
+    NORMAL = 0
+    PAUSE_NOISE = 1
+    DROP_INTERIM = 2
+    CHEAP_ASR = 3
+    SHED_NON_SPEECH = 4
+
+    LEVEL_NAMES = ["normal", "pause_noise", "drop_interim", "cheap_asr", "shed_non_speech"]
+
+    def __init__(self, config: Config = None):
+        self.config = config or Config.default()
+        self.thresholds = sorted(self.config.buffer.overload_thresholds)[:self.SHED_NON_SPEECH]
+        self.enabled = self.config.buffer.overload_enabled
+
+        self.level = self.NORMAL
+        self.pressure = 0.0
+        self.max_level = self.NORMAL
+        self.transitions = 0
+        self._calm_since = None
+
+    @property
+    def name(self) -> str:
+        return self.LEVEL_NAMES[self.level]
+
+    @property
+    def noise_paused(self) -> bool:
+        return self.level >= self.PAUSE_NOISE
+
+    @property
+    def interim_enabled(self) -> bool:
+        return self.level < self.DROP_INTERIM
+
+    @property
+    def cheap_asr(self) -> bool:
+        return self.level >= self.CHEAP_ASR
+
+    @property
+    def shed_non_speech(self) -> bool:
+        return self.level >= self.SHED_NON_SPEECH
+
+    def update(self, queue_fill: float, lag: float, now: Optional[float] = None) -> bool:
+        """Feeds one observation; returns True when the level changed."""
+        if not self.enabled:
+            return False
+
+        now = time.time() if now is None else now
+        lag_limit = self.config.buffer.overload_lag_limit
+        self.pressure = max(queue_fill, lag / lag_limit if lag_limit > 0 else 0.0)
+
+        target = sum(1 for t in self.thresholds if self.pressure >= t)
+        previous = self.level
+
+        if target > self.level:
+            self.level = target
+            self._calm_since = None
+        elif self.level > self.NORMAL:
+            exit_below = self.thresholds[self.level - 1] * self.config.buffer.overload_recovery_ratio
+            if self.pressure < exit_below:
+                if self._calm_since is None:
+                    self._calm_since = now
+                elif now - self._calm_since >= self.config.buffer.overload_recovery_hold:
+                    self.level -= 1
+                    self._calm_since = now
+            else:
+                self._calm_since = None
+
+        if self.level != previous:
+            self.transitions += 1
+            self.max_level = max(self.max_level, self.level)
+            return True
+        return False
 
 
 class BufferManager:
 
+    DROP_LOG_INTERVAL = 5.0
+
     def __init__(self, config: Config = None, callback: Optional[Callable] = None):
         self.config = config or Config.default()
 
@@ -24,17 +116,36 @@ class BufferManager:
         self.error_queue = queue.Queue()  
 
         
-        self.ring_buffer = deque(maxlen=self.config.audio.context_samples)
-        self.speech_buffer = []
+        sr = self.config.audio.sample_rate
+        self.ring_buffer = SampleRing(self.config.audio.context_samples, sr)
+        self.speech_buffer = SampleQueue(sr, int(self.config.buffer.max_utterance_duration * sr))
         self.in_speech = False
 
         
         self.total_chunks_received = 0
         self.total_chunks_processed = 0
+        self.total_chunks_dropped = 0
+        self.total_speech_dropped = 0
+        self.total_quiet_dropped = 0
+        self.total_chunks_shed = 0
+        self._drops_since_log = 0
+        self._last_drop_log = None
+
+        
+        self.current_capture_time = 0.0
+        self.current_ingest_time = None
+        self.total_queue_latency = 0.0
+        self.max_queue_latency = 0.0
+
+        
+        self.overload = OverloadController(self.config)
+        self.noise_floor_rms = None
+        self.silence_confirmed = False
+        self.shed_preroll = deque(maxlen=max(1, self.config.buffer.shed_probe_interval - 1))
 
         
         self.is_recording = False
-        self.audio_stream = None
+        self.audio_source = None
         self.worker_thread = None
 
         
@@ -49,55 +160,98 @@ class BufferManager:
     
     
     
-    def _audio_callback(self, indata, frames, time_info, status):
-        """Audio callback MUST NEVER crash or print."""
+    def _ingest(self, chunk: np.ndarray, capture_time: Optional[float] = None,
+                block: bool = False, status: Optional[str] = None) -> bool:
+        """Entry point for every audio source. MUST NEVER crash or print."""
         try:
             if status:
                 try:
-                    self.error_queue.put_nowait(("audio_status", str(status)))
+                    self.error_queue.put_nowait(("audio_status", status))
                 except Exception:
                     pass
 
-            chunk = indata.copy()
+            if capture_time is None:
+                capture_time = self.total_chunks_received * self.config.audio.chunk_duration
 
-            
+            item = (chunk, capture_time, time.time(), self._is_quiet(np.asarray(chunk)))
+            self.total_chunks_received += 1
             try:
-                self.audio_queue.put_nowait(chunk)
-                self.total_chunks_received += 1
+                self.audio_queue.put(item, block=block)
+                return True
             except queue.Full:
-                self.logger.warning("Audio queue full — dropping chunk")
-                return
-
-            
-            cb = self.process_callback
-            if cb is not None:
-                try:
-                    context = np.array(self.ring_buffer) if len(self.ring_buffer) else np.array([])
-                    cb(chunk.flatten(), context)
-                except Exception as cb_e:
-                    try:
-                        self.error_queue.put_nowait(("audio_callback", repr(cb_e)))
-                    except Exception:
-                        pass
+                return self._make_room(item)
 
         except Exception as fatal_e:
             try:
-                self.error_queue.put_nowait(("audio_callback_FATAL", repr(fatal_e)))
+                self.error_queue.put_nowait(("ingest_FATAL", repr(fatal_e)))
             except Exception:
                 pass
+            return False
 
     
     
     
+    def _make_room(self, item) -> bool:
+        """
+        Full queue: drops a quiet chunk instead of speech. A quiet incoming
+        chunk is dropped itself; otherwise the oldest quiet chunk still
+        queued is evicted to make room. Only when everything is loud does the
+        incoming chunk go.
+        """
+        q = self.audio_queue
+        accepted = False
+        if not item[3]:
+            with q.mutex:
+                victim = next((i for i, queued in enumerate(q.queue) if queued[3]), None)
+                if victim is not None:
+                    # One out, one in: unfinished_tasks stays balanced for join().
+                    del q.queue[victim]
+                    q.queue.append(item)
+                    q.not_empty.notify()
+                    accepted = True
+
+        self.total_chunks_dropped += 1
+        if accepted or item[3]:
+            self.total_quiet_dropped += 1
+        else:
+            self.total_speech_dropped += 1
+        self._log_drop()
+        return accepted
+
+    def _log_drop(self):
+        self._drops_since_log += 1
+        now = time.time()
+        if self._last_drop_log is None or now - self._last_drop_log >= self.DROP_LOG_INTERVAL:
+            self.logger.warning(f"Audio queue full — dropped {self._drops_since_log} chunk(s) "
+                                f"({self.total_speech_dropped} speech, {self.total_quiet_dropped} quiet so far)")
+            self._last_drop_log = now
+            self._drops_since_log = 0
+
     def _processing_loop(self):
         """Consumes audio_queue chunks and updates ring buffer."""
         while self.is_recording:
             try:
-                chunk = self.audio_queue.get(timeout=0.5)
+                chunk, capture_time, ingest_time, _ = self.audio_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # Every get() is matched by task_done(), or wait_until_drained() never returns.
+            try:
+                chunk = AudioBuffer.wrap(chunk, self.config.audio.sample_rate, site="ingest")
+
+                self.current_capture_time = capture_time
+                self.current_ingest_time = ingest_time
+                latency = time.time() - ingest_time
+                self.total_queue_latency += latency
+                self.max_queue_latency = max(self.max_queue_latency, latency)
+
+                if self.overload.update(self.audio_queue.qsize() / max(1, self.audio_queue.maxsize), latency):
+                    self.logger.info(f"Overload level -> {self.overload.name} "
+                                     f"(pressure {self.overload.pressure:.2f}, lag {latency:.2f}s)")
 
                 
                 try:
-                    self.ring_buffer.extend(chunk.flatten())
+                    self.ring_buffer.extend(chunk)
                 except Exception:
                     try:
                         self.error_queue.put_nowait(("processing_ringbuffer", "failed to extend ring buffer"))
@@ -105,57 +259,124 @@ class BufferManager:
                         pass
 
                 
+                shed = self._should_shed(chunk)
+                if shed:
+                    self.total_chunks_shed += 1
+                    self.shed_preroll.append(chunk)
+
                 cb = self.process_callback
-                if cb is not None:
+                if cb is not None and not shed:
                     try:
-                        context = np.array(self.ring_buffer)
-                        cb(chunk.flatten(), context)
+                        # Zero-copy view; only valid for the duration of the callback.
+                        cb(chunk, self.ring_buffer.context())
                     except Exception as cb_e:
                         try:
                             self.error_queue.put_nowait(("processing_callback", repr(cb_e)))
                         except Exception:
                             pass
 
+                # in_speech now reflects VAD on this very chunk.
+                if not shed and not self.in_speech:
+                    self._track_noise_floor(chunk)
+
                 self.total_chunks_processed += 1
 
-            except queue.Empty:
-                continue
             except Exception as e:
                 try:
                     self.error_queue.put_nowait(("processing_loop", repr(e)))
                 except Exception:
                     pass
+            finally:
+                self.audio_queue.task_done()
+    
+    
+    
+    def _should_shed(self, chunk: np.ndarray) -> bool:
+        """
+        Skips VAD for a quiet chunk, but only inside a stretch VAD has already
+        confirmed as silence, and never for more than shed_probe_interval - 1
+        chunks in a row: the next one always goes to VAD as a probe. Shed
+        chunks wait in shed_preroll, so a quiet onset caught by the probe is
+        put back in front of the utterance (update_speech_state).
+        """
+        if not (self.overload.shed_non_speech and self.silence_confirmed and not self.in_speech):
+            return False
+        if len(self.shed_preroll) >= self.shed_preroll.maxlen or self.config.buffer.shed_probe_interval <= 1:
+            return False
+        return self._is_quiet(chunk)
+
+    def _quiet_threshold(self) -> float:
+        threshold = 10 ** (self.config.buffer.shed_energy_floor_db / 20)
+        if self.noise_floor_rms is not None:
+            threshold = max(threshold, self.noise_floor_rms * 10 ** (self.config.buffer.shed_noise_margin_db / 20))
+        return threshold
+
+    def _is_quiet(self, chunk: np.ndarray) -> bool:
+        """Cheap pre-VAD check: chunk energy close to the tracked non-speech floor."""
+        rms = float(np.sqrt(np.mean(np.square(chunk)))) if len(chunk) else 0.0
+        return rms <= self._quiet_threshold()
+
+    def _track_noise_floor(self, chunk: np.ndarray):
+        """EMA of VAD-confirmed non-speech; chunks louder than floor + margin are left out."""
+        if len(chunk) == 0:
+            return
+        rms = float(np.sqrt(np.mean(np.square(chunk))))
+        if self.noise_floor_rms is None:
+            self.noise_floor_rms = rms
+        elif rms <= self._quiet_threshold():
+            self.noise_floor_rms = 0.9 * self.noise_floor_rms + 0.1 * rms
 
     
     
     
-    def start_recording(self, device=None):
-        """Starts microphone + worker thread safely."""
+    def start_recording(self, device=None, source=None):
+        """Starts an audio source (microphone by default) + worker thread safely."""
         if self.is_recording:
             return
 
         self.is_recording = True
 
         
+        self.audio_source = source or MicrophoneSource(self.config, device=device)
         try:
-            self.audio_stream = sd.InputStream(
-                samplerate=self.config.audio.sample_rate,
-                channels=1,
-                dtype="float32",
-                callback=self._audio_callback,
-                blocksize=int(self.config.audio.chunk_samples),
-                device=device
-            )
-            self.audio_stream.start()
+            self.audio_source.start(self._ingest)
         except Exception as e:
             self.is_recording = False
-            raise RuntimeError(f"Failed to start microphone stream: {e}")
+            self.audio_source = None
+            raise RuntimeError(f"Failed to start audio source: {e}")
 
         
         self.worker_thread = threading.Thread(target=self._processing_loop, daemon=True)
         self.worker_thread.start()
 
-        self.logger.info(f"Recording started (device={device})")
+        self.logger.info(f"Recording started (source={type(self.audio_source).__name__}, device={device})")
+
+    def start_processing(self):
+        """Starts the worker thread only; audio is supplied through push_chunk."""
+        if self.is_recording:
+            return
+
+        self.is_recording = True
+
+        self.worker_thread = threading.Thread(target=self._processing_loop, daemon=True)
+        self.worker_thread.start()
+
+        self.logger.info("Processing started (external audio)")
+
+    def push_chunk(self, chunk: np.ndarray, block: bool = False,
+                   capture_time: Optional[float] = None) -> bool:
+        """Queues an externally captured chunk. Returns False if it was dropped."""
+        return self._ingest(chunk, capture_time, block)
+
+    def wait_for_source(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until a finite source (e.g. file replay) has delivered all its audio."""
+        if self.audio_source is None:
+            return True
+        return self.audio_source.finished.wait(timeout)
+
+    def wait_until_drained(self):
+        """Blocks until every queued chunk has been processed."""
+        self.audio_queue.join()
 
     def stop_recording(self):
         """Stops audio stream + thread safely."""
@@ -166,9 +387,8 @@ class BufferManager:
 
         
         try:
-            if self.audio_stream:
-                self.audio_stream.stop()
-                self.audio_stream.close()
+            if self.audio_source:
+                self.audio_source.stop()
         except Exception as e:
             try:
                 self.error_queue.put_nowait(("stop_stream", repr(e)))
@@ -191,24 +411,45 @@ class BufferManager:
         """Tracks start/end of speech segments."""
         prev = self.in_speech
         self.in_speech = is_speech
+        self.silence_confirmed = not is_speech
 
         if not prev and is_speech:
-            self.speech_buffer = []
+            self.speech_buffer.clear()
+            while self.shed_preroll:
+                self.speech_buffer.extend(self.shed_preroll.popleft())
             return "speech_started"
 
+        if not is_speech:
+            self.shed_preroll.clear()
+
         if prev and not is_speech:
             return "utterance_complete"
 
         return "no_change"
 
     def add_to_speech_buffer(self, chunk):
-        self.speech_buffer.extend(chunk.tolist())
+        self.speech_buffer.extend(chunk)
+
+    def split_speech_buffer(self, max_samples: int, search_samples: int, frame_samples: int):
+        """Cuts the speech buffer at the quietest frame before max_samples.
 
-    def get_complete_utterance(self):
-        """Returns full utterance audio array."""
+        Returns the audio up to the cut; the remainder stays buffered as the
+        start of the next utterance.
+        """
+        cut = self.speech_buffer.quietest_cut(max_samples, search_samples, frame_samples)
+        return self.speech_buffer.take(cut)
+
+    def get_complete_utterance(self, copy: bool = True):
+        """Returns full utterance audio array.
+
+        copy=False returns a view of the speech buffer, for callers that are
+        done with it before the next chunk is added.
+        """
         if len(self.speech_buffer) == 0:
             return None
-        return np.array(self.speech_buffer, dtype=np.float32)
+        if not copy:
+            return self.speech_buffer.view()
+        return AudioBuffer.copy_of(self.speech_buffer.view(), self.speech_buffer.sr, site="utterance")
 
     
     
@@ -217,6 +458,16 @@ class BufferManager:
         return {
             "chunks_received": self.total_chunks_received,
             "chunks_processed": self.total_chunks_processed,
+            "chunks_dropped": self.total_chunks_dropped,
+            "chunks_dropped_speech": self.total_speech_dropped,
+            "chunks_dropped_quiet": self.total_quiet_dropped,
+            "chunks_shed": self.total_chunks_shed,
+            "overload_level": self.overload.name,
+            "overload_max_level": OverloadController.LEVEL_NAMES[self.overload.max_level],
+            "overload_transitions": self.overload.transitions,
+            "mean_queue_latency_sec": round(self.total_queue_latency / self.total_chunks_processed, 4)
+                if self.total_chunks_processed else 0.0,
+            "max_queue_latency_sec": round(self.max_queue_latency, 4),
             "ring_buffer_length": len(self.ring_buffer),
             "speech_buffer_length": len(self.speech_buffer)
         }
@@ -227,6 +478,8 @@ class BufferManager:
     @staticmethod
     def get_available_devices():
         """Returns first few microphone devices."""
+        if sd is None:
+            return []
         try:
             devices = sd.query_devices()
             mics = []
@@ -1,6 +1,34 @@
-from dataclasses import dataclass
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+
+DEFAULT_NOISE_TAXONOMY = {
+    'traffic': ('traffic', 'motor vehicle', 'car', 'vehicle', 'engine',
+                'car horn', 'truck', 'bus', 'emergency vehicle'),
+    'construction': ('jackhammer', 'drill', 'chainsaw', 'power tool', 'sawing',
+                     'hammer', 'construction', 'drilling'),
+    'crowd': ('crowd', 'hubbub', 'chatter', 'babble', 'restaurant',
+              'cafeteria', 'party', 'people', 'laughter'),
+    'indoor': ('washing machine', 'vacuum cleaner', 'fan', 'air conditioning',
+               'appliance', 'clock', 'refrigerator', 'dishwasher', 'microwave',
+               'blender', 'hair dryer', 'inside')
+}
+
+# ESC-50 classes (meta/esc50.csv "category") used as noise for each category.
+DEFAULT_ESC50_CATEGORIES = {
+    'traffic': ('car_horn', 'engine', 'siren', 'train', 'airplane'),
+    'construction': ('chainsaw', 'hand_saw'),
+    'crowd': ('laughing', 'clapping', 'coughing', 'footsteps', 'crying_baby'),
+    'indoor': ('washing_machine', 'vacuum_cleaner', 'clock_tick', 'keyboard_typing', 'door_wood_knock')
+}
+
+DEFAULT_SPEECH_KEYWORDS = (
+    'speech', 'narration', 'conversation', 'voice', 'talk',
+    'silence', 'quiet', 'music', 'singing'
+)
 
 
 @dataclass
@@ -10,6 +38,10 @@ class ModelConfig:
     demucs_model: str = "dns64"
     resemble_enhance_repo: str = "ResembleAI/resemble-enhance"
     indicwhisper_model: str = "ai4bharat/indicwhisper-kannada"
+    preload_in_background: bool = True
+    precision: str = "fp32"
+    model_source: str = "auto"
+    warmup_duration: float = 3.0
     
     
 @dataclass
@@ -45,16 +77,57 @@ class SNRConfig:
     min_improvement: float = 15.0
 
 
+@dataclass
+class DenoiseConfig:
+    routing_enabled: bool = True
+    default_target: float = 12.0
+    min_duration: float = 0.3
+    light_over_subtraction: float = 1.5
+    light_gain_floor: float = 0.1
+    full_rtf_estimate: float = 0.2
+    asr_rtf_estimate: float = 0.3
+    mode: str = "full"
+    region_padding: float = 0.3
+    region_merge_gap: float = 0.5
+    region_crossfade: float = 0.02
+    outside_speech: str = "passthrough"
+    outside_attenuation_db: float = 12.0
+    backend: str = "eager"
+    chunk_lengths: Tuple[float, ...] = (1.0, 2.0, 4.0, 8.0)
+    chunk_overlap: float = 0.25
+    batch_size: int = 8
+    batch_max_length_ratio: float = 1.25
+    batch_max_seconds: float = 240.0
+    category_variants: Dict[str, str] = field(default_factory=dict)
+    small_variant: Optional[str] = "dns48"
+    small_variant_margin_db: float = 3.0
+
+
+@dataclass
+class ASRConfig:
+    longform_threshold: float = 40.0
+    window_duration: float = 30.0
+    window_overlap: float = 4.0
+    cut_search_duration: float = 2.0
+    cut_frame_duration: float = 0.02
+    stitch_max_words: int = 30
+    decoding_method: str = "rnnt"
+    cheap_decoding_method: str = "ctc"
+    batch_max_pad: float = 0.25
+
+
 @dataclass
 class PathConfig:
     esc50_dir: Path = Path("./ESC-50-master")
     output_dir: Path = Path("./output")
     models_cache_dir: Path = Path("./models_cache")
+    model_bundle_dir: Optional[Path] = None
     
     def __post_init__(self):
         self.esc50_dir = Path(self.esc50_dir)
         self.output_dir = Path(self.output_dir)
         self.models_cache_dir = Path(self.models_cache_dir)
+        self.model_bundle_dir = Path(self.model_bundle_dir or self.models_cache_dir / "bundle")
         
         self.output_dir.mkdir(exist_ok=True, parents=True)
         self.models_cache_dir.mkdir(exist_ok=True, parents=True)
@@ -66,26 +139,139 @@ class BufferConfig:
     processing_timeout: float = 0.5
     max_utterance_duration: float = 30.0
     noise_update_interval: float = 5.0
+    interim_interval: float = 3.0
+    interim_window: float = 6.0
+    split_search_duration: float = 2.0
+    split_frame_duration: float = 0.02
+    overload_enabled: bool = True
+    overload_thresholds: Tuple[float, ...] = (0.25, 0.4, 0.55, 0.7)
+    overload_lag_limit: float = 5.0
+    overload_recovery_ratio: float = 0.5
+    overload_recovery_hold: float = 2.0
+    shed_energy_floor_db: float = -50.0
+    shed_noise_margin_db: float = 6.0
+    shed_probe_interval: int = 3
+
+
+@dataclass
+class ServerConfig:
+    host: str = "127.0.0.1"
+    port: int = 8765
+    sample_width: int = 2
+    max_connections: int = 8
+
+
+@dataclass
+class EngineConfig:
+    max_sessions: int = 64
+    session_queue_size: int = 100
+    speech_ratio_threshold: float = 0.5
+    asr_max_batch: int = 8
+    asr_max_wait: float = 0.1
+
+
+@dataclass
+class ClassifierConfig:
+    batch_size: int = 32
+    batch_max_length_ratio: float = 1.5
+    taxonomy: Dict[str, Tuple[str, ...]] = field(default_factory=lambda: dict(DEFAULT_NOISE_TAXONOMY))
+    speech_keywords: Tuple[str, ...] = DEFAULT_SPEECH_KEYWORDS
+    min_category_score: float = 0.01
+
+
+@dataclass
+class MixtureConfig:
+    esc50_categories: Dict[str, Tuple[str, ...]] = field(default_factory=lambda: dict(DEFAULT_ESC50_CATEGORIES))
+    esc50_folds: Tuple[int, ...] = (1, 2, 3, 4, 5)
+    snrs_db: Tuple[float, ...] = (0.0, 5.0, 10.0, 15.0)
+    seed: int = 0
+    clip_cache_mb: float = 512.0
+
+
+@dataclass
+class GraphConfig:
+    executor: str = "inline"
+    max_workers: int = 2
+
+
+@dataclass
+class OutputConfig:
+    background_writes: bool = False
+    max_pending_mb: float = 256.0
+
+
+@dataclass
+class DebugConfig:
+    count_copies: bool = False
+
+
+@dataclass
+class MetricsConfig:
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9108
 
 
 class Config:
+    
+    # Sections that only affect how a run is hosted, not what it computes.
+    RUNTIME_SECTIONS = ("paths", "buffer", "server", "engine", "graph", "output", "metrics", "debug")
+    RUNTIME_FIELDS = {
+        "models": ("model_source", "preload_in_background"),
+        "classifier": ("batch_size",),
+        "denoise": ("batch_size",)
+    }
+    
     def __init__(
         self,
         models: Optional[ModelConfig] = None,
         audio: Optional[AudioConfig] = None,
         snr: Optional[SNRConfig] = None,
+        denoise: Optional[DenoiseConfig] = None,
+        asr: Optional[ASRConfig] = None,
         paths: Optional[PathConfig] = None,
-        buffer: Optional[BufferConfig] = None
+        buffer: Optional[BufferConfig] = None,
+        server: Optional[ServerConfig] = None,
+        engine: Optional[EngineConfig] = None,
+        classifier: Optional[ClassifierConfig] = None,
+        mixture: Optional[MixtureConfig] = None,
+        graph: Optional[GraphConfig] = None,
+        output: Optional[OutputConfig] = None,
+        metrics: Optional[MetricsConfig] = None,
+        debug: Optional[DebugConfig] = None
     ):
         self.models = models or ModelConfig()
         self.audio = audio or AudioConfig()
         self.snr = snr or SNRConfig()
+        self.denoise = denoise or DenoiseConfig()
+        self.asr = asr or ASRConfig()
         self.paths = paths or PathConfig()
         self.buffer = buffer or BufferConfig()
+        self.server = server or ServerConfig()
+        self.engine = engine or EngineConfig()
+        self.classifier = classifier or ClassifierConfig()
+        self.mixture = mixture or MixtureConfig()
+        self.graph = graph or GraphConfig()
+        self.output = output or OutputConfig()
+        self.metrics = metrics or MetricsConfig()
+        self.debug = debug or DebugConfig()
     
     @classmethod
     def default(cls):
         return cls()
+    
+    def fingerprint(self) -> str:
+        """Short stable hash of every result-affecting setting."""
+        settings = {}
+        for name, section in sorted(vars(self).items()):
+            if name in self.RUNTIME_SECTIONS:
+                continue
+            fields = asdict(section)
+            for field in self.RUNTIME_FIELDS.get(name, ()):
+                fields.pop(field)
+            settings[name] = fields
+        blob = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
 
 
 if __name__ == "__main__":
@@ -98,8 +284,30 @@ if __name__ == "__main__":
     assert config.audio.chunk_samples == 16000
     assert config.audio.context_samples == 48000
     assert config.snr.traffic_target == 10.0
+    assert config.denoise.routing_enabled
+    assert config.denoise.category_variants == {} and config.denoise.small_variant == "dns48"
+    assert config.asr.window_overlap < config.asr.window_duration
     assert config.paths.output_dir.exists()
+    assert config.paths.model_bundle_dir == config.paths.models_cache_dir / "bundle"
     assert config.buffer.queue_maxsize == 100
+    assert config.server.port == 8765
+    assert config.engine.asr_max_batch == 8
+    assert config.classifier.batch_size == 32
+    assert list(config.classifier.taxonomy) == ['traffic', 'construction', 'crowd', 'indoor']
+    assert config.classifier.taxonomy is not Config().classifier.taxonomy
+    assert not config.output.background_writes
+    assert config.metrics.port == 9108
+    assert set(config.mixture.esc50_categories) == set(config.classifier.taxonomy)
+    assert config.fingerprint() == Config().fingerprint()
+    assert config.fingerprint() != Config(denoise=DenoiseConfig(small_variant=None)).fingerprint()
+    assert config.fingerprint() == Config(metrics=MetricsConfig(port=1)).fingerprint()
+    assert config.fingerprint() == Config(graph=GraphConfig(executor="thread")).fingerprint()
+    assert config.fingerprint() == Config(debug=DebugConfig(count_copies=True)).fingerprint()
+    assert config.fingerprint() == Config(
+        models=ModelConfig(model_source="hub", preload_in_background=False),
+        classifier=ClassifierConfig(batch_size=4),
+        denoise=DenoiseConfig(batch_size=2)
+    ).fingerprint()
     print("✓ All config tests passed")
     
     custom_config = Config(
@@ -0,0 +1,109 @@
+import numpy as np
+from typing import Dict, List
+from config import Config
+
+
+class DenoiseRouter:
+    """
+    Picks how much denoising a file needs from its VAD-based SNR.
+
+    Each noise category has an SNR target in SNRConfig. Audio already at
+    target + min_improvement is left alone, audio at or above the target gets
+    the light spectral denoiser, and everything else gets full Demucs. Empty
+    or speechless inputs skip both denoising and ASR.
+
+    Full routes also name the Demucs variant: an explicit
+    DenoiseConfig.category_variants entry, otherwise ModelConfig.demucs_model
+    downgraded to small_variant when the SNR is within
+    small_variant_margin_db of the target. A category mapped to passthrough
+    is routed as a skip.
+    """
+
+    EMPTY = "empty"
+    SKIP = "skip"
+    LIGHT = "light"
+    FULL = "full"
+    PASSTHROUGH = "passthrough"
+
+    def __init__(self, config: Config = None):
+        self.config = config or Config.default()
+
+    def target_for(self, category: str) -> float:
+        return getattr(self.config.snr, f"{category}_target", self.config.denoise.default_target)
+
+    def variant_for(self, category: str, snr_original: float) -> str:
+        cfg = self.config.denoise
+        if category in cfg.category_variants:
+            return cfg.category_variants[category]
+
+        if (cfg.small_variant and np.isfinite(snr_original)
+                and snr_original >= self.target_for(category) - cfg.small_variant_margin_db):
+            return cfg.small_variant
+        return self.config.models.demucs_model
+
+    def route(
+        self,
+        duration: float,
+        timestamps: List[Dict],
+        snr_original: float,
+        has_noise_reference: bool,
+        category: str
+    ) -> Dict:
+        target = self.target_for(category)
+        decision = {"target_snr_db": target}
+
+        if duration < self.config.denoise.min_duration:
+            return dict(decision, route=self.EMPTY, reason="input shorter than minimum duration")
+
+        if not timestamps:
+            return dict(decision, route=self.EMPTY, reason="no speech detected")
+
+        full = dict(decision, route=self.FULL, variant=self.variant_for(category, snr_original))
+
+        if full['variant'] == self.PASSTHROUGH:
+            return dict(decision, route=self.SKIP, reason=f"{category} is mapped to passthrough")
+
+        if not self.config.denoise.routing_enabled:
+            return dict(full, reason="routing disabled")
+
+        if not has_noise_reference:
+            return dict(full, reason="no non-speech audio to estimate SNR")
+
+        skip_above = target + self.config.snr.min_improvement
+        if snr_original >= skip_above:
+            return dict(decision, route=self.SKIP,
+                        reason=f"SNR {snr_original:.1f} dB >= {skip_above:.1f} dB")
+
+        if snr_original >= target:
+            return dict(decision, route=self.LIGHT,
+                        reason=f"SNR {snr_original:.1f} dB >= {category} target {target:.1f} dB")
+
+        return dict(full, reason=f"SNR {snr_original:.1f} dB < {category} target {target:.1f} dB")
+
+
+if __name__ == "__main__":
+    print("Testing DenoiseRouter...")
+
+    router = DenoiseRouter()
+    speech = [{'start': 0, 'end': 16000, 'start_sec': 0.0, 'end_sec': 1.0}]
+
+    assert router.route(0.1, speech, 20.0, True, "traffic")['route'] == "empty"
+    assert router.route(5.0, [], 20.0, True, "traffic")['route'] == "empty"
+    assert router.route(5.0, speech, 40.0, True, "traffic")['route'] == "skip"
+    assert router.route(5.0, speech, 12.0, True, "traffic")['route'] == "light"
+    assert router.route(5.0, speech, 5.0, True, "traffic")['route'] == "full"
+    assert router.route(5.0, speech, float('inf'), False, "traffic")['route'] == "full"
+    assert router.target_for("unknown") == router.config.denoise.default_target
+    print("✓ Routing decisions correct")
+
+    assert router.route(5.0, speech, 0.0, True, "traffic")['variant'] == router.config.models.demucs_model
+    assert router.route(5.0, speech, 8.0, True, "traffic")['variant'] == "dns48"
+    assert router.route(5.0, speech, float('inf'), False, "traffic")['variant'] == router.config.models.demucs_model
+    router.config.denoise.category_variants["traffic"] = "dns64"
+    assert router.route(5.0, speech, 8.0, True, "traffic")['variant'] == "dns64"
+    router.config.denoise.category_variants["crowd"] = "passthrough"
+    assert router.route(5.0, speech, 0.0, True, "crowd")['route'] == "skip"
+    assert router.route(5.0, speech, float('inf'), False, "crowd")['route'] == "skip"
+    print("✓ Variant policy correct")
+
+    print("\n✓ DenoiseRouter working correctly")
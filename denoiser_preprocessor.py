@@ -1,47 +1,396 @@
+import time
 import torch
 import torchaudio
 import numpy as np
+from scipy import signal
 from pathlib import Path
-from typing import Union
+from typing import Union, List, Dict, Tuple
 from config import Config
 from audio_utils import AudioUtils
+from audio_buffer import AudioBuffer, COPIES
+from model_bundle import ModelBundle
 
 
 class DenoiserProcessor:
+    """
+    Demucs denoising with several model variants.
+    
+    The default variant (ModelConfig.demucs_model) loads at construction;
+    others (e.g. dns48) load on first use, and "passthrough" returns the
+    input unchanged. Every entry point takes variant=None for the default,
+    and per-variant processing time is accumulated in variant_stats.
+    """
+    
+    PASSTHROUGH = "passthrough"
     
     def __init__(self, config: Config = None):
         self.config = config or Config.default()
         self.model = None
+        self.models = {}
+        self.default_variant = self.config.models.demucs_model
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.precision = self.config.models.precision
+        self.last_region_stats = None
+        self.compiled = {}
+        self.compile_times = {}
+        self.variant_stats = {}
         self._load_model()
     
     def _load_model(self):
-        model = torch.hub.load(
-            repo_or_dir='facebookresearch/denoiser',
-            model='dns64',
-            force_reload=False
-        )
-        self.model = model.to(self.device)
-        self.model.eval()
+        self.model = self.get_model(self.default_variant)
+    
+    def get_model(self, variant: str = None):
+        variant = variant or self.default_variant
+        if variant in self.models:
+            return self.models[variant]
+        
+        bundle = ModelBundle(self.config)
+        bundled = (bundle.root / "denoiser" / f"{variant}.th").exists()
+        if bundle.use_for("denoiser") and (bundled or self.config.models.model_source == "bundle"):
+            model = bundle.load_denoiser(variant)
+        else:
+            model = torch.hub.load(
+                repo_or_dir='facebookresearch/denoiser',
+                model=variant,
+                force_reload=False
+            )
+        model = model.to(self.device)
+        model.eval()
+        
+        self.models[variant] = model
+        return model
+    
+    def _record(self, variant: str, audio_seconds: float, wall: float):
+        stats = self.variant_stats.setdefault(variant, {'calls': 0, 'audio_sec': 0.0, 'time_sec': 0.0})
+        stats['calls'] += 1
+        stats['audio_sec'] += audio_seconds
+        stats['time_sec'] += wall
+    
+    def variant_rtf(self) -> Dict[str, float]:
+        return {
+            variant: round(stats['time_sec'] / stats['audio_sec'], 4) if stats['audio_sec'] > 0 else 0.0
+            for variant, stats in self.variant_stats.items()
+        }
+    
+    def _autocast(self):
+        return torch.autocast(device_type=self.device, dtype=torch.bfloat16, enabled=self.precision == "bf16")
     
     def denoise(
         self,
         audio: np.ndarray,
-        sr: int = 16000
+        sr: int = 16000,
+        backend: str = None,
+        variant: str = None
     ) -> np.ndarray:
         
         if sr != 16000:
             audio = AudioUtils.resample_audio(audio, sr, 16000)
             sr = 16000
         
-        audio_tensor = torch.from_numpy(audio).float().unsqueeze(0).unsqueeze(0).to(self.device)
+        audio = AudioBuffer.wrap(audio, sr, site="denoise")
+        variant = variant or self.default_variant
+        if variant == self.PASSTHROUGH:
+            return audio
+        
+        start = time.perf_counter()
+        backend = backend or self.config.denoise.backend
+        if backend != "eager":
+            denoised_audio = self.denoise_chunked(audio, sr, backend, variant)
+        else:
+            audio_tensor = audio.to_torch(self.device).view(1, 1, -1)
+            
+            with torch.no_grad(), self._autocast():
+                denoised = self.get_model(variant)(audio_tensor)
+            
+            denoised_audio = AudioBuffer.wrap(denoised.reshape(-1).float(), sr, site="denoise.output")
+        
+        self._record(variant, len(audio) / sr, time.perf_counter() - start)
+        return denoised_audio
+    
+    def plan_batches(self, lengths: List[int], sr: int = 16000) -> List[List[int]]:
+        """
+        Groups input indices into length buckets: sorted by length, a bucket
+        closes when it reaches batch_size, when its longest input exceeds
+        batch_max_length_ratio x its shortest, or when the padded batch would
+        exceed batch_max_seconds of audio.
+        """
+        cfg = self.config.denoise
+        max_samples = int(cfg.batch_max_seconds * sr)
+        
+        batches = []
+        current = []
+        for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            if current:
+                shortest = max(lengths[current[0]], 1)
+                padded = lengths[i] * (len(current) + 1)
+                if (len(current) >= cfg.batch_size
+                        or lengths[i] > shortest * cfg.batch_max_length_ratio
+                        or padded > max_samples):
+                    batches.append(current)
+                    current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def denoise_batch(
+        self,
+        audios: List[np.ndarray],
+        sr: int = 16000,
+        variant: str = None
+    ) -> List[np.ndarray]:
+        """Denoises many clips with one Demucs call per length bucket; outputs keep input order and lengths."""
+        
+        if sr != 16000:
+            audios = [AudioUtils.resample_audio(audio, sr, 16000) for audio in audios]
+            sr = 16000
+        
+        variant = variant or self.default_variant
+        if self.config.denoise.backend != "eager" or variant == self.PASSTHROUGH:
+            return [self.denoise(audio, sr, variant=variant) for audio in audios]
+        
+        model = self.get_model(variant)
+        start = time.perf_counter()
+        outputs = [None] * len(audios)
+        lengths = [len(audio) for audio in audios]
+        
+        for bucket in self.plan_batches(lengths, sr):
+            max_len = max(lengths[i] for i in bucket)
+            if max_len == 0:
+                for i in bucket:
+                    outputs[i] = np.zeros(0, dtype=np.float32)
+                continue
+            
+            batch = np.zeros((len(bucket), 1, max_len), dtype=np.float32)
+            for row, i in enumerate(bucket):
+                batch[row, 0, :lengths[i]] = audios[i]
+            COPIES.record("denoise_batch.pad", batch.nbytes)
+            
+            with torch.no_grad(), self._autocast():
+                denoised = model(torch.from_numpy(batch).to(self.device))
+            denoised = denoised.reshape(len(bucket), -1).float().cpu().numpy()
+            
+            for row, i in enumerate(bucket):
+                outputs[i] = AudioBuffer.copy_of(denoised[row, :lengths[i]], sr, site="denoise_batch.trim")
+        
+        self._record(variant, sum(lengths) / sr, time.perf_counter() - start)
+        return outputs
+    
+    def chunk_lengths(self, sr: int = 16000) -> List[int]:
+        return sorted(int(seconds * sr) for seconds in self.config.denoise.chunk_lengths)
+    
+    def _compiled_for(self, length: int, backend: str, variant: str = None):
+        """Module specialized for one input length; built on first use and cached."""
+        variant = variant or self.default_variant
+        key = (backend, length, self.precision, variant)
+        if key in self.compiled:
+            return self.compiled[key]
+        
+        model = self.get_model(variant)
+        start = time.perf_counter()
+        example = torch.zeros(1, 1, length, device=self.device)
         
         with torch.no_grad():
-            denoised = self.model(audio_tensor)
+            if backend == "trace":
+                # Traced in fp32: tracing under autocast would bake the bf16
+                # casts into the graph. Autocast is applied when it is called.
+                module = torch.jit.freeze(torch.jit.trace(model, example, check_trace=False).eval())
+                if self.precision != "bf16":
+                    module = torch.jit.optimize_for_inference(module)
+            elif backend == "compile":
+                module = torch.compile(model, dynamic=False)
+            elif backend == "eager":
+                module = model
+            else:
+                raise ValueError(f"Unknown denoise backend: {backend}")
+            
+            with self._autocast():
+                module(example)
         
-        denoised_audio = denoised.squeeze().cpu().numpy()
+        self.compiled[key] = module
+        self.compile_times[key] = round(time.perf_counter() - start, 3)
+        return module
+    
+    def prepare(self, backend: str = None, sr: int = 16000, variant: str = None):
+        """Builds the compiled module for every configured chunk length up front."""
+        backend = backend or self.config.denoise.backend
+        for length in self.chunk_lengths(sr):
+            self._compiled_for(length, backend, variant)
+    
+    def _run_fixed(self, segment: np.ndarray, length: int, backend: str, variant: str = None) -> np.ndarray:
+        if len(segment) == length:
+            padded = AudioBuffer.wrap(segment, site="denoise_chunked.pad")
+        else:
+            padded = AudioBuffer.empty(length)
+            padded[:len(segment)] = segment
+            padded[len(segment):] = 0.0
+            COPIES.record("denoise_chunked.pad", padded.nbytes)
         
-        return denoised_audio
+        tensor = padded.to_torch(self.device).view(1, 1, length)
+        module = self._compiled_for(length, backend, variant)
+        with torch.no_grad(), self._autocast():
+            out = module(tensor)
+        
+        return AudioBuffer.wrap(out.reshape(-1)[:len(segment)].float(), site="denoise_chunked.output")
+    
+    def denoise_chunked(
+        self,
+        audio: np.ndarray,
+        sr: int = 16000,
+        backend: str = None,
+        variant: str = None
+    ) -> np.ndarray:
+        """
+        Denoises in fixed-length pieces so every model call has one of a few
+        known shapes. Short inputs are zero-padded to the smallest chunk length
+        that fits; longer inputs are cut into max-length windows that overlap by
+        chunk_overlap seconds and are cross-faded back together.
+        """
+        
+        if sr != 16000:
+            audio = AudioUtils.resample_audio(audio, sr, 16000)
+            sr = 16000
+        
+        backend = backend or self.config.denoise.backend
+        audio = AudioBuffer.wrap(audio, sr, site="denoise_chunked")
+        lengths = self.chunk_lengths(sr)
+        n = len(audio)
+        
+        if n == 0:
+            return audio.copy()
+        
+        for length in lengths:
+            if n <= length:
+                return self._run_fixed(audio, length, backend, variant)
+        
+        window = lengths[-1]
+        overlap = min(int(self.config.denoise.chunk_overlap * sr), window // 2)
+        hop = window - overlap
+        
+        output = np.zeros(n, dtype=np.float32)
+        weights = np.zeros(n, dtype=np.float32)
+        ramp = np.linspace(0.0, 1.0, overlap + 2, dtype=np.float32)[1:-1] if overlap > 0 else None
+        
+        start = 0
+        while start < n:
+            end = min(start + window, n)
+            segment = audio[start:end]
+            length = next(l for l in lengths if l >= len(segment))
+            denoised = self._run_fixed(segment, length, backend, variant)
+            
+            weight = np.ones(end - start, dtype=np.float32)
+            if ramp is not None:
+                if start > 0:
+                    k = min(overlap, len(weight))
+                    weight[:k] = ramp[:k]
+                if end < n:
+                    weight[-overlap:] = ramp[::-1]
+            
+            output[start:end] += weight * denoised
+            weights[start:end] += weight
+            
+            if end == n:
+                break
+            start += hop
+        
+        return AudioBuffer.wrap(output / np.maximum(weights, 1e-8), sr)
+    
+    def merge_regions(
+        self,
+        timestamps: List[Dict],
+        total_samples: int,
+        sr: int = 16000
+    ) -> List[Tuple[int, int]]:
+        pad = int(self.config.denoise.region_padding * sr)
+        gap = int(self.config.denoise.region_merge_gap * sr)
+        
+        regions = []
+        for ts in sorted(timestamps, key=lambda t: t['start']):
+            start = max(0, ts['start'] - pad)
+            end = min(total_samples, ts['end'] + pad)
+            if regions and start - regions[-1][1] <= gap:
+                regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+            else:
+                regions.append((start, end))
+        
+        return regions
+    
+    def denoise_regions(
+        self,
+        audio: np.ndarray,
+        timestamps: List[Dict],
+        sr: int = 16000,
+        variant: str = None
+    ) -> np.ndarray:
+        
+        if sr != 16000:
+            scale = 16000 / sr
+            audio = AudioUtils.resample_audio(audio, sr, 16000)
+            timestamps = [
+                {'start': int(ts['start'] * scale), 'end': int(ts['end'] * scale)}
+                for ts in timestamps
+            ]
+            sr = 16000
+        
+        if self.config.denoise.outside_speech == "attenuate":
+            outside_gain = 10 ** (-self.config.denoise.outside_attenuation_db / 20)
+        else:
+            outside_gain = 1.0
+        
+        # Merged regions never overlap, so each one reads its own undenoised
+        # samples from output before overwriting them.
+        audio = AudioBuffer.wrap(audio, sr, site="denoise_regions")
+        output = audio * np.float32(outside_gain)
+        
+        regions = self.merge_regions(timestamps, len(audio), sr)
+        fade = int(self.config.denoise.region_crossfade * sr)
+        
+        for start, end in regions:
+            denoised = self.denoise(audio[start:end], sr, variant=variant)[:end - start]
+            
+            weight = np.ones(end - start, dtype=np.float32)
+            n_fade = min(fade, (end - start) // 2)
+            if n_fade > 0:
+                ramp = np.linspace(0.0, 1.0, n_fade, dtype=np.float32)
+                if start > 0:
+                    weight[:n_fade] = ramp
+                if end < len(audio):
+                    weight[-n_fade:] = ramp[::-1]
+            
+            output[start:end] = weight * denoised + (1.0 - weight) * output[start:end]
+        
+        denoised_samples = sum(end - start for start, end in regions)
+        self.last_region_stats = {
+            'regions': len(regions),
+            'denoised_fraction': denoised_samples / len(audio) if len(audio) else 0.0
+        }
+        
+        return output
+    
+    def denoise_light(
+        self,
+        audio: np.ndarray,
+        noise_reference: np.ndarray,
+        sr: int = 16000
+    ) -> np.ndarray:
+        
+        if len(noise_reference) == 0:
+            return audio
+        
+        nperseg = 512
+        _, _, noise_spec = signal.stft(noise_reference, fs=sr, nperseg=nperseg)
+        noise_psd = np.mean(np.abs(noise_spec) ** 2, axis=1, keepdims=True)
+        
+        _, _, spec = signal.stft(audio, fs=sr, nperseg=nperseg)
+        power = np.abs(spec) ** 2
+        
+        gain = 1.0 - self.config.denoise.light_over_subtraction * noise_psd / np.maximum(power, 1e-12)
+        gain = np.maximum(gain, self.config.denoise.light_gain_floor)
+        
+        _, cleaned = signal.istft(spec * gain, fs=sr, nperseg=nperseg)
+        
+        return AudioBuffer.wrap(cleaned[:len(audio)], sr, site="denoise_light")
     
     def denoise_with_context(
         self,
@@ -96,4 +445,11 @@ if __name__ == "__main__":
     AudioUtils.save_audio("test/denoised_chunk.wav", denoised_chunk, sr)
     print("✓ Chunk denoising test complete")
     
+    assert "dns48" not in denoiser.models
+    denoiser.denoise(audio, sr, variant="dns48")
+    assert np.array_equal(denoiser.denoise(audio, sr, variant="passthrough"), audio.astype(np.float32))
+    for variant, rtf in denoiser.variant_rtf().items():
+        print(f"  {variant:<8} RTF {rtf:.4f}")
+    print("✓ Lazy variants and per-variant RTF")
+    
     print("\n✓ DenoiserProcessor working correctly")
\ No newline at end of file
@@ -1,30 +1,135 @@
 import numpy as np
 from pathlib import Path
-from typing import Dict, List
-import time
+from typing import Dict, Iterable, List, Optional
+import io
 import json
+import os
+import time
 import pandas as pd
 from datetime import datetime
 from config import Config
 from audio_utils import AudioUtils
 from transcriber import Transcriber
 from pipeline_recorded import RecordedPipeline
+from output_writer import OutputWriter
+
+
+class EvaluationManifest:
+    """
+    Append-only record of finished evaluation units.
+    
+    One JSON line per (file, mode, config_hash) unit, pointing at the result
+    JSON the unit wrote. A unit that is not a file (a generated mixture) is
+    keyed by its name. Lines are appended through the evaluator's
+    OutputWriter after that unit's own writes, and the writer runs writes in
+    order, so a unit is only listed once its results are on disk. A run that
+    is killed part-way resumes from the last unit it finished; a changed
+    config (different Config.fingerprint()) or a changed input file makes
+    the old entries stale.
+    """
+    
+    FILE = "manifest.jsonl"
+    
+    def __init__(self, output_dir: Path, config_hash: str):
+        self.root = Path(output_dir)
+        self.path = self.root / self.FILE
+        self.config_hash = config_hash
+        self.completed: Dict = {}
+        self._torn_tail = False
+        self._load()
+    
+    @staticmethod
+    def _file_key(unit) -> str:
+        return str(Path(unit).resolve()) if Path(unit).is_file() else str(unit)
+    
+    @staticmethod
+    def _signature(unit) -> Dict:
+        if not Path(unit).is_file():
+            return {'size': None, 'mtime_ns': None}
+        stat = Path(unit).stat()
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    
+    def _load(self):
+        if not self.path.exists():
+            return
+        
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                self._torn_tail = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get('config_hash') == self.config_hash:
+                    self.completed[(entry['file'], entry['mode'])] = entry
+    
+    def lookup(self, audio_path: Path, mode: str) -> Optional[Dict]:
+        """The stored result for a finished unit, or None if it has to run."""
+        entry = self.completed.get((self._file_key(audio_path), mode))
+        if entry is None:
+            return None
+        
+        signature = self._signature(audio_path)
+        if entry['size'] != signature['size'] or entry['mtime_ns'] != signature['mtime_ns']:
+            return None
+        
+        try:
+            with open(self.root / entry['result'], encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def record(self, audio_path: Path, mode: str, result_path: Path) -> Dict:
+        entry = {
+            'file': self._file_key(audio_path),
+            'mode': mode,
+            'config_hash': self.config_hash,
+            **self._signature(audio_path),
+            'result': str(Path(result_path).relative_to(self.root)),
+            'completed': datetime.now().isoformat()
+        }
+        self.completed[(entry['file'], mode)] = entry
+        return entry
+    
+    def append(self, entry: Dict):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            if self._torn_tail:
+                f.write("\n")
+                self._torn_tail = False
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
 
 
 class Evaluator:
     
     def __init__(self, config: Config = None):
         self.config = config or Config.default()
-        self.pipeline = RecordedPipeline(config)
+        self.writer = OutputWriter(self.config, background=True)
+        self.pipeline = RecordedPipeline(config, writer=self.writer)
         self.transcriber = Transcriber(config, language="kn")
         
         self.noise_types = ['clean', 'traffic', 'indoor', 'crowd', 'construction']
+    
+    def close(self):
+        try:
+            self.pipeline.close()
+        finally:
+            self.writer.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
         
     def evaluate_folder(
         self,
         speaker_folder: Path,
         output_dir: Path = None,
-        speaker_id: str = None
+        speaker_id: str = None,
+        resume: bool = True
     ) -> Dict:
         
         speaker_folder = Path(speaker_folder)
@@ -58,9 +163,21 @@ class Evaluator:
             print(f"  ✓ {noise_type}: {path.name}")
         print()
         
+        if not resume:
+            (output_dir / EvaluationManifest.FILE).unlink(missing_ok=True)
+        manifest = EvaluationManifest(output_dir, self.config.fingerprint())
+        if manifest.completed:
+            print(f"Resuming: {len(manifest.completed)} unit(s) already complete "
+                  f"for config {manifest.config_hash}\n")
+        
         all_results = {}
         comparison_data = []
         
+        self.pipeline.prepare_batch([
+            audio_files[n] for n in self.noise_types
+            if n in audio_files and manifest.lookup(audio_files[n], "pipeline") is None
+        ])
+        
         for noise_type in self.noise_types:
             if noise_type not in audio_files:
                 print(f"⚠ Skipping {noise_type} (file not found)")
@@ -76,10 +193,22 @@ class Evaluator:
             result_dir.mkdir(exist_ok=True, parents=True)
             
             print(f"\n[BASELINE] Transcription without preprocessing...")
-            baseline_result = self._run_baseline(audio_path, result_dir)
+            baseline_result = manifest.lookup(audio_path, "baseline")
+            if baseline_result is None:
+                baseline_result = self._run_baseline(audio_path, result_dir)
+                self._mark_done(manifest, audio_path, "baseline",
+                                result_dir / "baseline" / "baseline_result.json")
+            else:
+                print("✓ Already complete (loaded from disk)")
             
             print(f"\n[PIPELINE] Full preprocessing + transcription...")
-            pipeline_result = self._run_pipeline(audio_path, result_dir)
+            pipeline_result = manifest.lookup(audio_path, "pipeline")
+            if pipeline_result is None:
+                pipeline_result = self._run_pipeline(audio_path, result_dir)
+                self._mark_done(manifest, audio_path, "pipeline",
+                                result_dir / "pipeline" / "results.json")
+            else:
+                print("✓ Already complete (loaded from disk)")
             
             comparison = self._compare_results(
                 baseline_result,
@@ -98,6 +227,7 @@ class Evaluator:
             self._save_individual_report(result_dir, noise_type, all_results[noise_type])
         
         self._save_summary_report(output_dir, all_results, comparison_data)
+        self.writer.flush()
         
         print("\n" + "="*70)
         print("EVALUATION COMPLETE")
@@ -110,6 +240,117 @@ class Evaluator:
         
         return all_results
     
+    def evaluate_mixtures(
+        self,
+        mixtures: Iterable[Dict],
+        output_dir: Path = None,
+        resume: bool = True
+    ) -> Dict:
+        """
+        Evaluates conditions streamed from ESC50MixtureGenerator.generate().
+        
+        Mixtures go straight from memory into the baseline transcriber and
+        the pipeline; no audio is written, only per-condition JSON, so the
+        sweep can cover thousands of conditions. Finished conditions are
+        recorded in the same manifest as evaluate_folder and skipped on
+        rerun. Results are aggregated per (category, SNR).
+        """
+        
+        output_dir = Path(output_dir or Path("evaluate") / "mixtures")
+        output_dir.mkdir(exist_ok=True, parents=True)
+        
+        if not resume:
+            (output_dir / EvaluationManifest.FILE).unlink(missing_ok=True)
+        manifest = EvaluationManifest(output_dir, self.config.fingerprint())
+        
+        rows = []
+        for mixture in mixtures:
+            unit = mixture['id']
+            result_dir = output_dir / unit
+            result_dir.mkdir(exist_ok=True, parents=True)
+            
+            print(f"\n{'='*70}")
+            print(f"Condition: {mixture['speech']} + {mixture['category']} @ {mixture['snr_db']:+g} dB")
+            print(f"{'='*70}")
+            
+            baseline_result = manifest.lookup(unit, "baseline")
+            if baseline_result is None:
+                baseline_result = self._run_baseline(
+                    unit, result_dir, audio=mixture['audio'], ground_truth=mixture['ground_truth']
+                )
+                self._mark_done(manifest, unit, "baseline", result_dir / "baseline" / "baseline_result.json")
+            
+            pipeline_result = manifest.lookup(unit, "pipeline")
+            if pipeline_result is None:
+                pipeline_dir = result_dir / "pipeline"
+                pipeline_dir.mkdir(exist_ok=True, parents=True)
+                pipeline_result = self.pipeline.process(
+                    audio_path=Path(unit),
+                    output_dir=pipeline_dir,
+                    ground_truth=mixture['ground_truth'],
+                    audio=mixture['audio'],
+                    save_audio=False
+                )
+                self._mark_done(manifest, unit, "pipeline", pipeline_dir / "results.json")
+            
+            comparison = self._compare_results(baseline_result, pipeline_result, mixture['category'])
+            comparison.update({'condition': unit, 'speech': mixture['speech'], 'snr_db': mixture['snr_db']})
+            self.writer.write_json(result_dir / "comparison.json", comparison)
+            
+            rows.append(self._mixture_row(mixture, comparison))
+        
+        df, summary = self._summarize_mixtures(rows)
+        
+        self.writer.write_text(output_dir / "mixture_table.csv", df.to_csv(index=False))
+        self.writer.write_json(output_dir / "mixture_summary.json", summary)
+        self.writer.flush()
+        
+        print(f"\n✓ Evaluated {len(rows)} mixture condition(s) into {output_dir}/")
+        for row in summary['by_condition']:
+            print(f"  {row['Category']:<13} {row['SNR (dB)']:>+5g} dB  "
+                  f"WER {row['baseline_wer']} → {row['pipeline_wer']}  (n={row['conditions']})")
+        
+        return summary
+    
+    @staticmethod
+    def _mixture_row(mixture: Dict, comparison: Dict) -> Dict:
+        return {
+            'Condition': mixture['id'],
+            'Speech': mixture['speech'],
+            'Category': mixture['category'],
+            'SNR (dB)': mixture['snr_db'],
+            'Detected': comparison['pipeline']['noise_category'],
+            'Baseline WER': comparison['baseline']['wer'],
+            'Pipeline WER': comparison['pipeline']['wer'],
+            'Baseline CER': comparison['baseline']['cer'],
+            'Pipeline CER': comparison['pipeline']['cer'],
+            'SNR Improvement (dB)': comparison['improvements']['snr_improvement_db'],
+            'Pipeline RTF': comparison['pipeline']['rtf']
+        }
+    
+    @staticmethod
+    def _summarize_mixtures(rows: List[Dict]):
+        df = pd.DataFrame(rows)
+        summary = {'evaluation_timestamp': datetime.now().isoformat(), 'conditions': len(rows), 'by_condition': []}
+        if rows:
+            for column in ('Baseline WER', 'Pipeline WER', 'SNR Improvement (dB)'):
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+            df['Detected Correctly'] = df['Detected'] == df['Category']
+            grouped = df.groupby(['Category', 'SNR (dB)'], sort=True).agg(
+                conditions=('Condition', 'count'),
+                baseline_wer=('Baseline WER', 'mean'),
+                pipeline_wer=('Pipeline WER', 'mean'),
+                snr_improvement_db=('SNR Improvement (dB)', 'mean'),
+                detection_accuracy=('Detected Correctly', 'mean')
+            ).reset_index()
+            summary['by_condition'] = json.loads(grouped.to_json(orient='records'))
+        
+        return df, summary
+    
+    def _mark_done(self, manifest: EvaluationManifest, audio_path: Path, mode: str, result_path: Path):
+        entry = manifest.record(audio_path, mode, result_path)
+        self.writer.submit(manifest.append, entry, label=str(manifest.path))
+    
     def _find_audio_files(self, folder: Path) -> Dict[str, Path]:
         
         audio_files = {}
@@ -127,18 +368,26 @@ class Evaluator:
         
         return audio_files
     
-    def _run_baseline(self, audio_path: Path, output_dir: Path) -> Dict:
+    def _run_baseline(
+        self,
+        audio_path: Path,
+        output_dir: Path,
+        audio: Optional[np.ndarray] = None,
+        ground_truth: Optional[str] = None
+    ) -> Dict:
         
         baseline_dir = output_dir / "baseline"
         baseline_dir.mkdir(exist_ok=True, parents=True)
         
         start_time = time.time()
         
-        audio, sr = AudioUtils.load_audio(audio_path, sr=16000)
+        if audio is None:
+            audio, sr = AudioUtils.load_audio(audio_path, sr=16000)
+            self.writer.write_audio(baseline_dir / "input.wav", audio, sr)
+        else:
+            sr = 16000
         duration = len(audio) / sr
         
-        AudioUtils.save_audio(baseline_dir / "input.wav", audio, sr)
-        
         transcription = self.transcriber.transcribe(audio, sr)
         
         processing_time = time.time() - start_time
@@ -149,18 +398,15 @@ class Evaluator:
             'audio_duration_sec': round(duration, 2),
             'processing_time_sec': round(processing_time, 2),
             'rtf': round(rtf, 3),
-            'wer': None,
-            'cer': None
+            'wer': AudioUtils.calculate_wer(ground_truth, transcription['text']) if ground_truth else None,
+            'cer': AudioUtils.calculate_cer(ground_truth, transcription['text']) if ground_truth else None
         }
         
-        with open(baseline_dir / "baseline_result.json", 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
-        
-        with open(baseline_dir / "transcription.txt", 'w', encoding='utf-8') as f:
-            f.write("BASELINE TRANSCRIPTION (No Preprocessing)\n")
-            f.write("="*70 + "\n\n")
-            f.write(transcription['text'])
-            f.write("\n")
+        self.writer.write_json(baseline_dir / "baseline_result.json", result)
+        self.writer.write_text(
+            baseline_dir / "transcription.txt",
+            "BASELINE TRANSCRIPTION (No Preprocessing)\n" + "="*70 + "\n\n" + transcription['text'] + "\n"
+        )
         
         print(f"✓ Baseline transcription: {len(transcription['text'])} characters")
         print(f"  Processing time: {processing_time:.2f}s (RTF: {rtf:.3f}x)")
@@ -181,8 +427,8 @@ class Evaluator:
         
         return result
     
+    @staticmethod
     def _compare_results(
-        self,
         baseline: Dict,
         pipeline: Dict,
         noise_type: str
@@ -242,10 +488,9 @@ class Evaluator:
     
     def _save_individual_report(self, result_dir: Path, noise_type: str, results: Dict):
         
-        with open(result_dir / "comparison.json", 'w', encoding='utf-8') as f:
-            json.dump(results['comparison'], f, indent=2, ensure_ascii=False)
+        self.writer.write_json(result_dir / "comparison.json", results['comparison'])
         
-        with open(result_dir / "comparison.txt", 'w', encoding='utf-8') as f:
+        with io.StringIO() as f:
             comp = results['comparison']
             
             f.write(f"COMPARISON REPORT: {noise_type.upper()}\n")
@@ -278,6 +523,8 @@ class Evaluator:
             f.write(f"WER Improvement: {comp['improvements']['wer_improvement_percent']}%\n")
             f.write(f"CER Improvement: {comp['improvements']['cer_improvement_percent']}%\n")
             f.write(f"Processing Overhead: +{comp['improvements']['processing_overhead_sec']:.2f}s\n")
+            
+            self.writer.write_text(result_dir / "comparison.txt", f.getvalue())
     
     def _save_summary_report(self, output_dir: Path, all_results: Dict, comparison_data: List[Dict]):
         
@@ -288,8 +535,7 @@ class Evaluator:
             'results': all_results
         }
         
-        with open(output_dir / "summary_report.json", 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
+        self.writer.write_json(output_dir / "summary_report.json", summary)
         
         table_data = []
         for comp in comparison_data:
@@ -319,9 +565,9 @@ class Evaluator:
             table_data.append(row)
         
         df = pd.DataFrame(table_data)
-        df.to_csv(output_dir / "comparison_table.csv", index=False)
+        self.writer.write_text(output_dir / "comparison_table.csv", df.to_csv(index=False))
         
-        with open(output_dir / "summary_report.txt", 'w', encoding='utf-8') as f:
+        with io.StringIO() as f:
             f.write("EVALUATION SUMMARY REPORT\n")
             f.write("="*70 + "\n\n")
             f.write(f"Total Files Evaluated: {len(all_results)}\n")
@@ -340,14 +586,44 @@ class Evaluator:
                 f.write(f"  CER Improvement: {comp['improvements']['cer_improvement_percent']}%\n")
                 f.write(f"  Processing Overhead: +{comp['improvements']['processing_overhead_sec']:.2f}s\n")
                 f.write("\n")
+            
+            self.writer.write_text(output_dir / "summary_report.txt", f.getvalue())
         
         print(f"\n✓ Summary CSV saved: comparison_table.csv")
 
 
 if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) > 2 and sys.argv[1] == "--mixtures":
+        from mixture_generator import ESC50MixtureGenerator
+        
+        with Evaluator() as evaluator:
+            generator = ESC50MixtureGenerator(evaluator.config)
+            evaluator.evaluate_mixtures(generator.generate([Path(p) for p in sys.argv[2:]]))
+        sys.exit(0)
+    
     print("KANNADA SPEECH DENOISING EVALUATION")
     print("="*70)
     
+    # A clean mixture transcribed perfectly by both sides must keep WER 0.0,
+    # not drop out of the pipeline mean as "not measured".
+    clean = {'id': "s__traffic__snr+30__seed0", 'speech': "s", 'category': "traffic", 'snr_db': 30.0}
+    baseline = {'wer': 0.0, 'cer': 0.0, 'audio_duration_sec': 2.0, 'transcription': "ನಮಸ್ಕಾರ",
+                'processing_time_sec': 0.5, 'rtf': 0.25}
+    pipeline = {
+        'accuracy': RecordedPipeline.accuracy_section(0.0, 0.0, "ನಮಸ್ಕಾರ"),
+        'transcription': {'text': "ನಮಸ್ಕಾರ"},
+        'noise_analysis': {'category': "traffic", 'confidence': 0.9},
+        'audio_quality': {'snr_original_db': 30.0, 'snr_cleaned_db': 32.0, 'snr_improvement_db': 2.0},
+        'performance': {'total_time_sec': 0.6, 'rtf': 0.3}
+    }
+    comparison = Evaluator._compare_results(baseline, pipeline, "traffic")
+    assert comparison['pipeline']['wer'] == 0.0 and comparison['improvements']['wer_improvement_percent'] == 0.0
+    _, summary = Evaluator._summarize_mixtures([Evaluator._mixture_row(clean, comparison)])
+    assert summary['by_condition'][0]['pipeline_wer'] == 0.0
+    print("✓ Perfect transcripts keep WER 0.0 in comparisons and mixture summaries")
+    
     speaker_folder = Path("speaker_audios/speaker_001")
     
     if not speaker_folder.exists():
@@ -355,13 +631,12 @@ if __name__ == "__main__":
         print("  Please ensure you have run audio_maker.py first")
         exit(1)
     
-    evaluator = Evaluator()
-    
-    results = evaluator.evaluate_folder(
-        speaker_folder=speaker_folder,
-        output_dir=Path("evaluate/speaker_001"),
-        speaker_id="speaker_001"
-    )
+    with Evaluator() as evaluator:
+        results = evaluator.evaluate_folder(
+            speaker_folder=speaker_folder,
+            output_dir=Path("evaluate/speaker_001"),
+            speaker_id="speaker_001"
+        )
     
     print("\n✓ Evaluation complete!")
     print("✓ Check evaluate/speaker_001/ for detailed results")
\ No newline at end of file
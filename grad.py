@@ -141,6 +141,7 @@ def run_mission(audio_path, ground_truth, save_check):
         )
         return
 
+    pipeline = None
     try:
         if HAS_PIPELINE:
             pipeline = RecordedPipeline()
@@ -341,6 +342,9 @@ def run_mission(audio_path, ground_truth, save_check):
             "",
             None
         )
+    finally:
+        if pipeline is not None:
+            pipeline.close()
 
 
 
@@ -0,0 +1,162 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+
+class IntermediateStore:
+    """
+    Single-file container for pipeline intermediates.
+
+    All arrays live back to back in one raw float32 file that is opened as a
+    memory map, so readers slice what they need without decoding or loading
+    the whole thing. A JSON index next to it holds each array's offset and
+    length, the sample rate, the VAD segment table and stage metadata.
+    Speech-only and noise-only audio are views derived from the segment
+    table rather than stored copies.
+    """
+
+    DATA_FILE = "intermediates.f32"
+    INDEX_FILE = "intermediates.json"
+    VERSION = 1
+
+    def __init__(self, directory: Union[str, Path], index: Dict, data: np.memmap):
+        self.directory = Path(directory)
+        self.index = index
+        self.data = data
+
+    @classmethod
+    def write(
+        cls,
+        directory: Union[str, Path],
+        arrays: Dict[str, np.ndarray],
+        sr: int,
+        segments: List[Dict],
+        metadata: Optional[Dict] = None
+    ) -> "IntermediateStore":
+        directory = Path(directory)
+        directory.mkdir(exist_ok=True, parents=True)
+
+        total = sum(len(a) for a in arrays.values())
+        data = np.memmap(directory / cls.DATA_FILE, dtype=np.float32, mode='w+', shape=(max(total, 1),))
+
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            n = len(array)
+            data[offset:offset + n] = array
+            layout[name] = {"offset": offset, "length": n}
+            offset += n
+        data.flush()
+        del data
+
+        index = {
+            "version": cls.VERSION,
+            "dtype": "float32",
+            "sample_rate": sr,
+            "arrays": layout,
+            "segments": [{"start": int(s['start']), "end": int(s['end'])} for s in segments],
+            "metadata": metadata or {}
+        }
+        with open(directory / cls.INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+
+        return cls.open(directory)
+
+    @classmethod
+    def open(cls, directory: Union[str, Path]) -> "IntermediateStore":
+        directory = Path(directory)
+        with open(directory / cls.INDEX_FILE, encoding='utf-8') as f:
+            index = json.load(f)
+
+        data = np.memmap(directory / cls.DATA_FILE, dtype=np.float32, mode='r')
+        return cls(directory, index, data)
+
+    @property
+    def sample_rate(self) -> int:
+        return self.index["sample_rate"]
+
+    @property
+    def segments(self) -> List[Dict]:
+        return self.index["segments"]
+
+    @property
+    def metadata(self) -> Dict:
+        return self.index["metadata"]
+
+    def names(self) -> List[str]:
+        return list(self.index["arrays"].keys())
+
+    def get(self, name: str) -> np.ndarray:
+        entry = self.index["arrays"][name]
+        return self.data[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def slice(self, name: str, start_sec: float, end_sec: Optional[float] = None) -> np.ndarray:
+        array = self.get(name)
+        start = int(start_sec * self.sample_rate)
+        end = len(array) if end_sec is None else int(end_sec * self.sample_rate)
+        return array[start:end]
+
+    def speech_segments(self, name: str = "original") -> List[np.ndarray]:
+        array = self.get(name)
+        return [array[s['start']:s['end']] for s in self.segments]
+
+    def noise_segments(self, name: str = "original", min_duration: float = 0.1) -> List[np.ndarray]:
+        array = self.get(name)
+        min_samples = self.sample_rate * min_duration
+
+        gaps = []
+        prev_end = 0
+        for s in self.segments:
+            if s['start'] - prev_end > min_samples:
+                gaps.append(array[prev_end:s['start']])
+            prev_end = s['end']
+        if len(array) - prev_end > min_samples:
+            gaps.append(array[prev_end:])
+
+        return gaps
+
+    def speech_only(self, name: str = "original") -> np.ndarray:
+        segments = self.speech_segments(name)
+        return np.concatenate(segments) if segments else np.zeros(0, dtype=np.float32)
+
+    def noise_only(self, name: str = "original") -> np.ndarray:
+        segments = self.noise_segments(name)
+        return np.concatenate(segments) if segments else np.zeros(0, dtype=np.float32)
+
+    def export_wav(self, name: str, path: Union[str, Path]) -> None:
+        from audio_utils import AudioUtils
+        AudioUtils.save_audio(path, np.asarray(self.get(name)), self.sample_rate)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("Testing IntermediateStore...")
+
+    sr = 16000
+    original = np.random.randn(sr * 5).astype(np.float32) * 0.1
+    denoised = original * 0.5
+    segments = [{'start': sr, 'end': 2 * sr}, {'start': 3 * sr, 'end': 4 * sr}]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        IntermediateStore.write(tmp, {"original": original, "denoised": denoised}, sr, segments,
+                                metadata={"noise_category": "traffic"})
+        store = IntermediateStore.open(tmp)
+
+        assert store.names() == ["original", "denoised"]
+        assert isinstance(store.get("original"), np.memmap)
+        assert np.array_equal(store.get("denoised"), denoised)
+        print("✓ Write/open round trip works")
+
+        assert np.array_equal(store.slice("original", 1.0, 2.0), original[sr:2 * sr])
+        assert len(store.speech_segments()) == 2
+        assert len(store.noise_segments()) == 3
+        assert len(store.speech_only("denoised")) == 2 * sr
+        print("✓ Lazy slices and segment views work")
+
+        assert store.metadata["noise_category"] == "traffic"
+        del store
+        print("✓ Metadata preserved")
+
+    print("\n✓ IntermediateStore working correctly")
@@ -0,0 +1,248 @@
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    body = ",".join(f'{k}="{escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, fn: Optional[Callable[[], float]] = None):
+        self._value = 0.0
+        self._fn = fn
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def value(self) -> float:
+        return float(self._fn()) if self._fn else self._value
+
+    def samples(self, name: str, labels) -> list:
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value())}"]
+
+
+class Gauge(Counter):
+
+    kind = "gauge"
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = float(value)
+
+    def set_function(self, fn: Callable[[], float]):
+        self._fn = fn
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def samples(self, name: str, labels) -> list:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus-compatible registry (text exposition format 0.0.4).
+
+    Metrics are get-or-create by name and label set, so components can share
+    one registry without coordinating. Counters and gauges can be backed by a
+    callable that is read at scrape time, which is how existing counters
+    (e.g. BufferManager's) are exposed without double bookkeeping.
+    """
+
+    def __init__(self, namespace: str = "dhwani"):
+        self.namespace = namespace
+        self._metrics: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: Optional[Dict[str, str]], **kwargs):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        key = tuple(sorted((labels or {}).items()))
+
+        with self._lock:
+            family = self._metrics.setdefault(full_name, {"help": help_text, "kind": cls.kind, "children": {}})
+            if family["kind"] != cls.kind:
+                raise ValueError(f"Metric {full_name} already registered as {family['kind']}")
+            if key not in family["children"]:
+                family["children"][key] = cls(**kwargs)
+            return family["children"][key]
+
+    def counter(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None,
+                fn: Optional[Callable[[], float]] = None) -> Counter:
+        return self._get(Counter, name, help_text, labels, fn=fn)
+
+    def gauge(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None,
+              fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._get(Gauge, name, help_text, labels, fn=fn)
+
+    def histogram(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None,
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            families = [(name, dict(f, children=dict(f["children"]))) for name, f in self._metrics.items()]
+
+        lines = []
+        for name, family in families:
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for labels, metric in family["children"].items():
+                try:
+                    lines.extend(metric.samples(name, labels))
+                except Exception:
+                    continue
+        return "\n".join(lines) + "\n"
+
+
+def process_rss_bytes() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def model_memory_bytes(model) -> float:
+    """Parameter + buffer bytes of a torch module or variable bytes of a TF model; 0 when not loaded."""
+    if model is None:
+        return 0.0
+    if hasattr(model, "parameters"):
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        if hasattr(model, "buffers"):
+            total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return float(total)
+    variables = getattr(model, "variables", None) or []
+    return float(sum((v.shape.num_elements() or 0) * v.dtype.size for v in variables))
+
+
+class MetricsServer:
+    """Serves a registry at http://host:port/metrics from a daemon thread."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(timeout=1.0)
+            self._server = None
+
+
+if __name__ == "__main__":
+    import urllib.request
+
+    print("Testing metrics...")
+
+    registry = MetricsRegistry()
+    chunks = registry.counter("chunks_processed_total", "Chunks processed")
+    depth = registry.gauge("queue_depth", "Chunks waiting", fn=lambda: 3)
+    latency = registry.histogram("vad_latency_seconds", "VAD latency")
+    memory = registry.gauge("model_memory_bytes", "Model memory", labels={"model": "vad"})
+
+    chunks.inc(5)
+    memory.set(1024)
+    for v in (0.003, 0.02, 0.2, 20.0):
+        latency.observe(v)
+
+    text = registry.render()
+    assert "# TYPE dhwani_chunks_processed_total counter" in text
+    assert "dhwani_chunks_processed_total 5.0" in text
+    assert "dhwani_queue_depth 3.0" in text
+    assert 'dhwani_vad_latency_seconds_bucket{le="0.005"} 1' in text
+    assert 'dhwani_vad_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "dhwani_vad_latency_seconds_count 4" in text
+    assert 'dhwani_model_memory_bytes{model="vad"} 1024.0' in text
+    assert registry.counter("chunks_processed_total", "Chunks processed") is chunks
+    from types import SimpleNamespace
+    tf_variable = SimpleNamespace(shape=SimpleNamespace(num_elements=lambda: 256), dtype=SimpleNamespace(size=4))
+    assert model_memory_bytes(SimpleNamespace(variables=[tf_variable])) == 1024.0
+    assert model_memory_bytes(None) == 0.0
+    print("✓ Registry renders Prometheus text format")
+
+    server = MetricsServer(registry, port=0)
+    server.start()
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as resp:
+        assert resp.status == 200
+        assert "dhwani_queue_depth" in resp.read().decode()
+    server.stop()
+    print("✓ HTTP endpoint serves /metrics")
+
+    print("\n✓ Metrics working correctly")
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+from config import Config
+
+
+COMPONENTS = ["vad", "denoiser", "yamnet", "conformer"]
+
+
+class ModelBundle:
+    """
+    Local, directly loadable copies of every model the pipelines use.
+
+    `build()` resolves each model once through its usual hub and stores it
+    under PathConfig.model_bundle_dir:
+
+        silero_vad/silero_vad.jit  TorchScript module (torch.jit.save)
+        denoiser/<name>.th         Demucs constructor arguments + state dict per routed variant
+        yamnet/                    TF SavedModel (with class map asset)
+        conformer/                 Hugging Face snapshot including remote code
+        manifest.json
+
+    VAD, Demucs and YAMNet load without torch.hub and without running code
+    from the bundle: torch.jit.load, the Demucs class and VAD segmentation
+    helpers from the installed `denoiser` and `silero-vad` packages, and
+    tf.saved_model.load. The conformer is not serialized: IndicConformer
+    ships its model class as remote code, so it still loads with
+    trust_remote_code, only from the pinned local snapshot (local_files_only).
+    ModelConfig.model_source picks the path: "auto" uses the bundle when its
+    manifest exists, "bundle" requires it, "hub" ignores it.
+    """
+
+    MANIFEST = "manifest.json"
+    FORMAT = 2
+
+    def __init__(self, config: Config = None):
+        self.config = config or Config.default()
+        self.root = Path(self.config.paths.model_bundle_dir)
+
+    def manifest(self) -> Optional[Dict]:
+        path = self.root / self.MANIFEST
+        if not path.exists():
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def use_for(self, component: str) -> bool:
+        source = self.config.models.model_source
+        if source == "hub":
+            return False
+
+        manifest = self.manifest()
+        available = (manifest is not None and manifest.get("format") == self.FORMAT
+                     and component in manifest.get("components", {}))
+
+        if source == "bundle" and not available:
+            raise FileNotFoundError(
+                f"Model bundle has no current '{component}' in {self.root}; run `python model_bundle.py build`"
+            )
+        return available
+
+    def load_vad(self):
+        import torch
+        from silero_vad import get_speech_timestamps, save_audio, read_audio, VADIterator, collect_chunks
+        model = torch.jit.load(str(self.root / "silero_vad" / "silero_vad.jit"), map_location='cpu')
+        model.eval()
+        return model, (get_speech_timestamps, save_audio, read_audio, VADIterator, collect_chunks)
+
+    def load_denoiser(self, name: str):
+        import torch
+        from denoiser.demucs import Demucs
+        weights = self.root / "denoiser" / f"{name}.th"
+        if not weights.exists():
+            raise FileNotFoundError(f"Demucs '{name}' is not in the bundle ({weights})")
+
+        package = torch.load(weights, map_location='cpu', weights_only=True)
+        model = Demucs(*package['args'], **package['kwargs'])
+        model.load_state_dict(package['state'])
+        return model
+
+    def load_yamnet(self):
+        import tensorflow as tf
+        return tf.saved_model.load(str(self.root / "yamnet"))
+
+    def load_conformer(self):
+        from transformers import AutoModel
+        return AutoModel.from_pretrained(
+            str(self.root / "conformer"),
+            trust_remote_code=True,
+            local_files_only=True
+        )
+
+    @staticmethod
+    def _copy_tree(src: Path, dst: Path):
+        if dst.exists():
+            shutil.rmtree(dst)
+        shutil.copytree(src, dst, ignore=shutil.ignore_patterns(".git", "__pycache__"))
+
+    def _build_vad(self) -> Dict:
+        import torch
+        torch.hub.set_dir(str(self.config.paths.models_cache_dir))
+        model, _ = torch.hub.load(repo_or_dir=self.config.models.silero_vad_repo, model='silero_vad',
+                                  force_reload=False, onnx=False, verbose=False, trust_repo=True)
+
+        (self.root / "silero_vad").mkdir(exist_ok=True, parents=True)
+        torch.jit.save(model, str(self.root / "silero_vad" / "silero_vad.jit"))
+        return {"path": "silero_vad", "format": "torchscript", "source": self.config.models.silero_vad_repo}
+
+    def denoiser_variants(self) -> List[str]:
+        """Default Demucs plus every variant the denoise routing policy can pick."""
+        cfg = self.config.denoise
+        names = [self.config.models.demucs_model, cfg.small_variant, *cfg.category_variants.values()]
+        return [n for n in dict.fromkeys(names) if n and n != "passthrough"]
+
+    def _build_denoiser(self) -> Dict:
+        import torch
+        names = self.denoiser_variants()
+        torch.hub.set_dir(str(self.config.paths.models_cache_dir))
+        (self.root / "denoiser").mkdir(exist_ok=True, parents=True)
+
+        for name in names:
+            model = torch.hub.load(repo_or_dir='facebookresearch/denoiser', model=name,
+                                   force_reload=False, trust_repo=True)
+            args, kwargs = model._init_args_kwargs
+            torch.save({'args': list(args), 'kwargs': dict(kwargs), 'state': model.state_dict()},
+                       self.root / "denoiser" / f"{name}.th")
+
+        return {"path": "denoiser", "format": "state_dict", "variants": names, "source": "facebookresearch/denoiser"}
+
+    def _build_yamnet(self) -> Dict:
+        import tensorflow_hub as hub
+        saved_model = Path(hub.resolve(self.config.models.yamnet_url))
+        self._copy_tree(saved_model, self.root / "yamnet")
+        return {"path": "yamnet", "format": "saved_model", "source": self.config.models.yamnet_url}
+
+    def _build_conformer(self) -> Dict:
+        from huggingface_hub import snapshot_download
+        from transcriber import Transcriber
+        snapshot_download(repo_id=Transcriber.MODEL_NAME, local_dir=str(self.root / "conformer"))
+        return {"path": "conformer", "format": "hf_snapshot_remote_code", "source": Transcriber.MODEL_NAME}
+
+    def build(self, components: Sequence[str] = COMPONENTS) -> Dict:
+        self.root.mkdir(exist_ok=True, parents=True)
+        manifest = self.manifest()
+        if manifest is None or manifest.get("format") != self.FORMAT:
+            manifest = {"format": self.FORMAT, "components": {}}
+
+        for component in components:
+            print(f"  Bundling {component}...", end=" ", flush=True)
+            start = time.perf_counter()
+            entry = getattr(self, f"_build_{component}")()
+            entry["bundled_at"] = datetime.now().isoformat()
+            manifest["components"][component] = entry
+            print(f"✓ ({time.perf_counter() - start:.1f}s)")
+
+        manifest["created"] = datetime.now().isoformat()
+        with open(self.root / self.MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        return manifest
+
+
+def time_startup(config: Config, components: Sequence[str] = COMPONENTS) -> Dict[str, float]:
+    """Wall time to construct each pipeline component with the configured model source.
+
+    Library imports happen before the clock starts, so repeated calls in one
+    process compare model resolution and loading only.
+    """
+    from vad_processor import VADProcessor
+    from denoiser_preprocessor import DenoiserProcessor
+    from noise_classifier import NoiseClassifier
+    from transcriber import Transcriber
+
+    constructors = {
+        "vad": lambda: VADProcessor(config),
+        "denoiser": lambda: DenoiserProcessor(config),
+        "yamnet": lambda: NoiseClassifier(config),
+        "conformer": lambda: Transcriber(config, language="kn")
+    }
+
+    times = {}
+    for component in components:
+        start = time.perf_counter()
+        constructors[component]()
+        times[component] = round(time.perf_counter() - start, 2)
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or time the local model bundle")
+    parser.add_argument("command", choices=["build", "time"])
+    parser.add_argument("--components", nargs="+", choices=COMPONENTS, default=COMPONENTS)
+    parser.add_argument("--source", choices=["auto", "bundle", "hub"], default=None,
+                        help="model source for `time` (default: ModelConfig.model_source)")
+    args = parser.parse_args(argv)
+
+    config = Config.default()
+    if args.source:
+        config.models.model_source = args.source
+
+    if args.command == "build":
+        config.models.model_source = "hub"
+        print("Startup from hubs (before):")
+        before = time_startup(config, args.components)
+        for c, t in before.items():
+            print(f"  {c:<10} {t:.2f}s")
+
+        print(f"\nBuilding bundle in {config.paths.model_bundle_dir}/")
+        ModelBundle(config).build(args.components)
+
+        config.models.model_source = "bundle"
+        print("\nStartup from bundle (after):")
+        after = time_startup(config, args.components)
+        for c in args.components:
+            print(f"  {c:<10} {before[c]:.2f}s → {after[c]:.2f}s")
+        print(f"  {'total':<10} {sum(before.values()):.2f}s → {sum(after.values()):.2f}s")
+        return 0
+
+    times = time_startup(config, args.components)
+    source = config.models.model_source
+    print(f"Startup ({source}, bundle {'present' if ModelBundle(config).manifest() else 'absent'}):")
+    for c, t in times.items():
+        print(f"  {c:<10} {t:.2f}s")
+    print(f"  {'total':<10} {sum(times.values()):.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
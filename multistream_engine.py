@@ -0,0 +1,454 @@
+import numpy as np
+import threading
+import queue
+import time
+import itertools
+from collections import deque
+from typing import Optional, Callable, Dict, List, Tuple
+import sys
+import os
+
+os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+from config import Config
+from audio_buffer import AudioBuffer, SampleQueue, COPIES
+from vad_processor import VADProcessor
+from noise_classifier import NoiseClassifier
+from transcriber import Transcriber
+
+
+class StreamSession:
+    """Per-stream state. Only the engine threads mutate it."""
+
+    def __init__(self, session_id, config: Config, event_callback: Optional[Callable] = None):
+        self.session_id = session_id
+        self.config = config
+        self.event_callback = event_callback
+
+        self.inbox = deque()
+        self.context = np.zeros(0, dtype=np.float32)
+        self.speech = SampleQueue(config.audio.sample_rate)
+        self.in_speech = False
+
+        self.utterance_count = 0
+        self.total_speech_time = 0.0
+        self.chunks_received = 0
+        self.chunks_dropped = 0
+        self.chunks_processed = 0
+
+        self.session_start = time.time()
+        self.last_noise_update = 0.0
+        self.current_noise_type = "unknown"
+
+        self.closing = False
+        self.finalized = False
+        self.done = threading.Event()
+
+    def update_context(self, chunk: np.ndarray):
+        context_samples = self.config.audio.context_samples
+        # A fresh array per chunk: the noise worker holds on to the previous one.
+        keep = max(0, context_samples - len(chunk))
+        self.context = np.concatenate([self.context[max(0, len(self.context) - keep):], chunk[-context_samples:]])
+        COPIES.record("engine.context", self.context.nbytes)
+
+    def update_speech_state(self, is_speech: bool) -> str:
+        prev = self.in_speech
+        self.in_speech = is_speech
+
+        if not prev and is_speech:
+            self.speech.clear()
+            return "speech_started"
+
+        if prev and not is_speech:
+            return "utterance_complete"
+
+        return "no_change"
+
+    def take_utterance(self) -> Optional[np.ndarray]:
+        if len(self.speech) == 0:
+            return None
+        return self.speech.take()
+
+    def split_utterance(self) -> np.ndarray:
+        """Cuts the open utterance at the quietest frame before max_utterance_duration, like LivePipeline."""
+        sr = self.config.audio.sample_rate
+        cut = self.speech.quietest_cut(
+            int(self.config.buffer.max_utterance_duration * sr),
+            int(self.config.buffer.split_search_duration * sr),
+            max(1, int(self.config.buffer.split_frame_duration * sr))
+        )
+        return self.speech.take(cut)
+
+    def emit(self, event: Dict):
+        cb = self.event_callback
+        if cb is None:
+            return
+        try:
+            cb(dict(event, session_id=self.session_id))
+        except Exception as e:
+            print(f"\n✗ Session {self.session_id} callback error: {e}")
+
+
+class MultiStreamEngine:
+    """
+    Serves many live streams from one set of models.
+
+    A scheduler thread takes at most one pending chunk per session per tick
+    and scores all of them with a single batched VAD pass, segmented the same
+    way as LivePipeline's per-chunk VAD. Utterances are split at
+    max_utterance_duration and go to an ASR thread that micro-batches them
+    across sessions into Transcriber.transcribe_batch. Noise classification
+    runs on its own thread so it never stalls VAD.
+    """
+
+    def __init__(
+        self,
+        config: Config = None,
+        vad: Optional[VADProcessor] = None,
+        classifier: Optional[NoiseClassifier] = None,
+        transcriber: Optional[Transcriber] = None
+    ):
+        self.config = config or Config.default()
+
+        self.vad = vad or VADProcessor(config)
+        self.classifier = classifier or NoiseClassifier(config)
+        self.transcriber = transcriber or Transcriber(config, language="kn")
+
+        self.sessions: Dict[object, StreamSession] = {}
+        self.sessions_lock = threading.Lock()
+        self._session_ids = itertools.count(1)
+        self._work_available = threading.Event()
+
+        self.asr_queue = queue.Queue()
+        self.noise_queue = queue.Queue(maxsize=self.config.engine.max_sessions)
+
+        self.is_running = False
+        self.threads: List[threading.Thread] = []
+
+        self.vad_batches = 0
+        self.vad_chunks = 0
+        self.vad_time = 0.0
+        self.asr_batches = 0
+        self.asr_utterances = 0
+        self.asr_time = 0.0
+        self.asr_audio_sec = 0.0
+        self.forced_splits = 0
+
+    def start(self):
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self.threads = [
+            threading.Thread(target=self._vad_loop, daemon=True),
+            threading.Thread(target=self._asr_loop, daemon=True),
+            threading.Thread(target=self._noise_loop, daemon=True)
+        ]
+        for t in self.threads:
+            t.start()
+
+    def stop(self):
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._work_available.set()
+        self.asr_queue.put(None)
+        try:
+            self.noise_queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+        for t in self.threads:
+            t.join(timeout=2.0)
+        self.threads = []
+
+    def open_session(self, event_callback: Optional[Callable] = None, session_id=None):
+        with self.sessions_lock:
+            if len(self.sessions) >= self.config.engine.max_sessions:
+                raise RuntimeError(f"Session limit reached ({self.config.engine.max_sessions})")
+
+            if session_id is None:
+                session_id = next(self._session_ids)
+            if session_id in self.sessions:
+                raise ValueError(f"Session already open: {session_id}")
+
+            self.sessions[session_id] = StreamSession(session_id, self.config, event_callback)
+
+        return session_id
+
+    def push(self, session_id, chunk: np.ndarray, block: bool = False) -> bool:
+        session = self.sessions.get(session_id)
+        if session is None or session.closing:
+            return False
+
+        session.chunks_received += 1
+        while len(session.inbox) >= self.config.engine.session_queue_size:
+            if not block or not self.is_running:
+                session.chunks_dropped += 1
+                return False
+            time.sleep(0.005)
+
+        session.inbox.append(AudioBuffer.wrap(chunk, self.config.audio.sample_rate, site="engine.inbox"))
+        self._work_available.set()
+        return True
+
+    def close_session(self, session_id, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Finalizes the open utterance, waits for its transcription and removes the session."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+
+        session.closing = True
+        self._work_available.set()
+        session.done.wait(timeout)
+
+        with self.sessions_lock:
+            self.sessions.pop(session_id, None)
+
+        return {
+            'session_id': session_id,
+            'utterances': session.utterance_count,
+            'speech_time_sec': round(session.total_speech_time, 2),
+            'chunks_received': session.chunks_received,
+            'chunks_dropped': session.chunks_dropped
+        }
+
+    def _vad_loop(self):
+        while self.is_running:
+            with self.sessions_lock:
+                sessions = list(self.sessions.values())
+
+            batch: List[Tuple[StreamSession, np.ndarray]] = []
+            for session in sessions:
+                if session.inbox:
+                    batch.append((session, session.inbox.popleft()))
+                elif session.closing and not session.finalized:
+                    self._finalize_session(session)
+
+            if not batch:
+                self._work_available.wait(timeout=0.1)
+                self._work_available.clear()
+                continue
+
+            try:
+                start = time.time()
+                ratios = self.vad.speech_ratio_batch(
+                    [chunk for _, chunk in batch],
+                    self.config.audio.sample_rate
+                )
+                self.vad_time += time.time() - start
+                self.vad_batches += 1
+                self.vad_chunks += len(batch)
+            except Exception as e:
+                print(f"\n✗ Batched VAD error: {e}")
+                ratios = np.zeros(len(batch))
+
+            now = time.time()
+            for (session, chunk), ratio in zip(batch, ratios):
+                self._process_session_chunk(session, chunk, float(ratio), now)
+
+    def _process_session_chunk(self, session: StreamSession, chunk: np.ndarray, speech_ratio: float, now: float):
+        session.update_context(chunk)
+        session.chunks_processed += 1
+
+        if now - session.last_noise_update >= self.config.buffer.noise_update_interval:
+            session.last_noise_update = now
+            try:
+                self.noise_queue.put_nowait((session, session.context))
+            except queue.Full:
+                pass
+
+        is_speech = speech_ratio > self.config.engine.speech_ratio_threshold
+        state = session.update_speech_state(is_speech)
+
+        if is_speech:
+            session.speech.extend(chunk)
+            if len(session.speech) >= self.config.buffer.max_utterance_duration * self.config.audio.sample_rate:
+                self.forced_splits += 1
+                self._submit_utterance(session, session.split_utterance())
+
+        if state == "utterance_complete":
+            self._submit_utterance(session)
+
+    def _submit_utterance(self, session: StreamSession, utterance: Optional[np.ndarray] = None):
+        if utterance is None:
+            utterance = session.take_utterance()
+        if utterance is None or len(utterance) < self.config.audio.sample_rate * 0.3:
+            return
+
+        session.utterance_count += 1
+        self.asr_queue.put((session, session.utterance_count, utterance))
+
+    def _finalize_session(self, session: StreamSession):
+        if session.in_speech:
+            session.update_speech_state(False)
+            self._submit_utterance(session)
+        session.finalized = True
+        self.asr_queue.put((session, None, None))
+
+    def _collect_asr_batch(self) -> Optional[List]:
+        item = self.asr_queue.get()
+        if item is None:
+            return None
+
+        items = [item]
+        deadline = time.time() + self.config.engine.asr_max_wait
+        while len(items) < self.config.engine.asr_max_batch:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                item = self.asr_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self.asr_queue.put(None)
+                break
+            items.append(item)
+
+        return items
+
+    def _length_groups(self, items: List) -> List[List]:
+        lengths = [len(item[2]) for item in items]
+        return [[items[i] for i in group] for group in self.transcriber.plan_batches(lengths, self.config.audio.sample_rate)]
+
+    def _transcribe_group(self, utterances: List[np.ndarray], sr: int) -> List[Dict]:
+        try:
+            return self.transcriber.transcribe_batch(utterances, sr)
+        except Exception as e:
+            print(f"\n✗ Batched ASR error, retrying one by one: {e}")
+
+        results = []
+        for utterance in utterances:
+            try:
+                results.append(self.transcriber.transcribe(utterance, sr))
+            except Exception as e:
+                print(f"\n✗ ASR error: {e}")
+                results.append({"text": ""})
+        return results
+
+    def _asr_loop(self):
+        while True:
+            items = self._collect_asr_batch()
+            if items is None:
+                break
+
+            utterances = [item for item in items if item[2] is not None]
+            markers = [item for item in items if item[2] is None]
+
+            for group in self._length_groups(utterances):
+                sr = self.config.audio.sample_rate
+                start = time.time()
+                results = self._transcribe_group([item[2] for item in group], sr)
+                elapsed = time.time() - start
+
+                audio_sec = sum(len(item[2]) for item in group) / sr
+                self.asr_batches += 1
+                self.asr_utterances += len(group)
+                self.asr_time += elapsed
+                self.asr_audio_sec += audio_sec
+
+                for (session, utterance_id, utterance), result in zip(group, results):
+                    duration = len(utterance) / sr
+                    session.total_speech_time += duration
+                    session.emit({
+                        'type': 'utterance',
+                        'utterance_id': utterance_id,
+                        'text': result['text'],
+                        'duration_sec': round(duration, 2),
+                        'noise': session.current_noise_type,
+                        'batch_size': len(group),
+                        'transcribe_time_sec': round(elapsed, 3),
+                        'rtf': round(elapsed / audio_sec, 3) if audio_sec > 0 else None
+                    })
+
+            for session, _, _ in markers:
+                session.done.set()
+
+    def _noise_loop(self):
+        while self.is_running:
+            try:
+                item = self.noise_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+
+            session, context = item
+            if len(context) == 0:
+                continue
+
+            try:
+                result = self.classifier.analyze_background_noise(context, self.config.audio.sample_rate)
+            except Exception as e:
+                print(f"\n✗ Noise classification error: {e}")
+                continue
+
+            session.current_noise_type = result['category']
+            session.emit({
+                'type': 'noise',
+                'timestamp': round(time.time() - session.session_start, 2),
+                'category': result['category'],
+                'confidence': round(result['top_prediction']['confidence'], 3),
+                'detail': result['top_prediction']['class']
+            })
+
+    def get_stats(self) -> Dict:
+        return {
+            'active_sessions': len(self.sessions),
+            'vad_batches': self.vad_batches,
+            'vad_chunks': self.vad_chunks,
+            'vad_mean_batch_size': round(self.vad_chunks / self.vad_batches, 2) if self.vad_batches else 0.0,
+            'vad_time_sec': round(self.vad_time, 3),
+            'asr_batches': self.asr_batches,
+            'asr_utterances': self.asr_utterances,
+            'asr_mean_batch_size': round(self.asr_utterances / self.asr_batches, 2) if self.asr_batches else 0.0,
+            'asr_time_sec': round(self.asr_time, 3),
+            'asr_rtf': round(self.asr_time / self.asr_audio_sec, 3) if self.asr_audio_sec else None,
+            'forced_splits': self.forced_splits
+        }
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from audio_utils import AudioUtils
+
+    print("Testing MultiStreamEngine...")
+    print("=" * 70)
+
+    test_audio_path = Path("data/Nikhil_Indoor.mp3")
+    if not test_audio_path.exists():
+        print("✗ Test audio file not found: Nikhil_Indoor.mp3")
+        exit(1)
+
+    num_streams = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    config = Config.default()
+    audio, sr = AudioUtils.load_audio(test_audio_path, sr=config.audio.sample_rate)
+    print(f"✓ Loaded audio: {len(audio)/sr:.1f}s @ {sr}Hz")
+
+    engine = MultiStreamEngine(config)
+    engine.start()
+    print("✓ Engine started")
+
+    events = []
+    session_ids = [engine.open_session(events.append) for _ in range(num_streams)]
+    print(f"✓ Opened {len(session_ids)} sessions")
+
+    start = time.time()
+    chunk_samples = config.audio.chunk_samples
+    for i in range(0, len(audio), chunk_samples):
+        for sid in session_ids:
+            engine.push(sid, audio[i:i + chunk_samples], block=True)
+
+    summaries = [engine.close_session(sid) for sid in session_ids]
+    elapsed = time.time() - start
+    engine.stop()
+
+    stream_audio_sec = num_streams * len(audio) / sr
+    print(f"✓ Processed {stream_audio_sec:.1f}s of audio in {elapsed:.2f}s "
+          f"({stream_audio_sec / elapsed:.2f}x real time)")
+    print(f"  Utterances: {sum(s['utterances'] for s in summaries)}")
+    print(f"  Stats: {engine.get_stats()}")
+    print("✓ MultiStreamEngine working correctly")
@@ -2,21 +2,32 @@ import tensorflow as tf
 import tensorflow_hub as hub
 import numpy as np
 from pathlib import Path
-from typing import List, Dict
+from collections import deque
+from typing import List, Dict, Tuple, Optional
 from config import Config
 from audio_utils import AudioUtils
+from audio_buffer import AudioBuffer, SampleQueue, COPIES
+from model_bundle import ModelBundle
 
 
 class NoiseClassifier:
     
+    PATCH_SPAN_SAMPLES = 15600
+    PATCH_HOP_SAMPLES = 7680
+    
     def __init__(self, config: Config = None):
         self.config = config or Config.default()
         self.model = None
         self.class_names = None
+        self._batch_fn = None
         self._load_model()
     
     def _load_model(self):
-        self.model = hub.load(self.config.models.yamnet_url)
+        bundle = ModelBundle(self.config)
+        if bundle.use_for("yamnet"):
+            self.model = bundle.load_yamnet()
+        else:
+            self.model = hub.load(self.config.models.yamnet_url)
         
         class_map_path = self.model.class_map_path().numpy().decode('utf-8')
         
@@ -24,27 +35,118 @@ class NoiseClassifier:
             lines = f.readlines()
         
         self.class_names = [line.strip().split(',')[2].strip('"') for line in lines[1:]]
+        self._compile_taxonomy()
     
-    def classify(
-        self,
-        audio: np.ndarray,
-        sr: int = 16000,
-        top_k: int = 10
-    ) -> List[Dict[str, float]]:
+    @staticmethod
+    def _prepare_waveform(audio: np.ndarray, sr: int = 16000) -> AudioBuffer:
         if sr != 16000:
             audio = AudioUtils.resample_audio(audio, sr, 16000)
         
-        if audio.dtype != np.float32:
-            audio = audio.astype(np.float32)
+        audio = AudioBuffer.wrap(audio, 16000, site="noise_classifier")
+        
+        peak = max(audio.max(), -audio.min()) if len(audio) else 0.0
+        if peak > 1.0:
+            audio = audio / peak
+        
+        return audio
+    
+    def _run_model(
+        self,
+        audio: np.ndarray,
+        sr: int = 16000
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        audio = self._prepare_waveform(audio, sr)
+        
+        scores, embeddings, spectrogram = self.model(audio.to_tf())
         
-        if np.max(np.abs(audio)) > 1.0:
-            audio = audio / np.max(np.abs(audio))
+        return scores.numpy(), embeddings.numpy()
+    
+    @classmethod
+    def num_frames(cls, num_samples: int) -> int:
+        """Frames YAMNet emits for a 16 kHz clip; it zero-pads to whole patches, as the batch path does."""
+        extra = max(0, num_samples - cls.PATCH_SPAN_SAMPLES)
+        return 1 + -(-extra // cls.PATCH_HOP_SAMPLES)
+    
+    def _batch_scores_fn(self):
+        """
+        Padded [batch, samples] -> [batch, frames, classes], traced once.
         
-        scores, embeddings, spectrogram = self.model(audio)
+        The SavedModel signature takes a single 1-D waveform, so rows are
+        mapped inside the graph; the point is one Python->TF dispatch per
+        bucket instead of per clip.
+        """
+        if self._batch_fn is None:
+            model = self.model
+            num_classes = len(self.class_names)
+            
+            @tf.function(input_signature=[tf.TensorSpec(shape=[None, None], dtype=tf.float32)])
+            def batch_scores(waveforms):
+                return tf.map_fn(
+                    lambda waveform: model(waveform)[0],
+                    waveforms,
+                    fn_output_signature=tf.TensorSpec(shape=[None, num_classes], dtype=tf.float32)
+                )
+            
+            self._batch_fn = batch_scores
         
-        mean_scores = np.mean(scores.numpy(), axis=0)
+        return self._batch_fn
+    
+    def plan_batches(self, lengths: List[int]) -> List[List[int]]:
+        cfg = self.config.classifier
         
-        top_indices = np.argsort(mean_scores)[-top_k:][::-1]
+        batches = []
+        current = []
+        for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            if current and (len(current) >= cfg.batch_size
+                            or lengths[i] > max(lengths[current[0]], 1) * cfg.batch_max_length_ratio):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def mean_scores_batch(
+        self,
+        audios: List[np.ndarray],
+        sr: int = 16000
+    ) -> np.ndarray:
+        """Clip-level mean class scores [n_clips, n_classes], averaging only each clip's own frames."""
+        waveforms = [self._prepare_waveform(audio, sr) for audio in audios]
+        lengths = [len(w) for w in waveforms]
+        batch_scores = self._batch_scores_fn()
+        
+        means = np.zeros((len(waveforms), len(self.class_names)), dtype=np.float32)
+        for batch in self.plan_batches(lengths):
+            max_len = max(max(lengths[i] for i in batch), self.PATCH_SPAN_SAMPLES)
+            padded = np.zeros((len(batch), max_len), dtype=np.float32)
+            for row, i in enumerate(batch):
+                padded[row, :lengths[i]] = waveforms[i]
+            COPIES.record("noise_classifier.pad", padded.nbytes)
+            
+            scores = batch_scores(tf.convert_to_tensor(padded)).numpy()
+            
+            valid = np.array([self.num_frames(lengths[i]) for i in batch])
+            mask = np.arange(scores.shape[1])[None, :] < valid[:, None]
+            means[batch] = (scores * mask[:, :, None]).sum(axis=1) / valid[:, None]
+        
+        return means
+    
+    @staticmethod
+    def _top_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Top-k class indices per row, best first: argpartition, then sort only the k survivors."""
+        top_k = min(top_k, scores.shape[-1])
+        part = np.argpartition(-scores, top_k - 1, axis=-1)[..., :top_k]
+        order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1)
+        return np.take_along_axis(part, order, axis=-1)
+    
+    def _top_predictions(
+        self,
+        mean_scores: np.ndarray,
+        top_k: int = 10
+    ) -> List[Dict[str, float]]:
+        top_indices = self._top_indices(mean_scores, top_k)
         
         results = []
         for idx in top_indices:
@@ -55,66 +157,259 @@ class NoiseClassifier:
         
         return results
     
-    def filter_non_speech(
+    def classify(
         self,
-        predictions: List[Dict[str, float]]
+        audio: np.ndarray,
+        sr: int = 16000,
+        top_k: int = 10
     ) -> List[Dict[str, float]]:
-        speech_keywords = [
-            'speech', 'narration', 'conversation', 'voice', 'talk',
-            'silence', 'quiet', 'music', 'singing'
+        scores, _ = self._run_model(audio, sr)
+        
+        mean_scores = np.mean(scores, axis=0)
+        
+        return self._top_predictions(mean_scores, top_k)
+    
+    def classify_batch(
+        self,
+        audios: List[np.ndarray],
+        sr: int = 16000,
+        top_k: int = 10
+    ) -> List[List[Dict[str, float]]]:
+        """Same result as classify() per clip, for many clips; output keeps input order."""
+        if not audios:
+            return []
+        
+        means = self.mean_scores_batch(audios, sr)
+        top_indices = self._top_indices(means, top_k)
+        top_scores = np.take_along_axis(means, top_indices, axis=1)
+        
+        return [
+            [{'class': self.class_names[idx], 'confidence': float(score)}
+             for idx, score in zip(row_indices, row_scores)]
+            for row_indices, row_scores in zip(top_indices, top_scores)
         ]
+    
+    def _compile_taxonomy(self):
+        """
+        Resolves the keyword taxonomy against YAMNet's class names once.
         
-        filtered = []
-        for pred in predictions:
-            class_lower = pred['class'].lower()
-            if not any(keyword in class_lower for keyword in speech_keywords):
-                filtered.append(pred)
+        category_matrix[class, category] is 1 for the first category whose
+        keywords match the class name (same precedence as the keyword lists),
+        and 0 for speech/music classes, so frame_scores @ category_matrix gives
+        per-category scores for every frame in one multiply.
+        """
+        cfg = self.config.classifier
+        names = [name.lower() for name in self.class_names]
+        
+        self.category_names = list(cfg.taxonomy)
+        self.speech_mask = np.array([
+            any(keyword in name for keyword in cfg.speech_keywords) for name in names
+        ])
+        
+        self.class_category = np.full(len(names), -1, dtype=np.int64)
+        for idx, name in enumerate(names):
+            if self.speech_mask[idx]:
+                continue
+            for c, keywords in enumerate(cfg.taxonomy.values()):
+                if any(keyword in name for keyword in keywords):
+                    self.class_category[idx] = c
+                    break
         
-        return filtered
+        self.category_matrix = np.zeros((len(names), len(self.category_names)), dtype=np.float32)
+        mapped = self.class_category >= 0
+        self.category_matrix[np.flatnonzero(mapped), self.class_category[mapped]] = 1.0
+        
+        self.class_index = {name: idx for idx, name in enumerate(self.class_names)}
+        
+        unmatched = [name for c, name in enumerate(self.category_names) if not self.category_matrix[:, c].any()]
+        if unmatched:
+            print(f"⚠ Noise taxonomy categories match no YAMNet class and will never be detected: "
+                  f"{', '.join(unmatched)}")
+        elif not self.category_names:
+            print("⚠ Noise taxonomy is empty; every noise category will be 'unknown'")
+    
+    def filter_non_speech(
+        self,
+        predictions: List[Dict[str, float]]
+    ) -> List[Dict[str, float]]:
+        return [pred for pred in predictions if not self.speech_mask[self.class_index[pred['class']]]]
     
     def get_noise_type_mapping(self) -> Dict[str, List[str]]:
-        return {
-            'traffic': ['traffic', 'motor vehicle', 'car', 'vehicle', 'engine', 
-                       'car horn', 'truck', 'bus', 'emergency vehicle'],
-            'construction': ['jackhammer', 'drill', 'chainsaw', 'power tool', 'sawing',
-                           'hammer', 'construction', 'drilling'],
-            'crowd': ['crowd', 'hubbub', 'chatter', 'babble', 'restaurant',
-                     'cafeteria', 'party', 'people', 'laughter'],
-            'indoor': ['washing machine', 'vacuum cleaner', 'fan', 'air conditioning', 
-                      'appliance', 'clock', 'refrigerator', 'dishwasher', 'microwave',
-                      'blender', 'hair dryer', 'inside']
-        }
+        return {category: list(keywords) for category, keywords in self.config.classifier.taxonomy.items()}
     
     def map_to_noise_category(
         self,
         predictions: List[Dict[str, float]]
     ) -> str:
-        mapping = self.get_noise_type_mapping()
-        
         for pred in predictions:
-            class_name = pred['class'].lower()
-            for category, keywords in mapping.items():
-                if any(keyword in class_name for keyword in keywords):
-                    return category
+            c = self.class_category[self.class_index[pred['class']]]
+            if c >= 0:
+                return self.category_names[c]
         
         return "unknown"
     
+    def category_scores(self, scores: np.ndarray) -> np.ndarray:
+        """[..., n_classes] class scores -> [..., n_categories] summed category scores."""
+        return scores @ self.category_matrix
+    
+    def _label(self, category_scores: np.ndarray) -> np.ndarray:
+        if category_scores.shape[-1] == 0:
+            return np.full(category_scores.shape[:-1], -1, dtype=np.int64)
+        best = np.argmax(category_scores, axis=-1)
+        best_score = np.take_along_axis(category_scores, best[..., None], axis=-1)[..., 0]
+        return np.where(best_score >= self.config.classifier.min_category_score, best, -1)
+    
+    def category_timeline(self, frame_scores: np.ndarray) -> List[Dict]:
+        """
+        Run-length encoded per-frame categories: one segment per run of
+        consecutive YAMNet frames with the same label. Times are relative to
+        the first frame; frame i owns [i * hop, (i + 1) * hop), and the last
+        frame runs to the end of its patch window.
+        """
+        if len(frame_scores) == 0:
+            return []
+        
+        per_frame = self.category_scores(frame_scores)
+        labels = self._label(per_frame)
+        
+        boundaries = np.flatnonzero(np.diff(labels)) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(labels)]])
+        
+        hop = self.PATCH_HOP_SAMPLES / 16000
+        window = StreamingNoiseClassifier.PATCH_WINDOW
+        
+        timeline = []
+        for start, end in zip(starts, ends):
+            label = labels[start]
+            end_time = (end - 1) * hop + window if end == len(labels) else end * hop
+            timeline.append({
+                'start': round(float(start * hop), 2),
+                'end': round(float(end_time), 2),
+                'category': self.category_names[label] if label >= 0 else "unknown",
+                'score': round(float(per_frame[start:end, label].mean()) if label >= 0 else 0.0, 3)
+            })
+        
+        return timeline
+    
+    def analyze_scores(
+        self,
+        mean_scores: np.ndarray,
+        frame_scores: Optional[np.ndarray] = None
+    ) -> Dict:
+        masked = np.where(self.speech_mask, -np.inf, mean_scores)
+        non_speech = [
+            {'class': self.class_names[idx], 'confidence': float(mean_scores[idx])}
+            for idx in self._top_indices(masked, 5)
+        ]
+        
+        category_scores = self.category_scores(mean_scores)
+        label = int(self._label(category_scores))
+        
+        result = {
+            'category': self.category_names[label] if label >= 0 else "unknown",
+            'category_scores': {
+                name: float(score) for name, score in zip(self.category_names, category_scores)
+            },
+            'top_prediction': non_speech[0],
+            'all_non_speech': non_speech
+        }
+        
+        if frame_scores is not None:
+            result['timeline'] = self.category_timeline(frame_scores)
+        
+        return result
+    
     def analyze_background_noise(
         self,
         audio: np.ndarray,
         sr: int = 16000
     ) -> Dict:
-        all_predictions = self.classify(audio, sr, top_k=20)
+        scores, _ = self._run_model(audio, sr)
+        
+        return self.analyze_scores(np.mean(scores, axis=0), scores)
+
+
+class StreamingNoiseClassifier:
+    """
+    Incremental YAMNet over a live stream.
+
+    YAMNet scores 0.96 s patches every 0.48 s. Audio is buffered until whole
+    new patches are available, the model runs only on those (plus the overlap
+    they need), and per-frame scores and embeddings are kept for the last
+    window_duration seconds. analyze() is then just an average over cached
+    frames, so it can be called as often as needed.
+    """
+    
+    PATCH_WINDOW = 0.96
+    PATCH_HOP = 0.48
+    STFT_WINDOW = 0.025
+    STFT_HOP = 0.010
+    
+    def __init__(
+        self,
+        classifier: NoiseClassifier,
+        config: Config = None,
+        window_duration: Optional[float] = None
+    ):
+        self.classifier = classifier
+        self.config = config or classifier.config
+        self.sr = 16000
         
-        non_speech = self.filter_non_speech(all_predictions)
+        self.span_samples = int(round((self.PATCH_WINDOW + self.STFT_WINDOW - self.STFT_HOP) * self.sr))
+        self.hop_samples = int(round(self.PATCH_HOP * self.sr))
         
-        category = self.map_to_noise_category(non_speech) if non_speech else "unknown"
+        window_duration = window_duration or self.config.audio.context_duration
+        window_samples = int(window_duration * self.sr)
+        self.max_frames = max(1, 1 + (window_samples - self.span_samples) // self.hop_samples)
         
-        return {
-            'category': category,
-            'top_prediction': non_speech[0] if non_speech else all_predictions[0],
-            'all_non_speech': non_speech[:5]
-        }
+        self.scores = deque(maxlen=self.max_frames)
+        self.embeddings = deque(maxlen=self.max_frames)
+        self.pending = SampleQueue(self.sr, self.span_samples + 2 * self.hop_samples)
+        self.frames_computed = 0
+    
+    def reset(self):
+        self.scores.clear()
+        self.embeddings.clear()
+        self.pending.clear()
+        self.frames_computed = 0
+    
+    def push(self, chunk: np.ndarray, sr: int = 16000) -> int:
+        if sr != self.sr:
+            chunk = AudioUtils.resample_audio(chunk, sr, self.sr)
+        
+        self.pending.extend(AudioBuffer.wrap(chunk, self.sr, site="noise_stream"))
+        if len(self.pending) < self.span_samples:
+            return 0
+        
+        n_new = 1 + (len(self.pending) - self.span_samples) // self.hop_samples
+        needed = self.span_samples + (n_new - 1) * self.hop_samples
+        
+        scores, embeddings = self.classifier._run_model(self.pending.view(0, needed), self.sr)
+        scores, embeddings = scores[:n_new], embeddings[:n_new]
+        
+        self.scores.extend(scores)
+        self.embeddings.extend(embeddings)
+        self.frames_computed += len(scores)
+        
+        self.pending.consume(len(scores) * self.hop_samples)
+        
+        return len(scores)
+    
+    def frame_embeddings(self) -> np.ndarray:
+        if not self.embeddings:
+            return np.zeros((0, 1024), dtype=np.float32)
+        return np.stack(self.embeddings)
+    
+    def analyze(self) -> Optional[Dict]:
+        if not self.scores:
+            return None
+        
+        frame_scores = np.stack(self.scores)
+        result = self.classifier.analyze_scores(np.mean(frame_scores, axis=0), frame_scores)
+        result['frames'] = len(self.scores)
+        
+        return result
 
 
 if __name__ == "__main__":
@@ -145,5 +440,44 @@ if __name__ == "__main__":
     for i, pred in enumerate(result['all_non_speech'], 1):
         print(f"  {i}. {pred['class']}: {pred['confidence']:.3f}")
     
+    print(f"\nCategory Timeline:")
+    for seg in result['timeline']:
+        print(f"  {seg['start']:6.2f}s - {seg['end']:6.2f}s  {seg['category']:<12} {seg['score']:.3f}")
+    assert result['timeline'][0]['start'] == 0.0
+    assert all(a['category'] != b['category'] for a, b in zip(result['timeline'], result['timeline'][1:]))
+    
+    print("=" * 60)
+    
+    import time
+    clips = [audio[i:i + int(l * sr)] for i, l in zip(range(0, len(audio), sr), [1.0, 2.0, 2.5, 5.0, 4.0, 0.5] * 4)]
+    clips = [c for c in clips if len(c)]
+    
+    start = time.perf_counter()
+    single = [classifier.classify(c, sr, top_k=5) for c in clips]
+    single_time = time.perf_counter() - start
+    
+    classifier.classify_batch(clips[:2], sr, top_k=5)
+    start = time.perf_counter()
+    batched = classifier.classify_batch(clips, sr, top_k=5)
+    batch_time = time.perf_counter() - start
+    
+    for a, b in zip(single, batched):
+        assert [p['class'] for p in a] == [p['class'] for p in b]
+        assert all(abs(p['confidence'] - q['confidence']) < 1e-4 for p, q in zip(a, b))
+    print(f"✓ classify_batch matches classify on {len(clips)} clips "
+          f"({single_time:.2f}s per-clip → {batch_time:.2f}s batched)")
+    
+    print("=" * 60)
+    
+    stream = StreamingNoiseClassifier(classifier)
+    for i in range(0, len(audio), sr):
+        stream.push(audio[i:i + sr], sr)
+    
+    expected_frames = 1 + (len(audio) - stream.span_samples) // stream.hop_samples
+    assert stream.frames_computed == expected_frames
+    streaming_result = stream.analyze()
+    print(f"Streaming ({streaming_result['frames']} cached frames): {streaming_result['category'].upper()}")
+    print("✓ StreamingNoiseClassifier matches full-file framing")
+    
     print("=" * 60)
     print("✓ NoiseClassifier working correctly")
\ No newline at end of file
@@ -0,0 +1,147 @@
+import json
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Callable, List, Tuple, Union
+
+from config import Config
+
+
+class OutputWriter:
+    """
+    Moves result files off the critical path.
+
+    With background=True, writes are queued to a single worker thread and
+    run in submission order; callers only wait when more than
+    max_pending_mb of payload is queued. flush() is the barrier: it waits
+    for everything queued so far and raises if any write failed. With
+    background=False every write runs inline, which is what interactive
+    callers that read files right back (e.g. the UI) want.
+    """
+
+    def __init__(self, config: Config = None, background: bool = None):
+        self.config = config or Config.default()
+        self.background = self.config.output.background_writes if background is None else background
+        self.max_pending_bytes = int(self.config.output.max_pending_mb * 2**20)
+
+        self._queue = queue.Queue()
+        self._pending_bytes = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.errors: List[Tuple[str, str]] = []
+
+        self.writes_completed = 0
+        self.bytes_written = 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+
+            fn, args, kwargs, nbytes, label = item
+            try:
+                fn(*args, **kwargs)
+                self.writes_completed += 1
+                self.bytes_written += nbytes
+            except Exception as e:
+                self.errors.append((label, repr(e)))
+            finally:
+                with self._cond:
+                    self._pending_bytes -= nbytes
+                    self._cond.notify_all()
+                self._queue.task_done()
+
+    def submit(self, fn: Callable, *args, nbytes: int = 0, label: str = "", **kwargs):
+        if not self.background:
+            fn(*args, **kwargs)
+            self.writes_completed += 1
+            self.bytes_written += nbytes
+            return
+
+        self._ensure_thread()
+        with self._cond:
+            while self._pending_bytes > 0 and self._pending_bytes + nbytes > self.max_pending_bytes:
+                self._cond.wait()
+            self._pending_bytes += nbytes
+
+        self._queue.put((fn, args, kwargs, nbytes, label or getattr(fn, "__name__", "write")))
+
+    def write_audio(self, path: Union[str, Path], audio: np.ndarray, sr: int):
+        from audio_utils import AudioUtils
+        self.submit(AudioUtils.save_audio, path, audio, sr, nbytes=audio.nbytes, label=str(path))
+
+    def write_text(self, path: Union[str, Path], text: str):
+        def write():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        self.submit(write, nbytes=len(text.encode('utf-8')), label=str(path))
+
+    def write_json(self, path: Union[str, Path], obj):
+        self.write_text(path, json.dumps(obj, indent=2, ensure_ascii=False))
+
+    def flush(self):
+        if self.background and self._thread is not None:
+            self._queue.join()
+
+        if self.errors:
+            errors, self.errors = self.errors, []
+            details = "; ".join(f"{label}: {err}" for label, err in errors)
+            raise RuntimeError(f"{len(errors)} output write(s) failed: {details}")
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    print("Testing OutputWriter...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        writer = OutputWriter(background=True)
+        start = time.time()
+        for i in range(20):
+            writer.write_json(tmp / f"result_{i}.json", {"id": i, "text": "ಪರೀಕ್ಷೆ"})
+        writer.flush()
+        assert all((tmp / f"result_{i}.json").exists() for i in range(20))
+        assert json.loads((tmp / "result_3.json").read_text(encoding="utf-8"))["id"] == 3
+        print(f"✓ Background writes flushed ({writer.writes_completed} files, {time.time() - start:.3f}s)")
+
+        writer.write_text(tmp / "missing_dir" / "x.txt", "fail")
+        try:
+            writer.flush()
+            raise AssertionError("expected write failure")
+        except RuntimeError as e:
+            print(f"✓ Write errors surface at flush: {e}")
+        writer.close()
+
+        inline = OutputWriter(background=False)
+        inline.write_text(tmp / "inline.txt", "ok")
+        assert (tmp / "inline.txt").read_text() == "ok"
+        print("✓ Inline writes work")
+
+    print("\n✓ OutputWriter working correctly")
@@ -2,22 +2,36 @@ import numpy as np
 import time
 from pathlib import Path
 from collections import deque
-from typing import Optional
+from typing import Optional, Callable, Dict
+import threading
 import sys
 import os
 
 os.environ['TOKENIZERS_PARALLELISM'] = 'false'
 
 from config import Config
+from audio_utils import AudioUtils
+from audio_buffer import AudioBuffer, COPIES
 from buffer_manager import BufferManager
+from audio_sources import FileReplaySource
 from vad_processor import VADProcessor
-from noise_classifier import NoiseClassifier
+from noise_classifier import NoiseClassifier, StreamingNoiseClassifier
 from transcriber import Transcriber
+from metrics import MetricsRegistry, MetricsServer, DEFAULT_RTF_BUCKETS, model_memory_bytes, process_rss_bytes
 
 
 class LivePipeline:
     
-    def __init__(self, config: Config = None):
+    def __init__(
+        self,
+        config: Config = None,
+        vad: Optional[VADProcessor] = None,
+        classifier: Optional[NoiseClassifier] = None,
+        transcriber: Optional[Transcriber] = None,
+        event_callback: Optional[Callable[[Dict], None]] = None,
+        model_lock: Optional[threading.Lock] = None,
+        metrics: Optional[MetricsRegistry] = None
+    ):
         self.config = config or Config.default()
         
         print("="*70)
@@ -26,7 +40,7 @@ class LivePipeline:
         
         try:
             print("\n[1/3] Loading VAD model...", end=" ", flush=True)
-            self.vad = VADProcessor(config)
+            self.vad = vad or VADProcessor(config)
             print("✓")
         except Exception as e:
             print(f"✗")
@@ -37,7 +51,7 @@ class LivePipeline:
         
         try:
             print("[2/3] Loading Noise Classifier...", end=" ", flush=True)
-            self.classifier = NoiseClassifier(config)
+            self.classifier = classifier or NoiseClassifier(config)
             print("✓")
         except Exception as e:
             print(f"✗")
@@ -46,15 +60,28 @@ class LivePipeline:
             traceback.print_exc()
             sys.exit(1)
         
-        self.transcriber = None
-        self.transcriber_loaded = False
+        self.transcriber = transcriber
+        self.transcriber_loaded = transcriber is not None
+        
+        self.event_callback = event_callback
+        self.model_lock = model_lock or threading.Lock()
+        
+        self.models_ready = threading.Event()
+        self.preload_thread = None
+        self.preload_error = None
+        self.warmup_times = {}
         
         print("\n[*] Initializing buffer manager...", end=" ", flush=True)
         self.buffer_manager = BufferManager(config, callback=self._process_chunk)
         print("✓")
         
+        self.metrics = metrics or MetricsRegistry()
+        self.metrics_server = None
+        self._register_metrics()
+        
+        self.noise_stream = StreamingNoiseClassifier(self.classifier, self.config)
         self.last_noise_update = 0
-        self.noise_update_interval = 5.0
+        self.noise_update_interval = self.config.buffer.noise_update_interval
         self.current_noise_type = "unknown"
         self.current_noise_confidence = 0.0
         
@@ -62,16 +89,150 @@ class LivePipeline:
         self.total_speech_time = 0.0
         self.session_start = None
         
+        self.last_interim_samples = 0
+        self.interim_request = None
+        self.interim_ready = threading.Condition()
+        self.interim_thread = None
+        self.transcriber_load_lock = threading.Lock()
+        self.forced_splits = 0
+        self.overload_level = self.buffer_manager.overload.level
+        
         self.noise_history = deque(maxlen=100)
         
         self.is_running = False
         
         print("\n" + "="*70)
         print("✓ Core components loaded!")
-        print("  Transcriber will load on first use")
+        if not self.transcriber_loaded:
+            print("  Transcriber will load on first use")
         print("="*70 + "\n")
     
+    def _register_metrics(self):
+        m = self.metrics
+        bm = self.buffer_manager
+        sr = self.config.audio.sample_rate
+        
+        m.gauge("queue_depth_chunks", "Audio chunks waiting in the ingest queue", fn=bm.audio_queue.qsize)
+        m.counter("chunks_received_total", "Audio chunks delivered by the source", fn=lambda: bm.total_chunks_received)
+        m.counter("chunks_processed_total", "Audio chunks run through VAD", fn=lambda: bm.total_chunks_processed)
+        m.counter("chunks_dropped_total", "Audio chunks dropped on a full queue",
+                  labels={"kind": "speech"}, fn=lambda: bm.total_speech_dropped)
+        m.counter("chunks_dropped_total", "Audio chunks dropped on a full queue",
+                  labels={"kind": "quiet"}, fn=lambda: bm.total_quiet_dropped)
+        m.gauge("queue_latency_max_seconds", "Worst ingest-to-processing delay so far", fn=lambda: bm.max_queue_latency)
+        m.counter("chunks_shed_total", "Quiet non-speech chunks shed under overload", fn=lambda: bm.total_chunks_shed)
+        m.gauge("overload_level", "Load-shedding level (0 normal .. 4 shedding non-speech)", fn=lambda: bm.overload.level)
+        m.gauge("overload_pressure", "Max of queue fill and relative queue lag", fn=lambda: bm.overload.pressure)
+        m.gauge("utterance_backlog_seconds", "Buffered speech not yet transcribed", fn=lambda: len(bm.speech_buffer) / sr)
+        m.gauge("models_ready", "1 once background preload and warm-up have finished", fn=lambda: float(self.readiness()['ready']))
+        m.gauge("process_resident_memory_bytes", "Resident memory of the pipeline process", fn=process_rss_bytes)
+        m.gauge("model_memory_bytes", "Parameter and buffer memory of loaded models",
+                labels={"model": "vad"}, fn=lambda: model_memory_bytes(self.vad.model))
+        m.gauge("model_memory_bytes", "Parameter and buffer memory of loaded models",
+                labels={"model": "yamnet"}, fn=lambda: model_memory_bytes(self.classifier.model))
+        m.gauge("model_memory_bytes", "Parameter and buffer memory of loaded models",
+                labels={"model": "asr"},
+                fn=lambda: model_memory_bytes(self.transcriber.model) if self.transcriber_loaded else 0.0)
+        
+        self.vad_latency = m.histogram("vad_latency_seconds", "Per-chunk VAD latency")
+        self.yamnet_latency = m.histogram("yamnet_latency_seconds", "Per-chunk YAMNet frame latency")
+        self.asr_latency = m.histogram("asr_latency_seconds", "Transcription time per final utterance")
+        self.utterance_latency = m.histogram("utterance_latency_seconds", "Ingest-to-transcript latency per utterance")
+        self.asr_rtf = m.histogram("asr_rtf", "Transcription real-time factor per utterance", buckets=DEFAULT_RTF_BUCKETS)
+        self.utterances_total = m.counter("utterances_total", "Final utterances transcribed")
+        self.interims_total = m.counter("interim_transcripts_total", "Interim transcripts emitted")
+        self.interims_dropped = m.counter("interim_transcripts_dropped_total", "Interim requests superseded before they were decoded")
+        self.forced_splits_total = m.counter("forced_splits_total", "Utterances split at max duration")
+    
+    def serve_metrics(self, host: Optional[str] = None, port: Optional[int] = None) -> MetricsServer:
+        
+        if self.metrics_server is None:
+            self.metrics_server = MetricsServer(
+                self.metrics,
+                host or self.config.metrics.host,
+                self.config.metrics.port if port is None else port
+            )
+            self.metrics_server.start()
+            print(f"✓ Metrics: http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+        return self.metrics_server
+    
+    def _emit(self, event: Dict):
+        cb = self.event_callback
+        if cb is None:
+            return
+        try:
+            cb(event)
+        except Exception as e:
+            print(f"\n✗ Event callback error: {e}")
+    
+    def preload(self, background: bool = True):
+        """Loads the transcriber (if missing) and warms every model up on synthetic audio."""
+        
+        if self.preload_thread is not None or self.models_ready.is_set():
+            return
+        
+        if background:
+            self.preload_thread = threading.Thread(target=self._preload_models, daemon=True)
+            self.preload_thread.start()
+        else:
+            self._preload_models()
+    
+    def _preload_models(self):
+        
+        sr = self.config.audio.sample_rate
+        start = time.perf_counter()
+        
+        try:
+            if not self.transcriber_loaded:
+                self.transcriber = Transcriber(self.config, language="kn")
+                self.transcriber_loaded = True
+                self.warmup_times['transcriber_load'] = round(time.perf_counter() - start, 3)
+            
+            chunk = AudioUtils.synthetic_speech(self.config.audio.chunk_duration, sr)
+            utterance = AudioUtils.synthetic_speech(self.config.models.warmup_duration, sr, seed=1)
+            
+            self._warm_up('vad', lambda: self.vad.process_audio(chunk, sr))
+            self._warm_up('classifier', lambda: self.classifier.classify(chunk, sr))
+            self._warm_up('transcriber', lambda: self.transcriber.transcribe(utterance, sr))
+        except Exception as e:
+            self.preload_error = repr(e)
+            print(f"\n✗ Background model preload failed: {e}")
+        finally:
+            self.warmup_times['total'] = round(time.perf_counter() - start, 3)
+            self.models_ready.set()
+        
+        if self.preload_error is None:
+            print(f"\n✓ Models warm ({self.warmup_times['total']:.1f}s)", flush=True)
+        self._emit(dict(self.readiness(), type='ready'))
+    
+    def _warm_up(self, name: str, fn: Callable):
+        start = time.perf_counter()
+        with self.model_lock:
+            fn()
+        self.warmup_times[name] = round(time.perf_counter() - start, 3)
+    
+    def readiness(self) -> Dict:
+        return {
+            'ready': self.models_ready.is_set() and self.preload_error is None,
+            'transcriber_loaded': self.transcriber_loaded,
+            'warmed_up': [name for name in ('vad', 'classifier', 'transcriber') if name in self.warmup_times],
+            'warmup_sec': dict(self.warmup_times),
+            'error': self.preload_error
+        }
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self.models_ready.wait(timeout) and self.preload_error is None
+    
     def _load_transcriber_lazy(self):
+        with self.transcriber_load_lock:
+            self._load_transcriber()
+    
+    def _load_transcriber(self):
+        if self.preload_thread is not None and self.preload_thread.is_alive():
+            print("\n[*] Waiting for background model load...", end=" ", flush=True)
+            self.models_ready.wait()
+            print("✓" if self.transcriber_loaded else "✗")
+        
         if not self.transcriber_loaded:
             print("\n[*] Loading Transcriber (first use)...", end=" ", flush=True)
             try:
@@ -89,18 +250,29 @@ class LivePipeline:
         
         try:
             current_time = time.time()
+            overload = self.buffer_manager.overload
             
-            if current_time - self.last_noise_update >= self.noise_update_interval:
-                self._update_noise_classification(context)
-                self.last_noise_update = current_time
+            if overload.level != self.overload_level:
+                self._on_overload_change(overload)
+            
+            if not overload.noise_paused:
+                self._push_noise_frames(chunk)
+                
+                if current_time - self.last_noise_update >= self.noise_update_interval:
+                    if self._update_noise_classification():
+                        self.last_noise_update = current_time
             
             speech_prob = self._check_speech_activity(chunk)
             
             state = self.buffer_manager.update_speech_state(speech_prob > 0.5)
             
+            if state == "speech_started":
+                self.last_interim_samples = 0
+            
             if speech_prob > 0.5:
                 self.buffer_manager.add_to_speech_buffer(chunk)
                 print("🎤", end="", flush=True)
+                self._check_utterance_limits()
             
             if state == "utterance_complete":
                 print()
@@ -109,10 +281,134 @@ class LivePipeline:
         except Exception as e:
             print(f"\n✗ Chunk processing error: {e}")
     
+    def _on_overload_change(self, overload):
+        
+        direction = "↑" if overload.level > self.overload_level else "↓"
+        self.overload_level = overload.level
+        
+        print(f"\n⚠ Load {direction} {overload.name} (pressure {overload.pressure:.2f})", flush=True)
+        
+        self._emit({
+            'type': 'overload',
+            'level': overload.level,
+            'state': overload.name,
+            'pressure': round(overload.pressure, 3)
+        })
+    
+    def _check_utterance_limits(self):
+        
+        sr = self.config.audio.sample_rate
+        buffered = len(self.buffer_manager.speech_buffer)
+        max_samples = int(self.config.buffer.max_utterance_duration * sr)
+        
+        if buffered >= max_samples:
+            segment = self.buffer_manager.split_speech_buffer(
+                max_samples,
+                int(self.config.buffer.split_search_duration * sr),
+                max(1, int(self.config.buffer.split_frame_duration * sr))
+            )
+            self.forced_splits += 1
+            self.forced_splits_total.inc()
+            self.last_interim_samples = 0
+            print()
+            self._process_utterance(segment, forced=True)
+            return
+        
+        interim_samples = int(self.config.buffer.interim_interval * sr)
+        if (interim_samples > 0 and self.buffer_manager.overload.interim_enabled
+                and buffered - self.last_interim_samples >= interim_samples):
+            self._request_interim()
+    
+    def _request_interim(self):
+        """
+        Hands the tail of the open utterance to the interim worker.
+
+        Only the last interim_window seconds are copied and decoded, so each
+        interim costs the same however long the utterance grows. A request
+        the worker has not picked up yet is replaced, never queued: the
+        capture/VAD thread never waits on ASR.
+        """
+        audio = self.buffer_manager.get_complete_utterance(copy=False)
+        if audio is None:
+            return
+        
+        sr = self.config.audio.sample_rate
+        self.last_interim_samples = len(audio)
+        window = int(self.config.buffer.interim_window * sr)
+        tail = audio[-window:] if window > 0 else audio
+        
+        request = {
+            'utterance_id': self.utterance_count + 1,
+            'audio': AudioBuffer.copy_of(tail, sr, site="interim"),
+            'duration_sec': round(len(audio) / sr, 2)
+        }
+        with self.interim_ready:
+            if self.interim_request is not None:
+                self.interims_dropped.inc()
+            self.interim_request = request
+            self.interim_ready.notify()
+    
+    def _interim_worker(self):
+        
+        while True:
+            with self.interim_ready:
+                while self.is_running and self.interim_request is None:
+                    self.interim_ready.wait()
+                if not self.is_running:
+                    return
+                request, self.interim_request = self.interim_request, None
+            self._emit_interim(request)
+    
+    def _emit_interim(self, request: Dict):
+        
+        try:
+            if not self.transcriber_loaded:
+                self._load_transcriber_lazy()
+            if not self.transcriber_loaded:
+                return
+            
+            audio = request['audio']
+            with self.model_lock:
+                result = self.transcriber.transcribe(audio, audio.sr)
+            
+            if request['utterance_id'] != self.utterance_count + 1:
+                self.interims_dropped.inc()
+                return
+            
+            self.interims_total.inc()
+            print(f"\n  … {result['text']}", flush=True)
+            
+            self._emit({
+                'type': 'interim',
+                'utterance_id': request['utterance_id'],
+                'text': result['text'],
+                'duration_sec': request['duration_sec'],
+                'window_sec': round(audio.duration, 2)
+            })
+        except Exception as e:
+            print(f"\n✗ Interim transcription error: {e}")
+    
+    def _start_interim_worker(self):
+        if self.interim_thread is None or not self.interim_thread.is_alive():
+            self.interim_request = None
+            self.interim_thread = threading.Thread(target=self._interim_worker, daemon=True)
+            self.interim_thread.start()
+    
+    def _stop_interim_worker(self):
+        with self.interim_ready:
+            self.interim_request = None
+            self.interim_ready.notify_all()
+        if self.interim_thread is not None:
+            self.interim_thread.join(timeout=5.0)
+            self.interim_thread = None
+    
     def _check_speech_activity(self, chunk: np.ndarray) -> float:
         
         try:
-            timestamps = self.vad.process_audio(chunk, self.config.audio.sample_rate)
+            start = time.perf_counter()
+            with self.model_lock:
+                timestamps = self.vad.process_audio(chunk, self.config.audio.sample_rate)
+            self.vad_latency.observe(time.perf_counter() - start)
             
             if timestamps:
                 total_speech = sum(ts['end_sec'] - ts['start_sec'] for ts in timestamps)
@@ -126,13 +422,22 @@ class LivePipeline:
             print(f"\n✗ VAD error: {e}")
             return 0.0
     
-    def _update_noise_classification(self, audio: np.ndarray):
+    def _push_noise_frames(self, chunk: np.ndarray):
         
         try:
-            result = self.classifier.analyze_background_noise(
-                audio,
-                self.config.audio.sample_rate
-            )
+            start = time.perf_counter()
+            with self.model_lock:
+                self.noise_stream.push(chunk, self.config.audio.sample_rate)
+            self.yamnet_latency.observe(time.perf_counter() - start)
+        except Exception as e:
+            print(f"\n✗ Noise frame error: {e}")
+    
+    def _update_noise_classification(self) -> bool:
+        
+        try:
+            result = self.noise_stream.analyze()
+            if result is None:
+                return False
             
             self.current_noise_type = result['category']
             self.current_noise_confidence = result['top_prediction']['confidence']
@@ -143,6 +448,14 @@ class LivePipeline:
                 'confidence': self.current_noise_confidence
             })
             
+            self._emit({
+                'type': 'noise',
+                'timestamp': round(self.noise_history[-1]['timestamp'], 2),
+                'category': self.current_noise_type,
+                'confidence': round(self.current_noise_confidence, 3),
+                'detail': result['top_prediction']['class']
+            })
+            
             print(f"\n\n{'─'*70}")
             print(f"🔊 BACKGROUND NOISE DETECTED")
             print(f"{'─'*70}")
@@ -151,13 +464,17 @@ class LivePipeline:
             print(f"  Details: {result['top_prediction']['class']}")
             print(f"{'─'*70}\n")
             
+            return True
+            
         except Exception as e:
             print(f"\n✗ Noise classification error: {e}\n")
+            return False
     
-    def _process_utterance(self):
+    def _process_utterance(self, utterance: Optional[np.ndarray] = None, forced: bool = False):
         
         try:
-            utterance = self.buffer_manager.get_complete_utterance()
+            if utterance is None:
+                utterance = self.buffer_manager.get_complete_utterance()
             
             if utterance is None or len(utterance) < self.config.audio.sample_rate * 0.3:
                 return
@@ -170,6 +487,8 @@ class LivePipeline:
             print(f"💬 UTTERANCE #{self.utterance_count}")
             print(f"{'='*70}")
             print(f"  Duration: {duration:.2f}s")
+            if forced:
+                print(f"  Split at max duration ({self.config.buffer.max_utterance_duration:.0f}s)")
             print(f"  Ambient noise: {self.current_noise_type}")
             
             if not self.transcriber_loaded:
@@ -182,40 +501,71 @@ class LivePipeline:
             
             print(f"\n  Transcribing...", end=" ", flush=True)
             
+            decoding_method = self.transcriber.decoding_method
+            if self.buffer_manager.overload.cheap_asr:
+                decoding_method = self.config.asr.cheap_decoding_method
+            
             start_time = time.time()
             
-            result = self.transcriber.transcribe(
-                utterance,
-                self.config.audio.sample_rate
-            )
+            with self.model_lock:
+                result = self.transcriber.transcribe(
+                    utterance,
+                    self.config.audio.sample_rate,
+                    decoding_method=decoding_method
+                )
             
             transcribe_time = time.time() - start_time
             rtf = transcribe_time / duration
             
+            self.utterances_total.inc()
+            self.asr_latency.observe(transcribe_time)
+            self.asr_rtf.observe(rtf)
+            if self.buffer_manager.current_ingest_time:
+                self.utterance_latency.observe(time.time() - self.buffer_manager.current_ingest_time)
+            
             print("✓\n")
             print(f"  📝 Text: {result['text']}")
             print(f"  ⏱  Time: {transcribe_time:.2f}s (RTF: {rtf:.3f}x)")
             print(f"{'='*70}\n")
             
+            self._emit({
+                'type': 'utterance',
+                'utterance_id': self.utterance_count,
+                'text': result['text'],
+                'final': True,
+                'forced_split': forced,
+                'duration_sec': round(duration, 2),
+                'noise': self.current_noise_type,
+                'end_capture_sec': round(self.buffer_manager.current_capture_time, 2),
+                'latency_sec': round(time.time() - self.buffer_manager.current_ingest_time, 3)
+                    if self.buffer_manager.current_ingest_time else None,
+                'transcribe_time_sec': round(transcribe_time, 3),
+                'rtf': round(rtf, 3),
+                'decoding': decoding_method
+            })
+            
         except Exception as e:
             print(f"✗\n  Error: {e}\n")
             import traceback
             traceback.print_exc()
     
-    def start(self, device=None, duration: Optional[float] = None):
+    def start(self, device=None, duration: Optional[float] = None, source=None):
         
         print("="*70)
         print("🎙️  STARTING LIVE RECORDING")
         print("="*70)
         
-        try:
-            devices = BufferManager.get_available_devices()
-            print(f"\nAvailable microphones:")
-            for dev in devices[:5]:
-                marker = " ← SELECTED" if dev['id'] == device else ""
-                print(f"  [{dev['id']}] {dev['name']}{marker}")
-        except Exception as e:
-            print(f"Warning: Could not list devices - {e}")
+        if source is None:
+            try:
+                devices = BufferManager.get_available_devices()
+                print(f"\nAvailable microphones:")
+                for dev in devices[:5]:
+                    marker = " ← SELECTED" if dev['id'] == device else ""
+                    print(f"  [{dev['id']}] {dev['name']}{marker}")
+            except Exception as e:
+                print(f"Warning: Could not list devices - {e}")
+        else:
+            print(f"\nAudio source: {type(source).__name__}")
         
         print(f"\nConfiguration:")
         print(f"  Sample rate: {self.config.audio.sample_rate}Hz")
@@ -227,21 +577,40 @@ class LivePipeline:
         print("="*70)
         if duration:
             print(f"Recording for {duration}s")
+        elif source is not None:
+            print("Running until the source is exhausted")
         else:
             print("Press Ctrl+C to stop")
-        print("Speak into your microphone now!")
+        if source is None:
+            print("Speak into your microphone now!")
         print("="*70 + "\n")
         
         self.is_running = True
         self.session_start = time.time()
         self.utterance_count = 0
         self.total_speech_time = 0.0
+        self.forced_splits = 0
+        if self.config.debug.count_copies:
+            COPIES.begin()
+        self._start_interim_worker()
+        
+        if self.config.models.preload_in_background:
+            self.preload()
+        
+        if self.config.metrics.enabled:
+            try:
+                self.serve_metrics()
+            except OSError as e:
+                print(f"⚠ Metrics endpoint unavailable: {e}")
         
         try:
-            self.buffer_manager.start_recording(device=device)
+            self.buffer_manager.start_recording(device=device, source=source)
             
             if duration:
                 time.sleep(duration)
+            elif source is not None:
+                self.buffer_manager.wait_for_source()
+                self.finish_stream()
             else:
                 while self.is_running:
                     time.sleep(0.1)
@@ -255,6 +624,34 @@ class LivePipeline:
         finally:
             self.stop()
     
+    def start_stream(self):
+        """Starts a session fed through buffer_manager.push_chunk instead of a microphone."""
+        
+        self.is_running = True
+        self.session_start = time.time()
+        self.utterance_count = 0
+        self.total_speech_time = 0.0
+        self.forced_splits = 0
+        if self.config.debug.count_copies:
+            COPIES.begin()
+        self._start_interim_worker()
+        
+        self.buffer_manager.start_processing()
+    
+    def finish_stream(self):
+        """Drains queued audio, finalizes any open utterance and stops the session."""
+        
+        if not self.is_running:
+            return
+        
+        self.buffer_manager.wait_until_drained()
+        
+        if self.buffer_manager.in_speech:
+            self.buffer_manager.update_speech_state(False)
+            self._process_utterance()
+        
+        self.stop()
+    
     def stop(self):
         
         if not self.is_running:
@@ -262,6 +659,11 @@ class LivePipeline:
         
         self.is_running = False
         self.buffer_manager.stop_recording()
+        self._stop_interim_worker()
+        
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
         
         session_duration = time.time() - self.session_start if self.session_start else 0
         
@@ -271,6 +673,8 @@ class LivePipeline:
         print(f"  Total duration: {session_duration:.1f}s")
         print(f"  Utterances: {self.utterance_count}")
         print(f"  Speech time: {self.total_speech_time:.1f}s")
+        if self.forced_splits:
+            print(f"  Forced splits: {self.forced_splits}")
         
         if session_duration > 0:
             print(f"  Speech ratio: {(self.total_speech_time/session_duration)*100:.1f}%")
@@ -288,6 +692,16 @@ class LivePipeline:
         print(f"\n  Audio chunks:")
         print(f"    Received: {stats['chunks_received']}")
         print(f"    Processed: {stats['chunks_processed']}")
+        print(f"    Dropped: {stats['chunks_dropped']} "
+              f"({stats['chunks_dropped_speech']} speech, {stats['chunks_dropped_quiet']} quiet)")
+        if stats['overload_transitions']:
+            print(f"    Shed (quiet, under load): {stats['chunks_shed']}")
+            print(f"    Overload: peaked at {stats['overload_max_level']} "
+                  f"({stats['overload_transitions']} level changes)")
+        print(f"    Max queue latency: {stats['max_queue_latency_sec']:.3f}s")
+        if self.config.debug.count_copies:
+            copies = COPIES.snapshot()
+            print(f"    Audio copies: {copies['copies']} ({copies['bytes'] / 1e6:.1f} MB)")
         
         print("="*70 + "\n")
     
@@ -303,9 +717,13 @@ class LivePipeline:
             'session_duration_sec': time.time() - self.session_start if self.session_start else 0,
             'utterances_captured': self.utterance_count,
             'total_speech_time_sec': self.total_speech_time,
+            'forced_splits': self.forced_splits,
             'noise_history': list(self.noise_history),
+            'model_readiness': self.readiness(),
             'buffer_stats': self.buffer_manager.get_buffer_stats()
         }
+        if self.config.debug.count_copies:
+            session_data['audio_copies'] = COPIES.snapshot()
         
         import json
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -325,6 +743,19 @@ if __name__ == "__main__":
         print(f"\n✗ Initialization failed: {e}")
         sys.exit(1)
     
+    if "--metrics" in sys.argv[1:]:
+        pipeline.config.metrics.enabled = True
+    
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if positional:
+        replay_path = Path(positional[0])
+        realtime = "--fast" not in sys.argv[1:]
+        try:
+            pipeline.start(source=FileReplaySource(replay_path, pipeline.config, realtime=realtime))
+        finally:
+            pipeline.save_session_log()
+        sys.exit(0)
+    
     devices = BufferManager.get_available_devices()
     
     print("\n📱 Select microphone:")
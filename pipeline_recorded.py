@@ -1,28 +1,148 @@
 import numpy as np
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import time
-import json
 from datetime import datetime
 from config import Config
 from audio_utils import AudioUtils
+from audio_buffer import AudioBuffer, COPIES
 from vad_processor import VADProcessor
 from noise_classifier import NoiseClassifier
 from denoiser_preprocessor import DenoiserProcessor
 from transcriber import Transcriber
+from denoise_router import DenoiseRouter
+from intermediate_store import IntermediateStore
+from output_writer import OutputWriter
+from stage_graph import Stage, StageGraph, make_executor
+
+
+NUMBER = (int, float)
+OPTIONAL_TEXT = (str, type(None))
+OPTIONAL_NUMBER = (int, float, type(None))
+
+
+def compute_accuracy(ground_truth: Optional[str], transcription: Dict) -> Dict:
+    print("\n[6/6] Computing metrics...")
+    wer_score = None
+    cer_score = None
+    if ground_truth:
+        wer_score = AudioUtils.calculate_wer(ground_truth, transcription['text'])
+        cer_score = AudioUtils.calculate_cer(ground_truth, transcription['text'])
+        print(f"✓ WER: {wer_score:.4f} ({wer_score*100:.2f}%)")
+        print(f"  CER: {cer_score:.4f} ({cer_score*100:.2f}%)")
+    
+    return {"wer": wer_score, "cer": cer_score}
 
 
 class RecordedPipeline:
+    """
+    File pipeline as a StageGraph: load -> (classify, vad) -> route -> denoise
+    -> (enhancement, asr, save_denoised) -> accuracy -> report -> write.
     
-    def __init__(self, config: Config = None):
+    Each stage is a method with declared inputs and outputs, so it can be
+    reused or replaced on self.graph, and runs on the executor picked by
+    GraphConfig (inline, thread or process pool). Only process_safe stages
+    leave the main process, and today that is just accuracy: the other
+    stages hold models on self, so "process" offloads only the WER/CER
+    computation. process() keeps its original signature and progress events
+    on top of graph.run(). close() (or a with block) shuts the pool down.
+    """
+    
+    def __init__(self, config: Config = None, writer: Optional[OutputWriter] = None):
         self.config = config or Config.default()
+        self.writer = writer or OutputWriter(self.config)
         
         print("Initializing pipeline components...")
         self.vad = VADProcessor(config)
         self.classifier = NoiseClassifier(config)
         self.denoiser = DenoiserProcessor(config)
         self.transcriber = Transcriber(config, language="kn")
+        self.router = DenoiseRouter(config)
         print("✓ All components loaded\n")
+        
+        self.full_denoise_rtf = self.config.denoise.full_rtf_estimate
+        self._prepared = {}
+        
+        self.graph = self._build_graph()
+        self.executor = make_executor(self.config.graph.executor, self.config.graph.max_workers)
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+    
+    def _build_graph(self) -> StageGraph:
+        return StageGraph(
+            [
+                Stage("load", self._load,
+                      {"audio_path": Path, "audio_in": (np.ndarray, type(None))},
+                      {"audio": np.ndarray, "sr": int, "duration": NUMBER},
+                      progress=(0, "LOAD")),
+                Stage("classify", self._classify,
+                      {"audio": np.ndarray, "sr": int, "duration": NUMBER},
+                      {"noise_result": dict},
+                      progress=(1, "NOISE")),
+                Stage("vad", self._detect_speech,
+                      {"audio": np.ndarray, "sr": int, "duration": NUMBER},
+                      {"timestamps": list, "speech_ratio": NUMBER, "noise_only": np.ndarray, "snr_original": NUMBER},
+                      progress=(2, "VAD")),
+                Stage("route", self._route,
+                      {"duration": NUMBER, "timestamps": list, "snr_original": NUMBER,
+                       "noise_only": np.ndarray, "noise_result": dict},
+                      {"routing": dict}),
+                Stage("denoise", self._denoise,
+                      {"audio": np.ndarray, "sr": int, "timestamps": list,
+                       "noise_only": np.ndarray, "routing": dict},
+                      {"denoised": np.ndarray, "denoised_fraction": NUMBER, "denoise_time": NUMBER}),
+                Stage("enhancement", self._measure_enhancement,
+                      {"denoised": np.ndarray, "timestamps": list, "noise_only": np.ndarray,
+                       "snr_original": NUMBER, "routing": dict, "duration": NUMBER,
+                       "denoised_fraction": NUMBER, "denoise_time": NUMBER},
+                      {"snr_cleaned": NUMBER, "snr_improvement": NUMBER},
+                      progress=(3, "DENOISE")),
+                Stage("save_denoised", self._save_denoised,
+                      {"audio_path": Path, "output_dir": Path, "save_intermediate": bool, "save_audio": bool,
+                       "audio": np.ndarray, "denoised": np.ndarray, "sr": int, "timestamps": list,
+                       "noise_result": dict, "routing": dict, "snr_original": NUMBER, "denoise_time": NUMBER},
+                      {"audio_files": list}),
+                Stage("asr", self._transcribe,
+                      {"denoised": np.ndarray, "sr": int, "routing": dict},
+                      {"transcription": dict, "transcribe_time": NUMBER},
+                      progress=(4, "ASR")),
+                Stage("accuracy", compute_accuracy,
+                      {"ground_truth": OPTIONAL_TEXT, "transcription": dict},
+                      {"wer": OPTIONAL_NUMBER, "cer": OPTIONAL_NUMBER},
+                      process_safe=True),
+                Stage("report", self._report,
+                      {"audio_path": Path, "output_dir": Path, "pipeline_start": float, "stage_times": dict,
+                       "ground_truth": OPTIONAL_TEXT, "sr": int, "duration": NUMBER,
+                       "noise_result": dict, "timestamps": list, "speech_ratio": NUMBER, "routing": dict,
+                       "snr_original": NUMBER, "snr_cleaned": NUMBER, "snr_improvement": NUMBER,
+                       "denoised_fraction": NUMBER, "denoise_time": NUMBER,
+                       "transcription": dict, "transcribe_time": NUMBER,
+                       "wer": OPTIONAL_NUMBER, "cer": OPTIONAL_NUMBER},
+                      {"results": dict}),
+                Stage("write", self._write_reports,
+                      {"results": dict, "audio_path": Path, "output_dir": Path, "audio_files": list,
+                       "ground_truth": OPTIONAL_TEXT, "wer": OPTIONAL_NUMBER, "cer": OPTIONAL_NUMBER},
+                      {"written": list})
+            ],
+            inputs={
+                "audio_path": Path,
+                "audio_in": (np.ndarray, type(None)),
+                "ground_truth": OPTIONAL_TEXT,
+                "output_dir": Path,
+                "save_intermediate": bool,
+                "save_audio": bool,
+                "pipeline_start": float,
+                "stage_times": dict
+            }
+        )
     
     def process(
         self,
@@ -30,8 +150,104 @@ class RecordedPipeline:
         output_dir: Optional[Path] = None,
         ground_truth: Optional[str] = None,
         save_intermediate: bool = False,
-        yield_progress: bool = False
+        yield_progress: bool = False,
+        audio: Optional[np.ndarray] = None,
+        save_audio: bool = True
     ):
+        """
+        Runs the full pipeline on one input. audio, when given, is the
+        already-decoded 16 kHz signal and audio_path only names it (nothing
+        is read from disk); save_audio=False skips final_denoised.wav.
+        """
+        
+        steps = self._process_steps(audio_path, output_dir, ground_truth, save_intermediate, audio, save_audio)
+        if yield_progress:
+            return steps
+        
+        results = None
+        for update in steps:
+            results = update.get("results", results)
+        return results
+    
+    def prepare_batch(self, audio_paths: List[Path]):
+        """
+        Runs load, noise classification, VAD and routing for every file, then
+        denoises all files routed to full Demucs together through
+        DenoiserProcessor.denoise_batch. A later process() call for one of
+        these files picks the prepared results up instead of recomputing
+        them. Everything stays in memory until processed, so this is meant
+        for corpora of short clips.
+        """
+        
+        prepared = {}
+        for audio_path in audio_paths:
+            audio_path = Path(audio_path)
+            start = time.time()
+            context = self._drain(self.graph.run(
+                self._context(audio_path, None, None, Path("."), False, False, start),
+                self.executor,
+                targets=["routing"]
+            ))
+            analysis = {key: value for key, value in context.items() if key in self.graph.producers}
+            analysis['stage_times'] = context['stage_times']
+            analysis['elapsed'] = time.time() - start
+            prepared[audio_path.resolve()] = analysis
+        
+        full = [
+            a for a in prepared.values()
+            if a['routing']['route'] == DenoiseRouter.FULL and self.config.denoise.mode == "full"
+        ]
+        by_variant = {}
+        for analysis in full:
+            by_variant.setdefault(analysis['routing']['variant'], []).append(analysis)
+        
+        for variant, group in by_variant.items():
+            print(f"\nBatch-denoising {len(group)} file(s) with {variant}...")
+            start = time.time()
+            denoised = self.denoiser.denoise_batch([a['audio'] for a in group], 16000, variant=variant)
+            batch_time = time.time() - start
+            total_duration = sum(a['duration'] for a in group) or 1.0
+            for analysis, output in zip(group, denoised):
+                analysis['denoised'] = output
+                analysis['denoised_fraction'] = 1.0
+                analysis['denoise_time'] = batch_time * analysis['duration'] / total_duration
+                analysis['batch_files'] = len(group)
+            print(f"✓ Batch denoising complete ({batch_time:.2f}s)")
+        
+        self._prepared.update(prepared)
+    
+    @staticmethod
+    def _drain(steps):
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+    
+    @staticmethod
+    def _context(audio_path, audio, ground_truth, output_dir, save_intermediate, save_audio, pipeline_start) -> Dict:
+        return {
+            "audio_path": Path(audio_path),
+            "audio_in": audio,
+            "ground_truth": ground_truth,
+            "output_dir": Path(output_dir),
+            "save_intermediate": bool(save_intermediate),
+            "save_audio": bool(save_audio),
+            "pipeline_start": float(pipeline_start),
+            "stage_times": {}
+        }
+    
+    def _process_steps(
+        self,
+        audio_path: Path,
+        output_dir: Optional[Path],
+        ground_truth: Optional[str],
+        save_intermediate: bool,
+        audio: Optional[np.ndarray] = None,
+        save_audio: bool = True
+    ):
+        
+        audio_path = Path(audio_path)
         
         if output_dir is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -48,27 +264,64 @@ class RecordedPipeline:
         print("="*70 + "\n")
         
         pipeline_start = time.time()
+        if self.config.debug.count_copies:
+            COPIES.begin()
+        
+        prepared = self._prepared.pop(audio_path.resolve(), None)
+        if prepared is not None:
+            pipeline_start -= prepared.pop('elapsed') + prepared.get('denoise_time', 0.0)
+            print("[1-3/6] Using batch-prepared load, noise and VAD results")
+            batch_files = prepared.pop('batch_files', None)
+            if batch_files:
+                print(f"[4/6] Using batch-denoised audio (route: {prepared['routing']['route'].upper()}, "
+                      f"batched with {batch_files} file(s))")
         
+        context = self._context(audio_path, audio, ground_truth, output_dir,
+                                save_intermediate, save_audio, pipeline_start)
+        context.update(prepared or {})
+        
+        run = self.graph.run(context, self.executor)
+        while True:
+            try:
+                event = next(run)
+            except StopIteration as done:
+                context = done.value
+                break
+            yield {"step": event["step"], "status": event["status"], "elapsed": time.time() - pipeline_start}
+        
+        yield {"step": 5, "status": "COMPLETE", "results": context["results"], "elapsed": time.time() - pipeline_start}
+    
+    def _load(self, audio_path: Path, audio_in: Optional[np.ndarray]) -> Dict:
         print("[1/6] Loading audio...")
-        audio, sr = AudioUtils.load_audio(audio_path, sr=16000)
+        if audio_in is None:
+            audio, sr = AudioUtils.load_audio(audio_path, sr=16000)
+        else:
+            audio, sr = AudioBuffer.wrap(audio_in, 16000, site="pipeline.input"), 16000
         duration = len(audio) / sr
         print(f"✓ Loaded: {duration:.1f}s @ {sr}Hz")
-        if yield_progress:
-            yield {"step": 0, "status": "LOAD", "elapsed": time.time() - pipeline_start}
-        
-        if save_intermediate:
-            AudioUtils.save_audio(output_dir / "01_original.wav", audio, sr)
         
+        return {"audio": audio, "sr": int(sr), "duration": duration}
+    
+    def _classify(self, audio: np.ndarray, sr: int, duration: float) -> Dict:
         print("\n[2/6] Classifying background noise...")
-        noise_result = self.classifier.analyze_background_noise(audio, sr)
+        if duration >= self.config.denoise.min_duration:
+            noise_result = self.classifier.analyze_background_noise(audio, sr)
+        else:
+            noise_result = {
+                'category': "unknown",
+                'top_prediction': {'class': "none", 'confidence': 0.0},
+                'all_non_speech': [],
+                'timeline': []
+            }
         print(f"✓ Detected noise type: {noise_result['category'].upper()}")
         print(f"  Confidence: {noise_result['top_prediction']['confidence']:.3f}")
         print(f"  Top prediction: {noise_result['top_prediction']['class']}")
-        if yield_progress:
-            yield {"step": 1, "status": "NOISE", "elapsed": time.time() - pipeline_start}
         
+        return {"noise_result": noise_result}
+    
+    def _detect_speech(self, audio: np.ndarray, sr: int, duration: float) -> Dict:
         print("\n[3/6] Running Voice Activity Detection...")
-        timestamps = self.vad.process_audio(audio, sr)
+        timestamps = self.vad.process_audio(audio, sr) if duration >= self.config.denoise.min_duration else []
         print(f"✓ Found {len(timestamps)} speech segments")
         
         speech_segments = self.vad.extract_speech_segments(audio, timestamps)
@@ -79,32 +332,69 @@ class RecordedPipeline:
         
         if speech_segments:
             speech_only = np.concatenate(speech_segments)
-            if save_intermediate:
-                AudioUtils.save_audio(output_dir / "02_speech_only.wav", speech_only, sr)
         else:
             speech_only = np.array([])
         
         if silence_segments:
             noise_only = np.concatenate(silence_segments)
-            if save_intermediate:
-                AudioUtils.save_audio(output_dir / "03_noise_only.wav", noise_only, sr)
             snr_original = AudioUtils.calculate_snr(speech_only, noise_only)
         else:
             noise_only = np.array([])
             snr_original = float('inf')
         
         print(f"  Original SNR: {snr_original:.2f} dB")
-        if yield_progress:
-            yield {"step": 2, "status": "VAD", "elapsed": time.time() - pipeline_start}
         
-        print("\n[4/6] Denoising audio...")
+        return {
+            "timestamps": list(timestamps),
+            "speech_ratio": float(speech_ratio),
+            "noise_only": noise_only,
+            "snr_original": float(snr_original)
+        }
+    
+    def _route(self, duration, timestamps, snr_original, noise_only, noise_result) -> Dict:
+        routing = self.router.route(
+            duration, timestamps, snr_original, len(noise_only) > 0, noise_result['category']
+        )
+        return {"routing": routing}
+    
+    @staticmethod
+    def _variant(routing: Dict) -> Optional[str]:
+        return routing.get('variant') if routing['route'] == DenoiseRouter.FULL else None
+    
+    def _denoise(self, audio, sr, timestamps, noise_only, routing) -> Dict:
+        route = routing['route']
+        variant = self._variant(routing)
+        
+        print(f"\n[4/6] Denoising audio (route: {route.upper()})...")
+        print(f"  Reason: {routing['reason']}")
+        if variant:
+            print(f"  Model: {variant}")
         denoise_start = time.time()
-        denoised = self.denoiser.denoise(audio, sr)
+        denoised_fraction = 0.0
+        if route == DenoiseRouter.FULL and self.config.denoise.mode == "speech_only":
+            denoised = self.denoiser.denoise_regions(audio, timestamps, sr, variant=variant)
+            denoised_fraction = self.denoiser.last_region_stats['denoised_fraction']
+            print(f"  Speech regions: {self.denoiser.last_region_stats['regions']} "
+                  f"({denoised_fraction:.1%} of audio)")
+        elif route == DenoiseRouter.FULL:
+            denoised = self.denoiser.denoise(audio, sr, variant=variant)
+            denoised_fraction = 1.0
+        elif route == DenoiseRouter.LIGHT:
+            denoised = self.denoiser.denoise_light(audio, noise_only, sr)
+        else:
+            denoised = audio
         denoise_time = time.time() - denoise_start
         print(f"✓ Denoising complete ({denoise_time:.2f}s)")
         
-        if save_intermediate:
-            AudioUtils.save_audio(output_dir / "04_denoised.wav", denoised, sr)
+        return {"denoised": denoised, "denoised_fraction": float(denoised_fraction), "denoise_time": denoise_time}
+    
+    def _measure_enhancement(
+        self, denoised, timestamps, noise_only, snr_original, routing, duration, denoised_fraction, denoise_time
+    ) -> Dict:
+        if (routing['route'] == DenoiseRouter.FULL and self._variant(routing) == self.denoiser.default_variant
+                and denoised_fraction > 0 and duration > 0):
+            measured_rtf = denoise_time / (duration * denoised_fraction)
+            self.full_denoise_rtf = 0.5 * self.full_denoise_rtf + 0.5 * measured_rtf
         
         denoised_speech = self.vad.extract_speech_segments(denoised, timestamps)
         if denoised_speech:
@@ -121,33 +411,75 @@ class RecordedPipeline:
         
         print(f"  Cleaned SNR: {snr_cleaned:.2f} dB")
         print(f"  Improvement: +{snr_improvement:.2f} dB")
-        if yield_progress:
-            yield {"step": 3, "status": "DENOISE", "elapsed": time.time() - pipeline_start}
         
-        AudioUtils.save_audio(output_dir / "final_denoised.wav", denoised, sr)
+        return {"snr_cleaned": float(snr_cleaned), "snr_improvement": float(snr_improvement)}
+    
+    def _save_denoised(
+        self, audio_path, output_dir, save_intermediate, save_audio,
+        audio, denoised, sr, timestamps, noise_result, routing, snr_original, denoise_time
+    ) -> Dict:
+        files = []
+        if save_intermediate:
+            self.writer.submit(
+                IntermediateStore.write,
+                output_dir,
+                {"original": audio, "denoised": denoised},
+                sr,
+                timestamps,
+                metadata={
+                    "input_file": str(audio_path),
+                    "noise_category": noise_result['category'],
+                    "route": routing['route'],
+                    "variant": self._variant(routing),
+                    "snr_original_db": snr_original if np.isfinite(snr_original) else None,
+                    "denoise_time_sec": round(denoise_time, 3)
+                },
+                nbytes=audio.nbytes + denoised.nbytes,
+                label=str(output_dir / IntermediateStore.DATA_FILE)
+            )
+            files.append(f"{IntermediateStore.DATA_FILE} + {IntermediateStore.INDEX_FILE}")
         
+        if save_audio:
+            self.writer.write_audio(output_dir / "final_denoised.wav", denoised, sr)
+            files.insert(0, "final_denoised.wav")
+        
+        return {"audio_files": files}
+    
+    def _transcribe(self, denoised, sr, routing) -> Dict:
         print("\n[5/6] Transcribing speech...")
         transcribe_start = time.time()
-        transcription_result = self.transcriber.transcribe(denoised, sr)
+        if routing['route'] == DenoiseRouter.EMPTY:
+            transcription_result = {
+                "text": "",
+                "language": self.transcriber.language,
+                "model": self.transcriber.model_name
+            }
+            print("✓ Skipped (no speech)")
+        else:
+            transcription_result = self.transcriber.transcribe(denoised, sr)
         transcribe_time = time.time() - transcribe_start
         print(f"✓ Transcription complete ({transcribe_time:.2f}s)")
         print(f"  Language: {transcription_result['language']}")
         print(f"  Text preview: {transcription_result['text'][:100]}...")
-        if yield_progress:
-            yield {"step": 4, "status": "ASR", "elapsed": time.time() - pipeline_start}
         
-        print("\n[6/6] Computing metrics...")
-        wer_score = None
-        cer_score = None
-        if ground_truth:
-            wer_score = AudioUtils.calculate_wer(ground_truth, transcription_result['text'])
-            cer_score = AudioUtils.calculate_cer(ground_truth, transcription_result['text'])
-            print(f"✓ WER: {wer_score:.4f} ({wer_score*100:.2f}%)")
-            print(f"  CER: {cer_score:.4f} ({cer_score*100:.2f}%)")
+        return {"transcription": transcription_result, "transcribe_time": transcribe_time}
+    
+    def _report(
+        self, audio_path, output_dir, pipeline_start, stage_times, ground_truth, sr, duration,
+        noise_result, timestamps, speech_ratio, routing, snr_original, snr_cleaned, snr_improvement,
+        denoised_fraction, denoise_time, transcription, transcribe_time, wer, cer
+    ) -> Dict:
+        route = routing['route']
         
         total_time = time.time() - pipeline_start
         rtf = AudioUtils.calculate_rtf(total_time, duration)
         
+        compute_saved = 0.0
+        if route != DenoiseRouter.FULL or denoised_fraction < 1.0:
+            compute_saved += max(0.0, self.full_denoise_rtf * duration - denoise_time)
+        if route == DenoiseRouter.EMPTY:
+            compute_saved += self.config.denoise.asr_rtf_estimate * duration
+        
         print(f"\n✓ Total processing time: {total_time:.2f}s")
         print(f"  Real-time factor: {rtf:.3f}x")
         
@@ -166,78 +498,119 @@ class RecordedPipeline:
                 "all_predictions": [
                     {"class": p['class'], "confidence": round(p['confidence'], 3)}
                     for p in noise_result['all_non_speech'][:3]
-                ]
+                ],
+                "timeline": noise_result['timeline']
             },
             "vad_analysis": {
                 "speech_segments": len(timestamps),
                 "speech_ratio": round(speech_ratio, 3),
                 "timestamps": timestamps
             },
+            "routing": {
+                "route": route,
+                "reason": routing['reason'],
+                "target_snr_db": routing['target_snr_db'],
+                "denoise_skipped": route in (DenoiseRouter.SKIP, DenoiseRouter.EMPTY),
+                "asr_skipped": route == DenoiseRouter.EMPTY,
+                "denoise_mode": self.config.denoise.mode if route == DenoiseRouter.FULL else route,
+                "denoise_variant": self._variant(routing),
+                "denoised_fraction": round(denoised_fraction, 3),
+                "estimated_compute_saved_sec": round(compute_saved, 2)
+            },
             "audio_quality": {
                 "snr_original_db": round(snr_original, 2) if snr_original != float('inf') else None,
                 "snr_cleaned_db": round(snr_cleaned, 2) if snr_cleaned != float('inf') else None,
                 "snr_improvement_db": round(snr_improvement, 2)
             },
             "transcription": {
-                "text": transcription_result['text'],
-                "language": transcription_result['language'],
-                "model": transcription_result['model']
-            },
-            "accuracy": {
-                "wer": round(wer_score, 4) if wer_score else None,
-                "cer": round(cer_score, 4) if cer_score else None,
-                "ground_truth": ground_truth
+                "text": transcription['text'],
+                "language": transcription['language'],
+                "model": transcription['model'],
+                "segments": transcription.get('segments')
             },
+            "accuracy": self.accuracy_section(wer, cer, ground_truth),
             "performance": {
                 "total_time_sec": round(total_time, 2),
                 "denoise_time_sec": round(denoise_time, 2),
+                "denoise_variant_rtf": self.denoiser.variant_rtf(),
                 "transcribe_time_sec": round(transcribe_time, 2),
+                "stage_times_sec": dict(stage_times),
                 "rtf": round(rtf, 3)
             }
         }
+        if self.config.debug.count_copies:
+            results["performance"]["audio_copies"] = COPIES.snapshot()
         
-        with open(output_dir / "results.json", 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
-        
-        with open(output_dir / "transcription.txt", 'w', encoding='utf-8') as f:
-            f.write(f"KANNADA SPEECH TRANSCRIPTION\n")
-            f.write("=" * 70 + "\n\n")
-            f.write(f"File: {audio_path.name}\n")
-            f.write(f"Duration: {duration:.1f}s\n")
-            f.write(f"Language: {transcription_result['language']}\n")
-            f.write(f"Model: {transcription_result['model']}\n\n")
-            f.write("=" * 70 + "\n")
-            f.write("TRANSCRIPTION\n")
-            f.write("=" * 70 + "\n\n")
-            f.write(transcription_result['text'])
-            f.write("\n\n")
-            if ground_truth:
-                f.write("=" * 70 + "\n")
-                f.write("GROUND TRUTH\n")
-                f.write("=" * 70 + "\n\n")
-                f.write(ground_truth)
-                f.write("\n\n")
-                f.write(f"WER: {wer_score:.4f} ({wer_score*100:.2f}%)\n")
-                f.write(f"CER: {cer_score:.4f} ({cer_score*100:.2f}%)\n")
+        return {"results": results}
+    
+    @staticmethod
+    def accuracy_section(wer: Optional[float], cer: Optional[float], ground_truth: Optional[str]) -> Dict:
+        # A perfect transcript scores 0.0, which must not read as "not measured".
+        return {
+            "wer": round(wer, 4) if wer is not None else None,
+            "cer": round(cer, 4) if cer is not None else None,
+            "ground_truth": ground_truth
+        }
+    
+    def _write_reports(self, results, audio_path, output_dir, audio_files, ground_truth, wer, cer) -> Dict:
+        self.writer.write_json(output_dir / "results.json", results)
+        
+        transcription = results['transcription']
+        lines = [
+            "KANNADA SPEECH TRANSCRIPTION",
+            "=" * 70,
+            "",
+            f"File: {audio_path.name}",
+            f"Duration: {results['metadata']['audio_duration_sec']:.1f}s",
+            f"Language: {transcription['language']}",
+            f"Model: {transcription['model']}",
+            "",
+            "=" * 70,
+            "TRANSCRIPTION",
+            "=" * 70,
+            "",
+            transcription['text'],
+            ""
+        ]
+        if ground_truth:
+            lines += [
+                "=" * 70,
+                "GROUND TRUTH",
+                "=" * 70,
+                "",
+                ground_truth,
+                "",
+                f"WER: {wer:.4f} ({wer*100:.2f}%)",
+                f"CER: {cer:.4f} ({cer*100:.2f}%)"
+            ]
+        self.writer.write_text(output_dir / "transcription.txt", "\n".join(lines) + "\n")
+        
+        audio_first = 1 if audio_files[:1] == ["final_denoised.wav"] else 0
+        written = audio_files[:audio_first] + ["transcription.txt", "results.json"] + audio_files[audio_first:]
         
         print("\n" + "="*70)
         print("PIPELINE COMPLETE")
         print("="*70)
         print(f"✓ Results saved to: {output_dir}/")
-        print(f"  - final_denoised.wav")
-        print(f"  - transcription.txt")
-        print(f"  - results.json")
-        if save_intermediate:
-            print(f"  - intermediate files (01-04)")
+        for name in written:
+            print(f"  - {name}")
         print("="*70 + "\n")
         
-        if yield_progress:
-            yield {"step": 5, "status": "COMPLETE", "results": results, "elapsed": time.time() - pipeline_start}
-        else:
-            return results
-
+        return {"written": written}
 
 if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) > 1:
+        audio_paths = [Path(arg) for arg in sys.argv[1:]]
+        with RecordedPipeline() as pipeline:
+            pipeline.prepare_batch(audio_paths)
+            for audio_path in audio_paths:
+                pipeline.process(audio_path, output_dir=pipeline.config.paths.output_dir / audio_path.stem)
+            pipeline.writer.flush()
+        print(f"\n✓ Processed {len(audio_paths)} file(s) into {pipeline.config.paths.output_dir}/")
+        sys.exit(0)
+    
     print("Testing RecordedPipeline...")
     print("=" * 70)
     
@@ -246,14 +619,13 @@ if __name__ == "__main__":
         print("✗ Test audio file not found: Nikhil_Indoor.mp3")
         exit(1)
     
-    pipeline = RecordedPipeline()
-    
-    results = pipeline.process(
-        audio_path=test_audio_path,
-        output_dir=Path("output/pipeline_test"),
-        ground_truth=None,
-        save_intermediate=True
-    )
+    with RecordedPipeline() as pipeline:
+        results = pipeline.process(
+            audio_path=test_audio_path,
+            output_dir=Path("output/pipeline_test"),
+            ground_truth=None,
+            save_intermediate=True
+        )
     
     print("\n✓ Pipeline test complete!")
     print(f"✓ Check output/pipeline_test/ for results")
\ No newline at end of file
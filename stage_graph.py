@@ -0,0 +1,248 @@
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+TypeSpec = Union[type, Tuple[type, ...]]
+
+
+class Stage:
+    """
+    One step of a StageGraph.
+
+    fn is called with the declared inputs as keyword arguments and returns a
+    dict holding exactly the declared outputs. Types are checked on the
+    outputs, so a stage that is swapped out or reordered fails at its own
+    boundary instead of somewhere downstream. progress=(step, status) makes
+    the graph emit a progress event when the stage is done (or skipped).
+    process_safe marks stages whose fn and values can be pickled; only those
+    are sent to a process pool, everything else runs in the caller.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Dict],
+        inputs: Dict[str, TypeSpec],
+        outputs: Dict[str, TypeSpec],
+        progress: Optional[Tuple[int, str]] = None,
+        process_safe: bool = False
+    ):
+        self.name = name
+        self.fn = fn
+        self.inputs = dict(inputs)
+        self.outputs = dict(outputs)
+        self.progress = progress
+        self.process_safe = process_safe
+
+    def __repr__(self):
+        return f"Stage({self.name}: {sorted(self.inputs)} -> {sorted(self.outputs)})"
+
+
+class InlineExecutor(Executor):
+    """Runs every submission immediately in the calling thread."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def make_executor(kind: str = "inline", max_workers: int = 2) -> Executor:
+    if kind == "inline":
+        return InlineExecutor()
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    raise ValueError(f"Unknown executor: {kind}")
+
+
+def _timed_call(fn: Callable, kwargs: Dict) -> Tuple[Dict, float]:
+    start = time.perf_counter()
+    outputs = fn(**kwargs)
+    return outputs, time.perf_counter() - start
+
+
+class StageGraph:
+    """
+    Stages wired together by the names of their inputs and outputs.
+
+    Every input must be a graph input or the output of exactly one stage.
+    Stages are grouped into waves by dependency depth; a wave's stages are
+    submitted together, so with a pool executor independent stages (e.g.
+    noise classification and VAD) overlap. run() skips a stage whose
+    outputs are all already present in the context, which is how callers
+    resume from precomputed results. Wall time per stage is recorded in
+    the returned context under "stage_times".
+    """
+
+    def __init__(self, stages: Sequence[Stage], inputs: Dict[str, TypeSpec]):
+        self.stages = list(stages)
+        self.inputs = dict(inputs)
+
+        self.producers: Dict[str, Stage] = {}
+        for stage in self.stages:
+            for key in stage.outputs:
+                if key in self.producers or key in self.inputs:
+                    raise ValueError(f"'{key}' is produced twice (stage {stage.name})")
+                self.producers[key] = stage
+
+        depth: Dict[str, int] = {}
+        for stage in self.stages:
+            self._depth(stage, depth, ())
+
+        self.waves: List[List[Stage]] = []
+        for stage in self.stages:
+            while len(self.waves) <= depth[stage.name]:
+                self.waves.append([])
+            self.waves[depth[stage.name]].append(stage)
+
+    def _depth(self, stage: Stage, depth: Dict[str, int], path: Tuple[str, ...]) -> int:
+        if stage.name in depth:
+            return depth[stage.name]
+        if stage.name in path:
+            raise ValueError(f"Cycle through stages: {' -> '.join(path + (stage.name,))}")
+
+        level = 0
+        for key in stage.inputs:
+            if key in self.inputs:
+                continue
+            if key not in self.producers:
+                raise ValueError(f"Stage {stage.name} needs '{key}', which nothing provides")
+            level = max(level, self._depth(self.producers[key], depth, path + (stage.name,)) + 1)
+
+        depth[stage.name] = level
+        return level
+
+    def required_stages(self, targets: Iterable[str]) -> List[Stage]:
+        """Stages needed to produce targets, in graph order."""
+        needed = set()
+        pending = list(targets)
+        while pending:
+            key = pending.pop()
+            stage = self.producers.get(key)
+            if stage is None or stage.name in needed:
+                continue
+            needed.add(stage.name)
+            pending.extend(stage.inputs)
+        return [stage for stage in self.stages if stage.name in needed]
+
+    @staticmethod
+    def _check(stage: Stage, outputs: Dict):
+        if not isinstance(outputs, dict) or set(outputs) != set(stage.outputs):
+            got = sorted(outputs) if isinstance(outputs, dict) else type(outputs).__name__
+            raise TypeError(f"Stage {stage.name} returned {got}, expected {sorted(stage.outputs)}")
+        for key, expected in stage.outputs.items():
+            if not isinstance(outputs[key], expected):
+                raise TypeError(
+                    f"Stage {stage.name} output '{key}' is {type(outputs[key]).__name__}, expected {expected}"
+                )
+
+    def run(
+        self,
+        context: Dict,
+        executor: Optional[Executor] = None,
+        targets: Optional[Iterable[str]] = None
+    ):
+        """
+        Generator over progress events ({"stage", "step", "status",
+        "outputs"}); its return value is the final context.
+        """
+        ctx = dict(context)
+        missing = [key for key in self.inputs if key not in ctx]
+        if missing:
+            raise KeyError(f"Missing graph inputs: {missing}")
+
+        executor = executor or InlineExecutor()
+        in_process = isinstance(executor, ProcessPoolExecutor)
+        selected = {s.name for s in (self.required_stages(targets) if targets is not None else self.stages)}
+        stage_times = ctx.setdefault("stage_times", {})
+
+        for wave in self.waves:
+            pending = [s for s in wave if s.name in selected and not all(key in ctx for key in s.outputs)]
+            pooled = [] if isinstance(executor, InlineExecutor) else [
+                s for s in pending if s.process_safe or not in_process
+            ]
+            # Pool stages start first; the rest run in wave order while they do,
+            # so progress for inline stages is reported as each one finishes.
+            futures = {s.name: executor.submit(_timed_call, s.fn, {k: ctx[k] for k in s.inputs}) for s in pooled}
+
+            for stage in wave:
+                if stage.name not in selected:
+                    continue
+
+                outputs = {}
+                if stage in pending:
+                    if stage.name in futures:
+                        outputs, elapsed = futures[stage.name].result()
+                    else:
+                        outputs, elapsed = _timed_call(stage.fn, {k: ctx[k] for k in stage.inputs})
+                    self._check(stage, outputs)
+                    ctx.update(outputs)
+                    stage_times[stage.name] = round(elapsed, 4)
+
+                if stage.progress:
+                    step, status = stage.progress
+                    yield {"stage": stage.name, "step": step, "status": status, "outputs": outputs}
+
+        return ctx
+
+
+if __name__ == "__main__":
+    print("Testing StageGraph...")
+
+    def slow(value):
+        def fn(x):
+            time.sleep(0.2)
+            return {value: x + 1}
+        return fn
+
+    stages = [
+        Stage("a", slow("a"), {"x": int}, {"a": int}, progress=(0, "A")),
+        Stage("b", slow("b"), {"x": int}, {"b": int}, progress=(1, "B")),
+        Stage("sum", lambda a, b: {"total": a + b}, {"a": int, "b": int}, {"total": int}, progress=(2, "SUM"))
+    ]
+    graph = StageGraph(stages, inputs={"x": int})
+    assert [[s.name for s in wave] for wave in graph.waves] == [["a", "b"], ["sum"]]
+
+    def drain(run):
+        events = []
+        while True:
+            try:
+                events.append(next(run))
+            except StopIteration as done:
+                return events, done.value
+
+    events, ctx = drain(graph.run({"x": 1}))
+    assert ctx["total"] == 4 and [e["step"] for e in events] == [0, 1, 2]
+    assert set(ctx["stage_times"]) == {"a", "b", "sum"}
+    print("✓ Inline run, progress order and stage timings")
+
+    with make_executor("thread", 2) as pool:
+        start = time.perf_counter()
+        _, ctx = drain(graph.run({"x": 1}, pool))
+        assert ctx["total"] == 4 and time.perf_counter() - start < 0.35
+    print("✓ Independent stages overlap on a thread pool")
+
+    _, ctx = drain(graph.run({"x": 1, "a": 10}))
+    assert ctx["total"] == 12 and "a" not in ctx["stage_times"]
+    _, ctx = drain(graph.run({"x": 1}, targets=["a"]))
+    assert "b" not in ctx
+    print("✓ Precomputed outputs and targets skip stages")
+
+    try:
+        StageGraph([Stage("bad", lambda y: {"z": y}, {"y": int}, {"z": int})], inputs={})
+        raise AssertionError("expected missing input error")
+    except ValueError:
+        pass
+    try:
+        drain(StageGraph([Stage("s", lambda x: {"y": "1"}, {"x": int}, {"y": int})], {"x": int}).run({"x": 1}))
+        raise AssertionError("expected type error")
+    except TypeError:
+        pass
+    print("✓ Wiring and output types validated")
+
+    print("\n✓ StageGraph working correctly")
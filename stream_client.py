@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Optional
+import sys
+
+from config import Config
+from audio_utils import AudioUtils
+
+
+class StreamClient:
+    """Local test client for StreamServer: streams a file and collects the JSON events."""
+
+    def __init__(self, config: Config = None):
+        self.config = config or Config.default()
+
+    def _encode_pcm(self, audio: np.ndarray) -> bytes:
+        pcm = np.clip(audio, -1.0, 1.0) * 32767.0
+        return pcm.astype('<i2').tobytes()
+
+    async def _receive_events(self, reader: asyncio.StreamReader, events: List[Dict], start: float):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            event = json.loads(line.decode('utf-8'))
+            event['received_after_sec'] = round(time.time() - start, 2)
+            events.append(event)
+
+            if event['type'] == 'noise':
+                print(f"🔊 Noise: {event['category']} ({event['confidence']:.3f})")
+            elif event['type'] == 'utterance':
+                print(f"💬 #{event['utterance_id']}: {event['text']}")
+            elif event['type'] == 'overload':
+                print(f"⚠ Server load: {event['state']}")
+            elif event['type'] == 'error':
+                print(f"✗ Server error: {event['message']}")
+
+    async def stream_audio(
+        self,
+        audio: np.ndarray,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        realtime: bool = True
+    ) -> List[Dict]:
+        host = host or self.config.server.host
+        port = port or self.config.server.port
+
+        reader, writer = await asyncio.open_connection(host, port)
+
+        events = []
+        start = time.time()
+        receiver = asyncio.create_task(self._receive_events(reader, events, start))
+
+        chunk_samples = self.config.audio.chunk_samples
+        chunk_duration = chunk_samples / self.config.audio.sample_rate
+
+        for i in range(0, len(audio), chunk_samples):
+            writer.write(self._encode_pcm(audio[i:i + chunk_samples]))
+            await writer.drain()
+            if realtime:
+                await asyncio.sleep(chunk_duration)
+
+        writer.write_eof()
+        await receiver
+
+        writer.close()
+        await writer.wait_closed()
+
+        return events
+
+    def stream_file(
+        self,
+        audio_path: Path,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        realtime: bool = True
+    ) -> List[Dict]:
+        audio, sr = AudioUtils.load_audio(audio_path, sr=self.config.audio.sample_rate)
+        return asyncio.run(self.stream_audio(audio, host, port, realtime))
+
+
+if __name__ == "__main__":
+    print("Testing StreamClient...")
+    print("=" * 70)
+
+    test_audio_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/Nikhil_Indoor.mp3")
+    if not test_audio_path.exists():
+        print(f"✗ Test audio file not found: {test_audio_path}")
+        exit(1)
+
+    client = StreamClient()
+
+    try:
+        events = client.stream_file(test_audio_path, realtime=False)
+    except ConnectionRefusedError:
+        print("✗ Server not running. Start it with: python stream_server.py")
+        exit(1)
+
+    utterances = [e for e in events if e['type'] == 'utterance']
+    print("=" * 70)
+    print(f"✓ Received {len(events)} events ({len(utterances)} utterances)")
+    assert events and events[-1]['type'] == 'end'
+    print("✓ StreamClient working correctly")
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import threading
+import numpy as np
+from typing import Dict, Optional
+import sys
+import os
+
+os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+from config import Config
+from audio_buffer import AudioBuffer
+from vad_processor import VADProcessor
+from noise_classifier import NoiseClassifier
+from transcriber import Transcriber
+from pipeline_live import LivePipeline
+from multistream_engine import MultiStreamEngine
+
+
+class StreamServer:
+    """
+    TCP front end for LivePipeline.
+
+    Clients send raw little-endian 16-bit mono PCM at the configured sample
+    rate and half-close the socket when done. The server replies with one
+    JSON object per line (noise updates and utterance results) and closes
+    the connection after the last utterance has been transcribed.
+
+    With use_engine=True all connections share one MultiStreamEngine, which
+    batches VAD and ASR across sessions instead of running a LivePipeline
+    per connection.
+    """
+
+    def __init__(self, config: Config = None, use_engine: bool = False):
+        self.config = config or Config.default()
+
+        print("Loading shared models...")
+        self.vad = VADProcessor(config)
+        self.classifier = NoiseClassifier(config)
+        self.transcriber = Transcriber(config, language="kn")
+        self.model_lock = threading.Lock()
+        print("✓ Shared models loaded\n")
+
+        self.engine = None
+        if use_engine:
+            self.engine = MultiStreamEngine(
+                config,
+                vad=self.vad,
+                classifier=self.classifier,
+                transcriber=self.transcriber
+            )
+
+        self.active_sessions = 0
+        self.total_sessions = 0
+        self._server = None
+
+    @property
+    def chunk_bytes(self) -> int:
+        return self.config.audio.chunk_samples * self.config.server.sample_width
+
+    def _decode_pcm(self, data: bytes) -> np.ndarray:
+        pcm = np.frombuffer(data, dtype='<i2')
+        return AudioBuffer.wrap(np.multiply(pcm, np.float32(1 / 32768.0), dtype=np.float32), self.config.audio.sample_rate)
+
+    async def _send_events(self, writer: asyncio.StreamWriter, events: asyncio.Queue):
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            try:
+                writer.write((json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8'))
+                await writer.drain()
+            except (ConnectionError, asyncio.CancelledError):
+                break
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        loop = asyncio.get_running_loop()
+
+        if self.active_sessions >= self.config.server.max_connections:
+            writer.write((json.dumps({'type': 'error', 'message': 'server busy'}) + "\n").encode('utf-8'))
+            await writer.drain()
+            writer.close()
+            return
+
+        self.active_sessions += 1
+        self.total_sessions += 1
+        session_id = self.total_sessions
+        print(f"\n[+] Session {session_id} connected: {peer}")
+
+        events = asyncio.Queue()
+
+        def on_event(event: Dict):
+            event = dict(event, session_id=session_id)
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        if self.engine is not None:
+            engine_session = self.engine.open_session(on_event, session_id=session_id)
+
+            def push(chunk):
+                return self.engine.push(engine_session, chunk, block=True)
+
+            def finish():
+                return self.engine.close_session(engine_session)
+        else:
+            session = LivePipeline(
+                self.config,
+                vad=self.vad,
+                classifier=self.classifier,
+                transcriber=self.transcriber,
+                event_callback=on_event,
+                model_lock=self.model_lock
+            )
+            session.start_stream()
+
+            def push(chunk):
+                return session.buffer_manager.push_chunk(chunk, True)
+
+            def finish():
+                session.finish_stream()
+                return {
+                    'utterances': session.utterance_count,
+                    'speech_time_sec': round(session.total_speech_time, 2)
+                }
+
+        sender = asyncio.create_task(self._send_events(writer, events))
+        pending = bytearray()
+
+        try:
+            while True:
+                data = await reader.read(self.chunk_bytes)
+                if not data:
+                    break
+
+                pending.extend(data)
+                while len(pending) >= self.chunk_bytes:
+                    chunk = self._decode_pcm(bytes(pending[:self.chunk_bytes]))
+                    del pending[:self.chunk_bytes]
+                    await loop.run_in_executor(None, push, chunk)
+
+            usable = len(pending) - len(pending) % self.config.server.sample_width
+            if usable > 0:
+                chunk = self._decode_pcm(bytes(pending[:usable]))
+                await loop.run_in_executor(None, push, chunk)
+        except ConnectionError as e:
+            print(f"\n✗ Session {session_id} connection error: {e}")
+        finally:
+            summary = await loop.run_in_executor(None, finish) or {}
+            events.put_nowait(dict(summary, type='end', session_id=session_id))
+            events.put_nowait(None)
+            await sender
+
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+            self.active_sessions -= 1
+            print(f"[-] Session {session_id} closed: {peer}")
+
+    async def serve(self, host: Optional[str] = None, port: Optional[int] = None):
+        host = host or self.config.server.host
+        port = port or self.config.server.port
+
+        if self.engine is not None:
+            self.engine.start()
+
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+
+        print("="*70)
+        print(f"🌐 STREAMING SERVER LISTENING ON {host}:{port}")
+        print("="*70)
+        print(f"  Format: {self.config.audio.sample_rate}Hz mono 16-bit PCM")
+        print(f"  Max connections: {self.config.server.max_connections}")
+        print(f"  Mode: {'batched multi-stream engine' if self.engine else 'pipeline per connection'}")
+        print("="*70 + "\n")
+
+        async with self._server:
+            await self._server.serve_forever()
+
+    def run(self, host: Optional[str] = None, port: Optional[int] = None):
+        try:
+            asyncio.run(self.serve(host, port))
+        except KeyboardInterrupt:
+            print("\n\n⚠️  Server stopped by user")
+        finally:
+            if self.engine is not None:
+                self.engine.stop()
+
+
+if __name__ == "__main__":
+
+    print("\n🚀 KANNADA STREAMING ASR SERVER")
+    print("="*70)
+
+    args = sys.argv[1:]
+    use_engine = "--engine" in args
+    args = [a for a in args if a != "--engine"]
+
+    config = Config.default()
+    if args:
+        config.server.port = int(args[0])
+
+    server = StreamServer(config, use_engine=use_engine)
+    server.run()
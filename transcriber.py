@@ -1,10 +1,14 @@
 import torch
 import numpy as np
+import time
+from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from scipy import signal
 from config import Config
 from audio_utils import AudioUtils
+from audio_buffer import AudioBuffer, COPIES
+from model_bundle import ModelBundle
 import os
 
 
@@ -13,14 +17,18 @@ os.environ['TOKENIZERS_PARALLELISM'] = 'false'
 
 class Transcriber:
     
+    MODEL_NAME = 'ai4bharat/indic-conformer-600m-multilingual'
+    
     def __init__(self, config: Config = None, language: str = "kn"):
         self.config = config or Config.default()
-        self.model_name = 'ai4bharat/indic-conformer-600m-multilingual'
+        self.model_name = self.MODEL_NAME
         self.language = language
-        self.decoding_method = 'rnnt'
+        self.decoding_method = self.config.asr.decoding_method
         
         self.model = None
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.precision = self.config.models.precision
+        self.batch_supported = None
         
         self._load_conformer()
     
@@ -36,33 +44,45 @@ class Transcriber:
         
         torch.set_num_threads(1)
         
-        self.model = AutoModel.from_pretrained(
-            self.model_name,
-            trust_remote_code=True,
-            local_files_only=False
-        )
+        bundle = ModelBundle(self.config)
+        if bundle.use_for("conformer"):
+            self.model = bundle.load_conformer()
+        else:
+            self.model = AutoModel.from_pretrained(
+                self.model_name,
+                trust_remote_code=True,
+                local_files_only=False
+            )
         
         if self.device == 'cuda':
             self.model = self.model.to('cuda')
         
         self.model.eval()
     
-    def _ensure_16khz(self, audio: np.ndarray, current_sr: int) -> np.ndarray:
+    def _autocast(self):
+        return torch.autocast(device_type=self.device, dtype=torch.bfloat16, enabled=self.precision == "bf16")
+    
+    def _ensure_16khz(self, audio: np.ndarray, current_sr: int) -> AudioBuffer:
+        audio = AudioBuffer.wrap(audio, current_sr, site="transcriber")
         if current_sr == 16000:
             return audio
         num_samples = int(len(audio) * 16000 / current_sr)
-        resampled = signal.resample(audio, num_samples)
-        return resampled.astype(np.float32)
+        # float32 in gives float32 out of scipy's FFT, so wrap() keeps it as is.
+        return AudioBuffer.wrap(signal.resample(audio.numpy(), num_samples), 16000, site="transcriber.resample")
     
     def transcribe(
         self,
         audio: np.ndarray,
-        sr: int = 16000
+        sr: int = 16000,
+        decoding_method: Optional[str] = None
     ) -> Dict[str, str]:
         
         audio_16k = self._ensure_16khz(audio, sr)
         
-        text = self._transcribe_with_conformer(audio_16k)
+        if len(audio_16k) > self.config.asr.longform_threshold * 16000:
+            return self.transcribe_long(audio_16k, 16000, decoding_method)
+        
+        text = self._transcribe_with_conformer(audio_16k, decoding_method)
         
         result = {
             "text": text,
@@ -72,14 +92,92 @@ class Transcriber:
         
         return result
     
-    def _transcribe_with_conformer(self, audio: np.ndarray) -> str:
+    def plan_windows(self, audio: np.ndarray, sr: int = 16000) -> List[Tuple[int, int]]:
+        window = int(self.config.asr.window_duration * sr)
+        overlap = int(self.config.asr.window_overlap * sr)
+        search = int(self.config.asr.cut_search_duration * sr)
+        frame = max(1, int(self.config.asr.cut_frame_duration * sr))
+        
+        windows = []
+        start = 0
+        while True:
+            end = start + window
+            if end >= len(audio):
+                windows.append((start, len(audio)))
+                break
+            
+            search_start = max(start + overlap + frame, end - search)
+            region = audio[search_start:end]
+            n_frames = len(region) // frame
+            if n_frames > 0:
+                energy = np.mean(region[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1)
+                end = search_start + int(np.argmin(energy)) * frame + frame // 2
+            
+            windows.append((start, end))
+            start = end - overlap
+        
+        return windows
+    
+    def _stitch(self, words: List[str], next_words: List[str], overlap_fraction: float) -> List[str]:
+        if not words:
+            return list(next_words)
+        if not next_words:
+            return words
+        
+        k = self.config.asr.stitch_max_words
+        tail = words[-k:]
+        head = next_words[:k]
+        
+        match = SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(0, len(tail), 0, len(head))
+        if match.size >= min(2, len(head)):
+            keep = len(words) - len(tail) + match.a
+            return words[:keep] + next_words[match.b:]
+        
+        drop = int(round(len(next_words) * overlap_fraction))
+        return words + next_words[drop:]
+    
+    def transcribe_long(
+        self,
+        audio: np.ndarray,
+        sr: int = 16000,
+        decoding_method: Optional[str] = None
+    ) -> Dict:
+        
+        audio_16k = self._ensure_16khz(audio, sr)
+        windows = self.plan_windows(audio_16k, 16000)
+        overlap = int(self.config.asr.window_overlap * 16000)
+        
+        segments = []
+        words = []
+        for i, (start, end) in enumerate(windows):
+            decode_start = time.time()
+            text = self._transcribe_with_conformer(audio_16k[start:end], decoding_method)
+            decode_time = time.time() - decode_start
+            
+            segments.append({
+                "window": i,
+                "start_sec": round(start / 16000, 2),
+                "end_sec": round(end / 16000, 2),
+                "text": text,
+                "decode_time_sec": round(decode_time, 3)
+            })
+            
+            overlap_fraction = min(overlap, end - start) / (end - start) if i > 0 else 0.0
+            words = self._stitch(words, text.split(), overlap_fraction)
+        
+        return {
+            "text": " ".join(words),
+            "language": self.language,
+            "model": self.model_name,
+            "segments": segments
+        }
+    
+    def _transcribe_with_conformer(self, audio: np.ndarray, decoding_method: Optional[str] = None) -> str:
         try:
-            with torch.no_grad():
-                audio_tensor = torch.from_numpy(audio).unsqueeze(0)
-                if self.device == 'cuda':
-                    audio_tensor = audio_tensor.to('cuda')
+            with torch.no_grad(), self._autocast():
+                audio_tensor = AudioBuffer.wrap(audio, site="transcriber").to_torch(self.device).unsqueeze(0)
                 
-                transcription = self.model(audio_tensor, self.language, self.decoding_method)
+                transcription = self.model(audio_tensor, self.language, decoding_method or self.decoding_method)
             
             if isinstance(transcription, list) and len(transcription) > 0:
                 text = transcription[0]
@@ -93,6 +191,95 @@ class Transcriber:
             print(f"Transcription error: {e}")
             return ""
     
+    def plan_batches(self, lengths: List[int], sr: int = 16000) -> List[List[int]]:
+        """
+        Groups input indices for batched decoding. The conformer takes no
+        per-item lengths, so every row is zero-padded to the longest in its
+        batch; a batch only spans batch_max_pad seconds of length difference.
+        Inputs over longform_threshold get a group of their own.
+        """
+        max_pad = int(self.config.asr.batch_max_pad * sr)
+        longform = self.config.asr.longform_threshold * sr
+        
+        batches = []
+        for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            if batches and lengths[i] <= longform and lengths[i] - lengths[batches[-1][0]] <= max_pad:
+                batches[-1].append(i)
+            else:
+                batches.append([i])
+        
+        return batches
+    
+    def transcribe_batch(
+        self,
+        audios: list,
+        sr: int = 16000,
+        decoding_method: Optional[str] = None
+    ) -> list:
+        """
+        Transcribes many utterances, batching those of near-equal length.
+        Single-item groups (including long-form inputs) go through transcribe().
+        """
+        
+        audios_16k = [self._ensure_16khz(audio, sr) for audio in audios]
+        
+        results = [None] * len(audios_16k)
+        for group in self.plan_batches([len(audio) for audio in audios_16k]):
+            if len(group) == 1:
+                results[group[0]] = self.transcribe(audios_16k[group[0]], 16000, decoding_method)
+                continue
+            
+            texts = self._transcribe_batch_with_conformer([audios_16k[i] for i in group], decoding_method)
+            for i, text in zip(group, texts):
+                results[i] = {"text": text, "language": self.language, "model": self.model_name}
+        
+        return results
+    
+    def _transcribe_batch_with_conformer(self, audios: list, decoding_method: Optional[str] = None) -> list:
+        """
+        One padded conformer call for a length group. The model's forward
+        takes no per-row lengths, so shorter rows see up to batch_max_pad of
+        trailing zeros. The first batch is checked against sequential decoding
+        of the same rows; batching stays on only if the model returns one text
+        per row and they match, and the verdict is cached in batch_supported.
+        """
+        sequential = lambda: [self.transcribe(audio, 16000, decoding_method)["text"] for audio in audios]
+        if self.batch_supported is False:
+            return sequential()
+        
+        max_len = max(len(audio) for audio in audios)
+        batch = np.zeros((len(audios), max_len), dtype=np.float32)
+        for i, audio in enumerate(audios):
+            batch[i, :len(audio)] = audio
+        COPIES.record("asr_batch.pad", batch.nbytes)
+        
+        texts = None
+        try:
+            with torch.no_grad(), self._autocast():
+                audio_tensor = torch.from_numpy(batch)
+                if self.device == 'cuda':
+                    audio_tensor = audio_tensor.to('cuda')
+                
+                transcription = self.model(audio_tensor, self.language, decoding_method or self.decoding_method)
+            
+            if isinstance(transcription, list) and len(transcription) == len(audios):
+                texts = [str(text).strip() for text in transcription]
+            else:
+                print(f"Batched transcription returned {type(transcription).__name__}, "
+                      f"not {len(audios)} texts; disabling batching")
+                self.batch_supported = False
+        except Exception as e:
+            print(f"Batched transcription failed, falling back to sequential: {e}")
+        
+        if texts is not None and self.batch_supported is None:
+            reference = sequential()
+            self.batch_supported = texts == reference
+            if not self.batch_supported:
+                print("Batched transcription differs from sequential decoding; disabling batching")
+            return reference
+        
+        return texts if texts is not None else sequential()
+    
     def transcribe_utterances(
         self,
         utterances: list,
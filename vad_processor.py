@@ -4,6 +4,24 @@ from pathlib import Path
 from typing import List, Dict, Tuple
 from config import Config
 from audio_utils import AudioUtils
+from audio_buffer import AudioBuffer, COPIES
+from model_bundle import ModelBundle
+
+
+class _ProbabilityReplay:
+    """Stands in for the silero model, returning precomputed frame probabilities in order."""
+    
+    def __init__(self, probs: np.ndarray):
+        self.probs = probs
+        self.index = 0
+    
+    def reset_states(self):
+        self.index = 0
+    
+    def __call__(self, frame, sr):
+        prob = self.probs[min(self.index, len(self.probs) - 1)]
+        self.index += 1
+        return torch.tensor(float(prob))
 
 
 class VADProcessor:
@@ -15,6 +33,11 @@ class VADProcessor:
         self._load_model()
     
     def _load_model(self):
+        bundle = ModelBundle(self.config)
+        if bundle.use_for("vad"):
+            self.model, self.utils = bundle.load_vad()
+            return
+        
         torch.hub.set_dir(str(self.config.paths.models_cache_dir))
         
         model, utils = torch.hub.load(
@@ -37,11 +60,14 @@ class VADProcessor:
             audio = AudioUtils.resample_audio(audio, sr, 16000)
             sr = 16000
         
-        audio_tensor = torch.from_numpy(audio).float()
+        audio_tensor = AudioBuffer.wrap(audio, sr, site="vad").to_torch()
         
+        return self._timestamps(audio_tensor, self.model, sr)
+    
+    def _timestamps(self, audio_tensor, model, sr: int) -> List[Dict]:
         speech_timestamps = self.utils[0](
             audio_tensor,
-            self.model,
+            model,
             sampling_rate=sr,
             threshold=self.config.audio.vad_threshold,
             min_speech_duration_ms=int(self.config.audio.vad_min_speech_duration * 1000),
@@ -59,6 +85,72 @@ class VADProcessor:
         
         return timestamps
     
+    def timestamps_from_probabilities(
+        self,
+        probs: np.ndarray,
+        num_samples: int,
+        sr: int = 16000
+    ) -> List[Dict]:
+        """
+        Speech timestamps for one chunk from its precomputed 512-sample frame
+        probabilities, through the same silero segmentation as process_audio()
+        (threshold hysteresis, minimum speech and silence durations).
+        """
+        return self._timestamps(torch.zeros(num_samples), _ProbabilityReplay(probs), sr)
+    
+    def speech_probabilities_batch(
+        self,
+        chunks: List[np.ndarray],
+        sr: int = 16000
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if sr != 16000:
+            chunks = [AudioUtils.resample_audio(c, sr, 16000) for c in chunks]
+            sr = 16000
+        
+        window = 512
+        lengths = np.array([len(c) for c in chunks])
+        n_frames = max(1, int(np.ceil(lengths.max() / window)))
+        
+        batch = np.zeros((len(chunks), n_frames * window), dtype=np.float32)
+        for i, chunk in enumerate(chunks):
+            batch[i, :len(chunk)] = chunk
+        COPIES.record("vad_batch.pad", batch.nbytes)
+        
+        audio_tensor = torch.from_numpy(batch)
+        probs = np.zeros((len(chunks), n_frames), dtype=np.float32)
+        
+        self.model.reset_states()
+        with torch.no_grad():
+            for j in range(n_frames):
+                frame = audio_tensor[:, j * window:(j + 1) * window]
+                probs[:, j] = self.model(frame, sr).reshape(-1).numpy()
+        self.model.reset_states()
+        
+        valid = np.arange(n_frames)[None, :] * window < lengths[:, None]
+        
+        return probs, valid
+    
+    def speech_ratio_batch(
+        self,
+        chunks: List[np.ndarray],
+        sr: int = 16000
+    ) -> np.ndarray:
+        """Fraction of each chunk inside speech segments, as LivePipeline measures it from process_audio()."""
+        if sr != 16000:
+            chunks = [AudioUtils.resample_audio(c, sr, 16000) for c in chunks]
+            sr = 16000
+        
+        probs, valid = self.speech_probabilities_batch(chunks, sr)
+        
+        ratios = np.zeros(len(chunks))
+        for i, chunk in enumerate(chunks):
+            if len(chunk) == 0:
+                continue
+            timestamps = self.timestamps_from_probabilities(probs[i, valid[i]], len(chunk), sr)
+            ratios[i] = sum(ts['end'] - ts['start'] for ts in timestamps) / len(chunk)
+        
+        return ratios
+    
     def extract_speech_segments(
         self,
         audio: np.ndarray,